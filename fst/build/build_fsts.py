@@ -4,18 +4,48 @@
 from __future__ import annotations
 
 import argparse
+import ast
+import functools
 import hashlib
 import json
 import re
 import shutil
-import subprocess
+import os
 import sys
+import threading
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import NamedTuple
 from zipfile import ZipFile
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+import build_trace  # noqa: E402
+from acyclic_fst import write_att  # noqa: E402
+from artifact_store import ArtifactStore, tracked_by_git  # noqa: E402
+from foma_reader import load_transducer, read_header  # noqa: E402
+from lexc_shards import write_shards  # noqa: E402
+from model_router import ROUTER_FILE, ROUTER_SIDECAR, router_sidecar  # noqa: E402
+from patch_stack import PatchStateCache, apply_patch_stack  # noqa: E402
+from relation_pipeline import (  # noqa: E402
+    BASE,
+    Dedupe,
+    PipelineResult,
+    Reject,
+    RewriteUpper,
+    Stage,
+    foma_pairs,
+    run_pipeline,
+    tsv_pairs,
+)
+from sigma_tokenizer import cached_tokenizer  # noqa: E402
+
 VENDOR = ROOT / "vendor" / "thamizhi-morph"
+LIB_DIR = ROOT / "fst" / "lib"
+COMPOSITION_BUILDER = ROOT / "fst" / "build" / "build_productive_auxiliary_fst.py"
 PATCH_DIR = ROOT / "fst" / "patches"
 WORK_ROOT = ROOT / "fst" / "build" / ".work"
 MANIFEST_PATH = ROOT / "fst" / "build" / "manifest.json"
@@ -23,9 +53,28 @@ CANONICAL_MODELS = ROOT / "build" / "fst-models"
 RUNTIME_MODELS = ROOT / "runtime"
 WORDLIST_MODELS = ROOT / "static-word-list" / "fst-models"
 SERVER_MODELS = ROOT / "server" / "fst-models"
+MODEL_DESTINATIONS = {
+    "build/fst-models": CANONICAL_MODELS,
+    "runtime": RUNTIME_MODELS,
+    "static-word-list/fst-models": WORDLIST_MODELS,
+    "server/fst-models": SERVER_MODELS,
+}
+SIDECAR_DESTINATIONS = ("build/fst-models", "static-word-list/fst-models", "server/fst-models")
 PINNED_UPSTREAM_ZIPS = ROOT / "fst" / "upstream-zips"
 PINNED_UPSTREAM_MODELS = ROOT / "fst" / "upstream-models"
 PINNED_FALLBACK_UPSTREAM_COMMIT = "a296417ac603fd44eda35645369f1257d96bed89"
+LOG_DIR = WORK_ROOT / "logs"
+RUNTIME_WORK = WORK_ROOT / "runtime-models"
+# Surfaces sampled per model for the equivalence spot check and benchmark.
+BENCHMARK_QUERIES = 2000
+FLAG_DIACRITIC = re.compile(r"@(?P<op>[PNRDCU])\.(?P<feature>[^.@]+)(?:\.[^@]*)?@")
+# Outside WORK_ROOT so that a clean build still restores unchanged components.
+BUILD_CACHE_DIR = ROOT / "fst" / "build" / ".cache"
+PATCH_STATE_DIR = BUILD_CACHE_DIR / "patch-states"
+BUILD_CACHE_KEEP = 3
+ARTIFACT_STORE = BUILD_CACHE_DIR / "artifacts"
+# Components whose models and .work sources build_productive_auxiliary_fst.py reads.
+COMPOSITION_INPUTS = ("noun", "verb-c3", "verb-c4", "verb-c11", "verb-c12", "verb-c62", "verb-c-rest")
 
 COMPONENTS = [
     {
@@ -33,6 +82,7 @@ COMPONENTS = [
         "zip": "ThamizhiMorph-Nouns.zip",
         "entry": "tamil-noun.foma",
         "output": "noun.fst",
+        "shard_lexicon": "Nouns.lexc",
         "patches": [
             "0001-fix-c11-acc.patch",
             "0002-fix-noun-class-duplicates.patch",
@@ -854,15 +904,27 @@ def sha256_file(path: Path) -> str:
     return h.hexdigest()
 
 
+class BuildTask(NamedTuple):
+    deps: tuple[str, ...]
+    run: Callable[[dict[str, dict]], dict]
+
+
+# Log file of the build task running on the current thread, if any.
+_build_log = threading.local()
+
+
 def run(cmd: list[str], cwd: Path | None = None, stdin: str | None = None) -> str:
-    completed = subprocess.run(
-        cmd,
-        cwd=str(cwd) if cwd else None,
-        input=stdin,
-        text=True,
-        capture_output=True,
-        check=True,
-    )
+    completed = build_trace.run_child(cmd, cwd=str(cwd) if cwd else None, input=stdin)
+    log = getattr(_build_log, "handle", None)
+    if log is not None:
+        log.write(f"$ {' '.join(cmd)}" + (f"  (in {cwd})" if cwd else "") + "\n")
+        if stdin:
+            log.write(stdin if stdin.endswith("\n") else stdin + "\n")
+        log.write(completed.stdout)
+        log.write(completed.stderr)
+        log.write(f"[exit {completed.returncode}]\n")
+        log.flush()
+    completed.check_returncode()
     return completed.stdout
 
 
@@ -926,19 +988,24 @@ def extract_zip(zip_name: str, out_dir: Path) -> None:
         zf.extractall(out_dir)
 
 
-def apply_patches(work_dir: Path, patch_names: list[str]) -> list[dict]:
-    records = []
-    for patch_name in patch_names:
-        patch_path = PATCH_DIR / patch_name
-        if not patch_path.exists():
-            raise FileNotFoundError(f"Patch file not found: {patch_path}")
-        run(["git", "apply", "--check", str(patch_path)], cwd=work_dir)
-        run(["git", "apply", str(patch_path)], cwd=work_dir)
-        records.append({
+def apply_patches(work_dir: Path, patch_names: list[str], base_key: str = "", use_cache: bool = True) -> list[dict]:
+    """Apply the ordered patch stack in process; ``base_key`` names the unpatched tree."""
+    patch_paths = [PATCH_DIR / patch_name for patch_name in patch_names]
+    cache = PatchStateCache(PATCH_STATE_DIR) if use_cache and base_key else None
+    result = apply_patch_stack(work_dir, patch_paths, base_key=base_key, cache=cache)
+    log = getattr(_build_log, "handle", None)
+    if log is not None:
+        log.write(
+            f"patches: {result.restored} restored from cache, {result.applied} applied; "
+            f"touched {', '.join(result.touched)}\n"
+        )
+    return [
+        {
             "file": str((Path("fst") / "patches" / patch_name).as_posix()),
             "sha256": sha256_file(patch_path),
-        })
-    return records
+        }
+        for patch_name, patch_path in zip(patch_names, patch_paths)
+    ]
 
 
 def generate_adj_entry(work_dir: Path) -> None:
@@ -966,93 +1033,178 @@ def compile_foma(work_dir: Path, entry_file: str, output_name: str) -> Path:
     return out_path
 
 
-def remove_finite_relation_pairs(model_path: Path, rejected_pairs: list[tuple[str, str]]) -> None:
-    """Recompile a finite prebuilt relation after removing exact upper/lower pairs."""
-    pairs_path = model_path.with_suffix(".pairs.txt")
-    script_path = model_path.with_suffix(".filter.foma")
-    filtered_path = model_path.with_suffix(".filtered.fst")
+def compile_sharded_foma(
+    work_dir: Path, entry_file: str, output_name: str, lexc_name: str, count: int, verify: bool,
+) -> tuple[Path, dict]:
+    """Compile ``entry_file`` as ``count`` lexicon shards in parallel and union them.
+
+    Each shard runs a copy of the entry script whose ``read lexc`` names a
+    shard of ``lexc_name`` (see lexc_shards); the shard nets are unioned and
+    minimized into ``output_name``. With ``verify`` the monolithic script is
+    compiled alongside and the two are compared by a sampled pair diff.
+    """
+    shard_dir = work_dir / "shards"
+    shards = write_shards(work_dir / lexc_name, count, shard_dir)
+    script = (work_dir / entry_file).read_text(encoding="utf-8")
+    read_lexc = re.compile(rf"^[ \t]*read lexc[ \t]+{re.escape(lexc_name)}[ \t]*$", re.MULTILINE)
+    if len(read_lexc.findall(script)) != 1:
+        raise RuntimeError(f"{entry_file} must read {lexc_name} exactly once to be sharded")
+
+    jobs: dict[str, tuple[str, str]] = {}
+    for shard in shards:
+        shard_lexc = shard.path.relative_to(work_dir).as_posix()
+        shard_entry = shard.path.with_suffix(".foma")
+        shard_entry.write_text(read_lexc.sub(f"read lexc {shard_lexc}", script), encoding="utf-8")
+        jobs[shard.path.stem] = (shard_entry.relative_to(work_dir).as_posix(), f"shards/{shard.path.stem}.fst")
+    if verify:
+        jobs["monolithic"] = (entry_file, f"shards/monolithic-{output_name}")
+
+    # Workers are not build-graph tasks, so each gets its own log next to the task's.
+    def compile_job(job: str) -> tuple[Path, float]:
+        started = time.perf_counter()
+        with (LOG_DIR / f"{work_dir.name}.{job}.log").open("w", encoding="utf-8") as handle:
+            _build_log.handle = handle
+            try:
+                with build_trace.stage("compile-shard", task=f"{work_dir.name}/{job}"):
+                    path = compile_foma(work_dir, *jobs[job])
+            finally:
+                _build_log.handle = None
+        return path, time.perf_counter() - started
+
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        compiled = dict(zip(jobs, executor.map(compile_job, jobs)))
+
+    started = time.perf_counter()
+    union = " | ".join(f'@"{compiled[shard.path.stem][0].relative_to(work_dir).as_posix()}"' for shard in shards)
+    run(["foma", "-q"], cwd=work_dir, stdin=f"regex {union};\nminimize net\nsave stack {output_name}\nquit\n")
+    out_path = work_dir / output_name
+    if not out_path.exists() or out_path.stat().st_size == 0:
+        raise RuntimeError(f"foma did not produce output: {out_path}")
+    report: dict[str, object] = {
+        "lexc": lexc_name,
+        "split_lexicons": sorted({lexicon for shard in shards for lexicon, _initial in shard.groups}),
+        "shards": [
+            {
+                "lexc": shard.path.name,
+                "entries": shard.entries,
+                "groups": len(shard.groups),
+                "states": read_header(compiled[shard.path.stem][0])["states"],
+                "seconds": round(compiled[shard.path.stem][1], 2),
+            }
+            for shard in shards
+        ],
+        "union_seconds": round(time.perf_counter() - started, 2),
+    }
+    if verify:
+        monolithic_path, monolithic_seconds = compiled["monolithic"]
+        report["verified"] = {
+            "monolithic_seconds": round(monolithic_seconds, 2),
+            **sampled_pair_diff(monolithic_path, out_path),
+        }
+    return out_path, report
+
+
+def sampled_pair_diff(expected_path: Path, actual_path: Path) -> dict[str, int]:
+    """Fail unless two models share sigma and agree on sampled surfaces and their analyses.
+
+    Surfaces come from random paths of both models; every analysis either
+    returns is generated back on both, so pairs missing on either side show up.
+    """
+    if sorted(read_header(expected_path)["sigma"]) != sorted(read_header(actual_path)["sigma"]):
+        raise RuntimeError(f"{actual_path.name} and {expected_path.name} have different sigma")
+    expected = load_transducer(expected_path)
+    actual = load_transducer(actual_path)
+    surfaces = list(dict.fromkeys([
+        *expected.random_lower(BENCHMARK_QUERIES), *actual.random_lower(BENCHMARK_QUERIES, seed=1),
+    ]))
+    differences: list[str] = []
+    expected_analyses = expected.analyze(surfaces)
+    actual_analyses = actual.analyze(surfaces)
+    analyses: set[str] = set()
+    for surface in surfaces:
+        before, after = set(expected_analyses[surface]), set(actual_analyses[surface])
+        analyses |= before | after
+        differences.extend(f"{analysis}\t{surface}\t(-)" for analysis in before - after)
+        differences.extend(f"{analysis}\t{surface}\t(+)" for analysis in after - before)
+    expected_surfaces = expected.generate(sorted(analyses))
+    actual_surfaces = actual.generate(sorted(analyses))
+    pairs = 0
+    for analysis in sorted(analyses):
+        before, after = set(expected_surfaces[analysis]), set(actual_surfaces[analysis])
+        pairs += len(before | after)
+        differences.extend(f"{analysis}\t{surface}\t(-)" for surface in before - after)
+        differences.extend(f"{analysis}\t{surface}\t(+)" for surface in after - before)
+    if differences:
+        shown = "\n".join(sorted(set(differences))[:20])
+        raise RuntimeError(f"{actual_path.name} differs from {expected_path.name} on sampled pairs:\n{shown}")
+    return {"sampled_surfaces": len(surfaces), "sampled_analyses": len(analyses), "sampled_pairs": pairs}
+
+
+def compile_finite_relation(pairs: Iterable[tuple[str, str]], output_path: Path) -> dict[str, int]:
+    """Save the minimal acyclic transducer for ``pairs``, built directly rather than from a regex union.
+
+    Symbols are single characters on both sides, so the result never adds
+    whole-string symbols that would change how flookup (or a union with
+    another model) tokenizes input.
+    """
+    att_path = output_path.with_suffix(".att")
+    stats = write_att(pairs, att_path)
     run(
         ["foma"],
-        cwd=model_path.parent,
-        stdin=f"load stack {model_path}\nprint pairs > {pairs_path}\nquit\n",
+        cwd=output_path.parent,
+        stdin=f"read att {att_path}\nsave stack {output_path}\nquit\n",
     )
+    if not output_path.exists() or output_path.stat().st_size == 0:
+        raise RuntimeError(f"foma did not produce output: {output_path}")
+    att_path.unlink()
+    return stats
+
+
+def finish_relation_pipeline(model_path: Path, result: PipelineResult, suffix: str) -> dict[str, int]:
+    """Compile the pipeline's distinct pairs over ``model_path`` and log its stage report."""
+    output_path = model_path.with_suffix(suffix)
+    started = time.perf_counter()
+    stats = compile_finite_relation(result.pairs, output_path)
+    output_path.replace(model_path)
+    log = getattr(_build_log, "handle", None)
+    if log is not None:
+        log.write(f"relation pipeline for {model_path.name}:\n")
+        for row in result.report():
+            log.write(f"  {row['stage']}: {row['in']} in, {row['out']} out, {row['seconds']:.3f}s\n")
+        log.write(
+            f"  compile: {stats['pairs']} pairs, {stats['states']} states, {stats['arcs']} arcs, "
+            f"{time.perf_counter() - started:.3f}s\n"
+        )
+        log.flush()
+    return stats
+
+
+def pipeline_counts(result: PipelineResult) -> list[dict]:
+    """Per-stage pair counts for the manifest (timings stay in the build log)."""
+    return [{"stage": row["stage"], "in": row["in"], "out": row["out"]} for row in result.report()]
+
+
+def remove_finite_relation_pairs(model_path: Path, rejected_pairs: list[tuple[str, str]]) -> None:
+    """Recompile a finite prebuilt relation after removing exact upper/lower pairs."""
     rejected = set(rejected_pairs)
-    kept: list[tuple[str, str]] = []
-    seen: set[tuple[str, str]] = set()
-    for line in pairs_path.read_text(encoding="utf-8").splitlines():
-        upper, lower = line.split("\t", 1)
-        pair = (upper, lower)
-        if pair in rejected:
-            seen.add(pair)
-        else:
-            kept.append(pair)
-    missing = rejected - seen
+    reject = Reject(rejected)
+    result = run_pipeline([(BASE, foma_pairs(model_path))], [reject])
+    missing = rejected - reject.matched
     if missing:
         raise RuntimeError(f"Prebuilt cleanup pairs not found in {model_path.name}: {sorted(missing)}")
-
-    def quoted(value: str) -> str:
-        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
-
-    relation = " |\n".join(
-        f"[{quoted(upper)} .x. {quoted(lower)}]" for upper, lower in kept
-    )
-    script_path.write_text(
-        f"regex {relation};\nsave stack {filtered_path}\nquit\n",
-        encoding="utf-8",
-    )
-    run(["foma", "-q", "-f", str(script_path)], cwd=model_path.parent)
-    filtered_path.replace(model_path)
-    pairs_path.unlink()
-    script_path.unlink()
+    finish_relation_pipeline(model_path, result, ".filtered.fst")
 
 
 def add_finite_relation_pairs(model_path: Path, additions_path: Path) -> int:
     """Recompile a finite relation after adding explicit upper/lower pairs."""
-    pairs_path = model_path.with_suffix(".pairs.txt")
-    script_path = model_path.with_suffix(".extend.foma")
-    extended_path = model_path.with_suffix(".extended.fst")
-    run(
-        ["foma"],
-        cwd=model_path.parent,
-        stdin=f"load stack {model_path}\nprint pairs > {pairs_path}\nquit\n",
+    dedupe = Dedupe()
+    result = run_pipeline(
+        [(BASE, foma_pairs(model_path)), (additions_path.name, tsv_pairs(additions_path))],
+        [dedupe],
     )
-    pairs: list[tuple[str, str]] = []
-    seen: set[tuple[str, str]] = set()
-    for line in pairs_path.read_text(encoding="utf-8").splitlines():
-        pair = tuple(line.split("\t", 1))
-        if len(pair) != 2:
-            raise RuntimeError(f"Malformed finite relation pair: {line!r}")
-        typed_pair = (pair[0], pair[1])
-        if typed_pair not in seen:
-            seen.add(typed_pair)
-            pairs.append(typed_pair)
-
-    added = 0
-    for line in additions_path.read_text(encoding="utf-8").splitlines():
-        pair = tuple(line.split("\t", 1))
-        if len(pair) != 2:
-            raise RuntimeError(f"Malformed extension pair in {additions_path.name}: {line!r}")
-        typed_pair = (pair[0], pair[1])
-        if typed_pair not in seen:
-            seen.add(typed_pair)
-            pairs.append(typed_pair)
-            added += 1
-
-    def quoted(value: str) -> str:
-        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
-
-    relation = " |\n".join(
-        f"[{quoted(upper)} .x. {quoted(lower)}]" for upper, lower in pairs
-    )
-    script_path.write_text(
-        f"regex {relation};\nsave stack {extended_path}\nquit\n",
-        encoding="utf-8",
-    )
-    run(["foma", "-q", "-f", str(script_path)], cwd=model_path.parent)
-    extended_path.replace(model_path)
-    pairs_path.unlink()
-    script_path.unlink()
-    return added
+    finish_relation_pipeline(model_path, result, ".extended.fst")
+    return dedupe.by_origin.get(additions_path.name, 0)
 
 
 def canonicalize_deictic_person(model_path: Path) -> int:
@@ -1064,47 +1216,52 @@ def canonicalize_deictic_person(model_path: Path) -> int:
         "உது": "3sgn", "உவை": "3pln", "அது": "3sgn",
     }
     replaceable = {"2sgm", "2sgf", "2sgh", "2sgn", "2pl"}
-    pairs_path = model_path.with_suffix(".pairs.txt")
-    script_path = model_path.with_suffix(".canonicalize.foma")
-    corrected_path = model_path.with_suffix(".canonicalized.fst")
-    run(
-        ["foma"],
-        cwd=model_path.parent,
-        stdin=f"load stack {model_path}\nprint pairs > {pairs_path}\nquit\n",
-    )
-    corrected = 0
-    pairs: list[tuple[str, str]] = []
-    seen: set[tuple[str, str]] = set()
-    for line in pairs_path.read_text(encoding="utf-8").splitlines():
-        upper, lower = line.split("\t", 1)
+
+    def corrected_upper(upper: str) -> str:
         parts = upper.split("+")
         person = person_by_lemma.get(parts[0])
         if person and "dem" in parts and (({"prox", "med"} & set(parts)) or parts[0] == "அது"):
             if parts[0] in {"இது", "உது", "அது"} and "pl" in parts:
                 person = "3pln"
-            updated = [person if part in replaceable else part for part in parts]
-            new_upper = "+".join(updated)
-            corrected += int(new_upper != upper)
-            upper = new_upper
-        pair = (upper, lower)
-        if pair not in seen:
-            seen.add(pair)
-            pairs.append(pair)
-
-    def quoted(value: str) -> str:
-        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+            return "+".join(person if part in replaceable else part for part in parts)
+        return upper
 
-    relation = " |\n".join(
-        f"[{quoted(upper)} .x. {quoted(lower)}]" for upper, lower in pairs
-    )
-    script_path.write_text(
-        f"regex {relation};\nsave stack {corrected_path}\nquit\n", encoding="utf-8"
-    )
-    run(["foma", "-q", "-f", str(script_path)], cwd=model_path.parent)
-    corrected_path.replace(model_path)
-    pairs_path.unlink()
-    script_path.unlink()
-    return corrected
+    rewrite = RewriteUpper(corrected_upper, "canonicalize-person")
+    result = run_pipeline([(BASE, foma_pairs(model_path))], [rewrite])
+    finish_relation_pipeline(model_path, result, ".canonicalized.fst")
+    return rewrite.changed
+
+
+def pronoun_canonicalizer() -> Callable[[str], str]:
+    """Rewrite for pronoun analyses: canonical deictic person and oblique-stem lemma."""
+    person_by_lemma = {
+        "இவன்": "3sgm", "இவள்": "3sgf", "இவர்": "3sgh", "இவர்கள்": "3pl",
+        "இது": "3sgn", "இவை": "3pln",
+        "உவன்": "3sgm", "உவள்": "3sgf", "உவர்": "3sgh", "உவர்கள்": "3pl",
+        "உது": "3sgn", "உவை": "3pln", "அது": "3sgn",
+    }
+    replaceable = {"2sgm", "2sgf", "2sgh", "2sgn", "2pl", "3sgn"}
+    oblique_lemma_map = {
+        "என்": "நான்", "எங்கள்": "நாங்கள்", "நம்": "நாம்",
+        "உன்": "நீ", "உங்கள்": "நீங்கள்", "உம்": "நீர்", "தன்": "தான்",
+    }
+    case_tags = {"acc", "dat", "gen", "inst", "loc", "soc", "abl"}
+
+    def canonical_upper(upper: str) -> str:
+        parts = upper.split("+")
+        person = person_by_lemma.get(parts[0])
+        if person and "dem" in parts and (({"prox", "med"} & set(parts)) or parts[0] == "அது"):
+            if parts[0] in {"இது", "உது", "அது"} and "pl" in parts:
+                person = "3pln"
+            upper = "+".join(person if part in replaceable else part for part in parts)
+            parts = upper.split("+")
+        if parts[0] in oblique_lemma_map and case_tags & set(parts):
+            updated = [oblique_lemma_map[parts[0]]]
+            updated.extend(part for part in parts[1:] if part not in {"pssd", "med"})
+            upper = "+".join(updated)
+        return upper
+
+    return canonical_upper
 
 
 def transform_finite_relation(
@@ -1112,102 +1269,31 @@ def transform_finite_relation(
     rejected_pairs: list[tuple[str, str]],
     addition_paths: list[Path],
     canonicalize_person: bool,
-) -> tuple[list[int], int]:
-    """Apply finite-pair cleanup, extensions and tag correction in one recompile."""
-    pairs_path = model_path.with_suffix(".pairs.txt")
-    script_path = model_path.with_suffix(".transform.foma")
-    transformed_path = model_path.with_suffix(".transformed.fst")
-    run(
-        ["foma"],
-        cwd=model_path.parent,
-        stdin=f"load stack {model_path}\nprint pairs > {pairs_path}\nquit\n",
-    )
-    rejected = set(rejected_pairs)
-    pairs: list[tuple[str, str]] = []
-    seen: set[tuple[str, str]] = set()
-    for line in pairs_path.read_text(encoding="utf-8").splitlines():
-        pair = tuple(line.split("\t", 1))
-        if pair in rejected:
-            continue
-        typed_pair = (pair[0], pair[1])
-        if typed_pair not in seen:
-            seen.add(typed_pair)
-            pairs.append(typed_pair)
-    extension_counts: list[int] = []
-    for additions_path in addition_paths:
-        added = 0
-        for line in additions_path.read_text(encoding="utf-8").splitlines():
-            upper, lower = line.split("\t", 1)
-            pair = (upper, lower)
-            if pair not in seen:
-                seen.add(pair)
-                pairs.append(pair)
-                added += 1
-        extension_counts.append(added)
+) -> tuple[list[int], int, list[dict]]:
+    """Apply finite-pair cleanup, extensions and tag correction in one streaming recompile.
 
-    canonicalized = 0
+    Pairs flow from foma's ``print pairs`` and the extension files through
+    reject -> dedupe -> canonicalize -> reject stages straight into the
+    compiler; returns the per-file extension counts, the number of
+    canonicalized pairs and the per-stage counts.
+    """
+    rejected = set(rejected_pairs)
+    origins = [f"{index}:{path.name}" for index, path in enumerate(addition_paths)]
+    sources = [(BASE, foma_pairs(model_path))]
+    sources.extend((origin, tsv_pairs(path)) for origin, path in zip(origins, addition_paths))
+    dedupe = Dedupe()
+    stages: list[Stage] = [Reject(rejected, origins={BASE}, name="reject-cleanup"), dedupe]
+    rewrite = None
     if canonicalize_person:
-        corrected_pairs: list[tuple[str, str]] = []
-        corrected_seen: set[tuple[str, str]] = set()
-        person_by_lemma = {
-            "இவன்": "3sgm", "இவள்": "3sgf", "இவர்": "3sgh", "இவர்கள்": "3pl",
-            "இது": "3sgn", "இவை": "3pln",
-            "உவன்": "3sgm", "உவள்": "3sgf", "உவர்": "3sgh", "உவர்கள்": "3pl",
-            "உது": "3sgn", "உவை": "3pln", "அது": "3sgn",
-        }
-        replaceable = {"2sgm", "2sgf", "2sgh", "2sgn", "2pl", "3sgn"}
-        oblique_lemma_map = {
-            "என்": "நான்", "எங்கள்": "நாங்கள்", "நம்": "நாம்",
-            "உன்": "நீ", "உங்கள்": "நீங்கள்", "உம்": "நீர்", "தன்": "தான்",
-        }
-        case_tags = {"acc", "dat", "gen", "inst", "loc", "soc", "abl"}
-        for upper, lower in pairs:
-            parts = upper.split("+")
-            person = person_by_lemma.get(parts[0])
-            eligible = person and "dem" in parts and (({"prox", "med"} & set(parts)) or parts[0] == "அது")
-            if eligible:
-                if parts[0] in {"இது", "உது", "அது"} and "pl" in parts:
-                    person = "3pln"
-                new_upper = "+".join(person if part in replaceable else part for part in parts)
-                canonicalized += int(new_upper != upper)
-                upper = new_upper
-                parts = upper.split("+")
-            if parts[0] in oblique_lemma_map and case_tags & set(parts):
-                updated = [oblique_lemma_map[parts[0]]]
-                updated.extend(part for part in parts[1:] if part not in {"pssd", "med"})
-                new_upper = "+".join(updated)
-                canonicalized += int(new_upper != upper)
-                upper = new_upper
-            pair = (upper, lower)
-            if pair not in corrected_seen:
-                corrected_seen.add(pair)
-                corrected_pairs.append(pair)
-        pairs = corrected_pairs
-
+        rewrite = RewriteUpper(pronoun_canonicalizer(), "canonicalize-person")
+        stages.append(rewrite)
     # Canonicalization can map an alternate upstream tag sequence onto a
     # rejected cleanup target, so enforce the cleanup set again at the end.
-    pairs = [pair for pair in pairs if pair not in rejected]
-    residual_rejected = rejected & set(pairs)
-    if residual_rejected:
-        raise RuntimeError(
-            f"Prebuilt cleanup pairs remain in {model_path.name}: "
-            f"{sorted(residual_rejected)}"
-        )
-
-    def quoted(value: str) -> str:
-        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
-
-    relation = " |\n".join(
-        f"[{quoted(upper)} .x. {quoted(lower)}]" for upper, lower in pairs
-    )
-    script_path.write_text(
-        f"regex {relation};\nsave stack {transformed_path}\nquit\n", encoding="utf-8"
-    )
-    run(["foma", "-q", "-f", str(script_path)], cwd=model_path.parent)
-    transformed_path.replace(model_path)
-    pairs_path.unlink()
-    script_path.unlink()
-    return extension_counts, canonicalized
+    stages.append(Reject(rejected, name="reject-final"))
+    result = run_pipeline(sources, stages)
+    finish_relation_pipeline(model_path, result, ".transformed.fst")
+    extension_counts = [dedupe.by_origin.get(origin, 0) for origin in origins]
+    return extension_counts, rewrite.changed if rewrite else 0, pipeline_counts(result)
 
 
 def union_finite_relation_extensions(
@@ -1238,47 +1324,33 @@ def union_finite_relation_extensions(
     if not pairs:
         return extension_counts
 
-    sigma_proc = subprocess.run(
-        ["foma", "-q"],
-        cwd=model_path.parent,
-        input=f"load stack {model_path}\nprint sigma\nquit\n",
-        text=True,
-        capture_output=True,
-        check=True,
-    )
-    sigma_text = sigma_proc.stdout + "\n" + sigma_proc.stderr
-    sigma_line = next(
-        (line for line in sigma_text.splitlines() if line.startswith("Sigma:")),
-        None,
-    )
-    if sigma_line is None:
-        raise RuntimeError(f"Could not read Foma sigma for {model_path.name}")
-    symbols = set(sigma_line.removeprefix("Sigma:").strip().split()) - {"?", "@"}
-    symbols.update(character for pair in pairs for value in pair for character in value)
-    ordered_symbols = sorted(symbols, key=lambda symbol: (-len(symbol), symbol))
-
-    def tokenize(value: str) -> list[str]:
-        # Flookup tokenizes against the compiled alphabet. Reusing that exact
-        # segmentation avoids both character/multichar mismatches and new
-        # whole-string symbols that can shadow longer existing surfaces.
-        best: list[list[str] | None] = [None] * (len(value) + 1)
-        best[len(value)] = []
-        for start in range(len(value) - 1, -1, -1):
-            for symbol in ordered_symbols:
-                if value.startswith(symbol, start) and best[start + len(symbol)] is not None:
-                    best[start] = [symbol, *best[start + len(symbol)]]
-                    break
-        if best[0] is None:
-            raise ValueError(
-                f"Extension string cannot be segmented with {model_path.name} sigma: {value!r}"
-            )
-        return best[0]
+    def model_sigma() -> list[str]:
+        sigma_proc = build_trace.run_child(
+            ["foma", "-q"],
+            cwd=str(model_path.parent),
+            input=f"load stack {model_path}\nprint sigma\nquit\n",
+        )
+        sigma_proc.check_returncode()
+        sigma_text = sigma_proc.stdout + "\n" + sigma_proc.stderr
+        sigma_line = next(
+            (line for line in sigma_text.splitlines() if line.startswith("Sigma:")),
+            None,
+        )
+        if sigma_line is None:
+            raise RuntimeError(f"Could not read Foma sigma for {model_path.name}")
+        return sorted(set(sigma_line.removeprefix("Sigma:").strip().split()) - {"?", "@"})
+
+    # Flookup tokenizes against the compiled alphabet. Reusing that exact
+    # segmentation avoids both character/multichar mismatches and new
+    # whole-string symbols that can shadow longer existing surfaces; a
+    # character outside sigma becomes a new single-character symbol.
+    tokenizer = cached_tokenizer(sha256_file(model_path), model_sigma)
 
     def quoted_symbol(symbol: str) -> str:
         return '"' + symbol.replace("\\", "\\\\").replace('"', '\\"') + '"'
 
     def symbol_sequence(value: str) -> str:
-        return "[" + " ".join(quoted_symbol(symbol) for symbol in tokenize(value)) + "]"
+        return "[" + " ".join(quoted_symbol(symbol) for symbol in tokenizer.split(value)) + "]"
 
     relation = " |\n".join(
         f"[{symbol_sequence(upper)} .x. {symbol_sequence(lower)}]"
@@ -1300,215 +1372,693 @@ def union_finite_relation_extensions(
     return extension_counts
 
 
-def copy_outputs(built_paths: dict[str, Path]) -> list[dict]:
-    CANONICAL_MODELS.mkdir(parents=True, exist_ok=True)
-    RUNTIME_MODELS.mkdir(parents=True, exist_ok=True)
-    WORDLIST_MODELS.mkdir(parents=True, exist_ok=True)
-    SERVER_MODELS.mkdir(parents=True, exist_ok=True)
-
-    outputs = []
-    for output_name, src_path in built_paths.items():
-        dst_canonical = CANONICAL_MODELS / output_name
-        dst_runtime = RUNTIME_MODELS / output_name
-        dst_wordlists = WORDLIST_MODELS / output_name
-        dst_server = SERVER_MODELS / output_name
-        shutil.copy2(src_path, dst_canonical)
-        shutil.copy2(src_path, dst_runtime)
-        shutil.copy2(src_path, dst_wordlists)
-        shutil.copy2(src_path, dst_server)
-        outputs.append({
-            "file": output_name,
-            "sha256": sha256_file(src_path),
-            "size_bytes": src_path.stat().st_size,
-            "copied_to": [
-                "build/fst-models",
-                "runtime",
-                "static-word-list/fst-models",
-                "server/fst-models",
-            ],
-        })
-    outputs.sort(key=lambda x: x["file"])
-    return outputs
+def build_any_model_router(built_paths: dict[str, Path], out_dir: Path) -> tuple[Path, Path, dict]:
+    """Union acceptor over every model's lower side, tagged with the model name.
 
+    Each model contributes ``["<file>" .x. M.l]``; the tag is one multichar
+    upper symbol, so a forward lookup of a surface lists its owning models.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    router_path = out_dir / ROUTER_FILE
+    script_path = out_dir / "any-model.foma"
+    lines = []
+    branches = []
+    for index, (output_name, model_path) in enumerate(built_paths.items()):
+        lines.append(f"load stack {model_path.resolve()}")
+        lines.append(f"define M{index}")
+        branches.append(f'["{output_name}" .x. M{index}.l]')
+    lines.append("regex " + " |\n    ".join(branches) + ";")
+    lines.append(f"save stack {router_path}")
+    lines.append("quit")
+    script_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    run(["foma", "-q", "-f", str(script_path)], cwd=out_dir)
+    if not router_path.exists() or router_path.stat().st_size == 0:
+        raise RuntimeError(f"foma did not produce output: {router_path}")
+    script_path.unlink()
+    # The router is loaded at startup like every model, so it ships optimized too.
+    optimized_path, report = optimize_runtime_model(router_path, out_dir / "optimized")
+    optimized_path.replace(router_path)
+    sidecar_path = out_dir / ROUTER_SIDECAR
+    sidecar_path.write_text(
+        json.dumps(router_sidecar(router_path, built_paths), ensure_ascii=False, indent=2) + "\n",
+        encoding="utf-8",
+    )
+    return router_path, sidecar_path, report
 
-def build_all(clean: bool) -> dict:
-    ensure_tools()
 
-    if not VENDOR.exists() and not PINNED_UPSTREAM_ZIPS.exists():
-        raise FileNotFoundError("Missing vendor source and fst/upstream-zips")
+def unused_flag_features(sigma: list[str]) -> list[str]:
+    """Flag features that are only ever set (P, N, C), never tested (R, D, U); they constrain nothing."""
+    operations: dict[str, set[str]] = {}
+    for symbol in sigma:
+        match = FLAG_DIACRITIC.fullmatch(symbol)
+        if match:
+            operations.setdefault(match["feature"], set()).add(match["op"])
+    return sorted(feature for feature, ops in operations.items() if not ops & {"R", "D", "U"})
 
-    if clean and WORK_ROOT.exists():
-        shutil.rmtree(WORK_ROOT)
-    WORK_ROOT.mkdir(parents=True, exist_ok=True)
 
-    submodule_commit = resolve_vendor_commit()
+def flookup_benchmark(model_path: Path, words: list[str]) -> tuple[dict[str, float], list[str]]:
+    """Load time (a one-query run) and lookups/sec of flookup over ``words``, plus its output lines."""
 
-    built_paths: dict[str, Path] = {}
-    patch_records: list[dict] = []
-    components_manifest: list[dict] = []
+    def timed(queries: list[str]) -> tuple[float, str]:
+        started = time.perf_counter()
+        completed = build_trace.run_child(["flookup", str(model_path)], input="".join(f"{query}\n" for query in queries))
+        completed.check_returncode()
+        return time.perf_counter() - started, completed.stdout
 
-    for component in COMPONENTS:
-        name = component["name"]
-        comp_dir = WORK_ROOT / name
-        if comp_dir.exists():
-            shutil.rmtree(comp_dir)
-        comp_dir.mkdir(parents=True, exist_ok=True)
-
-        mode = component.get("mode", "compile")
-        if mode == "copy-prebuilt":
-            src = resolve_prebuilt_model(component["source"])
-            out = comp_dir / component["output"]
-            shutil.copy2(src, out)
-            rejected_pairs = list(component.get("reject_pairs", []))
-            rejection_files = component.get("reject_pair_files", [])
-            for rejection_file in rejection_files:
-                rejection_path = PATCH_DIR / rejection_file
-                for line_number, line in enumerate(
-                    rejection_path.read_text(encoding="utf-8").splitlines(), start=1
-                ):
-                    values = line.split("\t", 1)
-                    if len(values) != 2:
-                        raise ValueError(
-                            f"Malformed rejection row in {rejection_path}:"
-                            f"{line_number}: {line!r}"
-                        )
-                    rejected_pairs.append((values[0], values[1]))
-            extensions = component.get("add_pairs", [])
-            if isinstance(extensions, str):
-                extensions = [extensions]
-            addition_paths = [PATCH_DIR / extension for extension in extensions]
-            added_counts, canonicalized_pairs = transform_finite_relation(
-                out,
-                rejected_pairs,
-                addition_paths,
-                bool(component.get("canonicalize_deictic_person")),
-            )
-            extension_records = []
-            for extension, added_pairs in zip(extensions, added_counts):
-                extension_records.append({
-                    "file": extension,
-                    "sha256": sha256_file(PATCH_DIR / extension),
-                    "added_pairs": added_pairs,
-                })
-            built_paths[component["output"]] = out
-            record = {
-                "name": name,
-                "mode": mode,
-                "source": component["source"],
-                "output": component["output"],
-            }
-            if extension_records:
-                record["pair_extensions"] = extension_records
-            if rejection_files:
-                record["pair_rejections"] = [
-                    {
-                        "file": rejection_file,
-                        "sha256": sha256_file(PATCH_DIR / rejection_file),
-                    }
-                    for rejection_file in rejection_files
-                ]
-            if canonicalized_pairs:
-                record["canonicalized_deictic_person_pairs"] = canonicalized_pairs
-            components_manifest.append(record)
-            continue
+    load_seconds, _ = timed(words[:1])
+    total_seconds, output = timed(words)
+    timing = {
+        "load_seconds": round(load_seconds, 4),
+        "lookups_per_second": round(len(words) / max(total_seconds - load_seconds, 1e-6)),
+    }
+    return timing, sorted(line for line in output.splitlines() if line)
 
-        extract_zip(component["zip"], comp_dir)
 
-        if name == "adj" and component["entry"].startswith("__generated"):
-            generate_adj_entry(comp_dir)
+def optimize_runtime_model(model_path: Path, out_dir: Path) -> tuple[Path, dict]:
+    """Write a lookup-optimized equivalent of ``model_path`` to ``out_dir``.
+
+    The network is minimized, flag features that are never tested are
+    eliminated, and arcs are sorted on the lower (surface) side that flookup's
+    default lookup matches, so foma can binary-search them. The build fails
+    unless foma finds the result equivalent, its sigma (and so flookup's
+    tokenization) is unchanged, and flookup answers a sample of surfaces
+    identically. Returns the new path and a size/speed report for both.
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    output_path = out_dir / model_path.name
+    header = read_header(model_path)
+    flags = unused_flag_features(header["sigma"])
+    prepare = [f"load stack {model_path.resolve()}", *(f"eliminate flag {feature}" for feature in flags)]
+    run(
+        ["foma", "-q"],
+        cwd=out_dir,
+        stdin="\n".join([*prepare, "minimize net", "sort out", f"save stack {output_path.resolve()}", "quit"]) + "\n",
+    )
+    if not output_path.exists() or output_path.stat().st_size == 0:
+        raise RuntimeError(f"foma did not produce output: {output_path}")
+
+    check = run(
+        ["foma", "-q"],
+        cwd=out_dir,
+        stdin="\n".join([*prepare, f"load stack {output_path.resolve()}", "test equivalent", "quit"]) + "\n",
+    )
+    verdict = re.search(r"([01]) \(1 = TRUE", check)
+    if verdict is None or verdict.group(1) != "1":
+        raise RuntimeError(f"Optimized {model_path.name} is not equivalent to the compiled model")
+    optimized = read_header(output_path)
+    eliminated = {symbol for symbol in header["sigma"] if (m := FLAG_DIACRITIC.fullmatch(symbol)) and m["feature"] in flags}
+    if sorted(set(header["sigma"]) - eliminated) != sorted(optimized["sigma"]):
+        raise RuntimeError(f"Optimizing {model_path.name} changed its sigma")
+
+    words = load_transducer(model_path).random_lower(BENCHMARK_QUERIES)
+    compiled_timing, compiled_lines = flookup_benchmark(model_path, words)
+    optimized_timing, optimized_lines = flookup_benchmark(output_path, words)
+    if compiled_lines != optimized_lines:
+        raise RuntimeError(f"Optimized {model_path.name} answers sampled lookups differently")
+    report = {
+        "file": model_path.name,
+        "eliminated_flags": flags,
+        "benchmark_queries": len(words),
+        "compiled": {
+            "states": header["states"], "arcs": header["arcs"], "size_bytes": model_path.stat().st_size,
+            **compiled_timing,
+        },
+        "optimized": {
+            "states": optimized["states"], "arcs": optimized["arcs"], "size_bytes": output_path.stat().st_size,
+            **optimized_timing,
+        },
+    }
+    return output_path, report
 
-        comp_patches = component.get("patches", [])
-        if comp_patches:
-            patch_records.extend(apply_patches(comp_dir, comp_patches))
 
-        out_path = compile_foma(comp_dir, component["entry"], component["output"])
+def publish_outputs(
+    built_paths: dict[str, Path], sidecars: list[Path], started: float,
+) -> tuple[list[dict], list[dict], dict]:
+    """Store every model and sidecar once and swap each consumer directory to the new set.
+
+    Models go to every directory in MODEL_DESTINATIONS and sidecars to all but
+    ``runtime``; see artifact_store for the linking and the atomic swap.
+    Directories git tracks (``server/fst-models``) get writable copies rather
+    than links to the blobs. Blobs this build did not use and no build has
+    touched since ``started`` are pruned.
+    """
+    store = ArtifactStore(ARTIFACT_STORE)
+    links = {"hardlink": 0, "reflink": 0, "copy": 0}
+    with store.session():
+        digests = {name: store.add(path) for name, path in built_paths.items()}
+        sidecar_digests = {sidecar.name: store.add(sidecar) for sidecar in sidecars}
+        for label, directory in MODEL_DESTINATIONS.items():
+            files = dict(digests)
+            if label in SIDECAR_DESTINATIONS:
+                files.update(sidecar_digests)
+            published = store.publish(directory, files, writable=tracked_by_git(directory))
+            for method, count in published.items():
+                links[method] += count
+    pruned = store.prune({*digests.values(), *sidecar_digests.values()}, older_than=started)
+    summary = {"store": str(ARTIFACT_STORE.relative_to(ROOT)), **links, "pruned_blobs": pruned}
+
+    outputs = [
+        {
+            "file": output_name,
+            "sha256": digests[output_name],
+            "size_bytes": src_path.stat().st_size,
+            "copied_to": list(MODEL_DESTINATIONS),
+        }
+        for output_name, src_path in built_paths.items()
+    ]
+    outputs.sort(key=lambda x: x["file"])
+    sidecar_rows = [
+        {
+            "file": sidecar.name,
+            "sha256": sidecar_digests[sidecar.name],
+            "size_bytes": sidecar.stat().st_size,
+            "copied_to": list(SIDECAR_DESTINATIONS),
+        }
+        for sidecar in sidecars
+    ]
+    return outputs, sidecar_rows, summary
+
+
+def build_component(component: dict, use_cache: bool = True) -> dict:
+    """Extract, patch and compile one entry of COMPONENTS in its own work dir."""
+    name = component["name"]
+    comp_dir = WORK_ROOT / name
+    if comp_dir.exists():
+        shutil.rmtree(comp_dir)
+    comp_dir.mkdir(parents=True, exist_ok=True)
+
+    mode = component.get("mode", "compile")
+    if mode == "copy-prebuilt":
+        src = resolve_prebuilt_model(component["source"])
+        out = comp_dir / component["output"]
+        shutil.copy2(src, out)
+        rejected_pairs = list(component.get("reject_pairs", []))
+        rejection_files = component.get("reject_pair_files", [])
+        for rejection_file in rejection_files:
+            rejection_path = PATCH_DIR / rejection_file
+            for line_number, line in enumerate(
+                rejection_path.read_text(encoding="utf-8").splitlines(), start=1
+            ):
+                values = line.split("\t", 1)
+                if len(values) != 2:
+                    raise ValueError(
+                        f"Malformed rejection row in {rejection_path}:"
+                        f"{line_number}: {line!r}"
+                    )
+                rejected_pairs.append((values[0], values[1]))
         extensions = component.get("add_pairs", [])
         if isinstance(extensions, str):
             extensions = [extensions]
+        addition_paths = [PATCH_DIR / extension for extension in extensions]
+        with build_trace.stage("transform"):
+            added_counts, canonicalized_pairs, pipeline_stages = transform_finite_relation(
+                out,
+                rejected_pairs,
+                addition_paths,
+                bool(component.get("canonicalize_deictic_person")),
+            )
         extension_records = []
-        if extensions:
-            addition_paths = [PATCH_DIR / extension for extension in extensions]
-            if component.get("reject_pairs") or component.get("canonicalize_deictic_person"):
-                added_counts, canonicalized_pairs = transform_finite_relation(
-                    out_path,
-                    component.get("reject_pairs", []),
-                    addition_paths,
-                    bool(component.get("canonicalize_deictic_person")),
-                )
-            else:
-                added_counts = union_finite_relation_extensions(out_path, addition_paths)
-                canonicalized_pairs = 0
-            for extension, added_pairs in zip(extensions, added_counts):
-                extension_records.append({
-                    "file": extension,
-                    "sha256": sha256_file(PATCH_DIR / extension),
-                    "added_pairs": added_pairs,
-                })
-        else:
-            canonicalized_pairs = 0
-        built_paths[component["output"]] = out_path
-
+        for extension, added_pairs in zip(extensions, added_counts):
+            extension_records.append({
+                "file": extension,
+                "sha256": sha256_file(PATCH_DIR / extension),
+                "added_pairs": added_pairs,
+            })
         record = {
             "name": name,
             "mode": mode,
-            "zip": component["zip"],
-            "entry": component["entry"],
+            "source": component["source"],
             "output": component["output"],
-            "patches": component.get("patches", []),
         }
         if extension_records:
             record["pair_extensions"] = extension_records
+        if rejection_files:
+            record["pair_rejections"] = [
+                {
+                    "file": rejection_file,
+                    "sha256": sha256_file(PATCH_DIR / rejection_file),
+                }
+                for rejection_file in rejection_files
+            ]
         if canonicalized_pairs:
             record["canonicalized_deictic_person_pairs"] = canonicalized_pairs
-        components_manifest.append(record)
+        record["relation_pipeline"] = pipeline_stages
+        return {"path": out, "record": record, "patches": []}
 
+    with build_trace.stage("extract"):
+        extract_zip(component["zip"], comp_dir)
+
+    if name == "adj" and component["entry"].startswith("__generated"):
+        generate_adj_entry(comp_dir)
+
+    comp_patches = component.get("patches", [])
+    base_key = f"{component['zip']}:{sha256_file(resolve_zip_path(component['zip']))}"
+    with build_trace.stage("patch"):
+        patch_records = apply_patches(comp_dir, comp_patches, base_key, use_cache) if comp_patches else []
+
+    shard_lexicon = component.get("shard_lexicon")
+    with build_trace.stage("compile"):
+        if shard_lexicon and component.get("shards", 0) > 1:
+            out_path, shard_report = compile_sharded_foma(
+                comp_dir,
+                component["entry"],
+                component["output"],
+                shard_lexicon,
+                component["shards"],
+                bool(component.get("verify_shards")),
+            )
+        else:
+            out_path = compile_foma(comp_dir, component["entry"], component["output"])
+            shard_report = None
+    extensions = component.get("add_pairs", [])
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    extension_records = []
+    if extensions:
+        addition_paths = [PATCH_DIR / extension for extension in extensions]
+        if component.get("reject_pairs") or component.get("canonicalize_deictic_person"):
+            with build_trace.stage("transform"):
+                added_counts, canonicalized_pairs, pipeline_stages = transform_finite_relation(
+                    out_path,
+                    component.get("reject_pairs", []),
+                    addition_paths,
+                    bool(component.get("canonicalize_deictic_person")),
+                )
+        else:
+            with build_trace.stage("union"):
+                added_counts = union_finite_relation_extensions(out_path, addition_paths)
+            canonicalized_pairs = 0
+            pipeline_stages = []
+        for extension, added_pairs in zip(extensions, added_counts):
+            extension_records.append({
+                "file": extension,
+                "sha256": sha256_file(PATCH_DIR / extension),
+                "added_pairs": added_pairs,
+            })
+    else:
+        canonicalized_pairs = 0
+        pipeline_stages = []
+
+    record = {
+        "name": name,
+        "mode": mode,
+        "zip": component["zip"],
+        "entry": component["entry"],
+        "output": component["output"],
+        "patches": component.get("patches", []),
+    }
+    if shard_report:
+        record["sharded_compile"] = shard_report
+    if extension_records:
+        record["pair_extensions"] = extension_records
+    if canonicalized_pairs:
+        record["canonicalized_deictic_person_pairs"] = canonicalized_pairs
+    if pipeline_stages:
+        record["relation_pipeline"] = pipeline_stages
+    return {"path": out_path, "record": record, "patches": patch_records}
+
+
+def build_auxiliary_composition(inputs: dict[str, Path]) -> dict:
+    """Run the productive auxiliary builder over the component models it reads."""
     composition_inputs = WORK_ROOT / "composition-inputs"
+    if composition_inputs.exists():
+        shutil.rmtree(composition_inputs)
     composition_inputs.mkdir(parents=True, exist_ok=True)
-    for output_name, model_path in built_paths.items():
+    for output_name, model_path in inputs.items():
         shutil.copy2(model_path, composition_inputs / output_name)
     composition_output = WORK_ROOT / "verb-auxiliary"
     composition_output.mkdir(parents=True, exist_ok=True)
-    composition_builder = ROOT / "fst" / "build" / "build_productive_auxiliary_fst.py"
-    run([
-        sys.executable,
-        str(composition_builder),
-        "--source-root", str(ROOT),
-        "--fst-dir", str(composition_inputs),
-        "--output-dir", str(composition_output),
-    ])
+    composition_builder = COMPOSITION_BUILDER
+    with build_trace.stage("composition"):
+        run([
+            sys.executable,
+            str(composition_builder),
+            "--source-root", str(ROOT),
+            "--fst-dir", str(composition_inputs),
+            "--output-dir", str(composition_output),
+        ])
     auxiliary_path = composition_output / "verb-auxiliary.fst"
     auxiliary_inventory = composition_output / "verb-auxiliary.inventory.json"
-    built_paths[auxiliary_path.name] = auxiliary_path
-    components_manifest.append({
+    auxiliary_index = composition_output / "verb-auxiliary.inventory.bin"
+    record = {
         "name": "verb-auxiliary",
         "mode": "generated-composition",
         "builder": str(composition_builder.relative_to(ROOT)),
         "builder_sha256": sha256_file(composition_builder),
         "output": auxiliary_path.name,
         "inventory": auxiliary_inventory.name,
+        "inventory_index": auxiliary_index.name,
         "summary": json.loads(
             (composition_output / "summary.json").read_text(encoding="utf-8")
         ),
-    })
+    }
+    return {
+        "path": auxiliary_path,
+        "inventory": auxiliary_inventory,
+        "inventory_index": auxiliary_index,
+        "record": record,
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def lib_imports(script: Path) -> tuple[Path, ...]:
+    """The fst/lib modules ``script`` imports, directly or through other fst/lib modules."""
+    found: set[Path] = set()
+    pending = [script]
+    while pending:
+        tree = ast.parse(pending.pop().read_text(encoding="utf-8"))
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module = LIB_DIR / f"{name.split('.')[0]}.py"
+                if module.is_file() and module not in found:
+                    found.add(module)
+                    pending.append(module)
+    return tuple(sorted(found))
+
+
+@functools.lru_cache(maxsize=None)
+def script_digest(script: Path) -> str:
+    """sha256 of a build script with its ``COMPONENTS`` literal left out.
+
+    Each component is keyed on its own entry, so adding a patch to one
+    entry must not change the code digest every other key shares.
+    """
+    source = script.read_text(encoding="utf-8")
+    lines = source.splitlines(keepends=True)
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == "COMPONENTS" for target in node.targets
+        ):
+            lines[node.lineno - 1:node.end_lineno] = ["COMPONENTS = ...\n"]
+            break
+    return hashlib.sha256("".join(lines).encode("utf-8")).hexdigest()
+
+
+def build_code_digests(*scripts: Path) -> dict[str, str]:
+    """Digests of the code that decides what a build produces.
+
+    Whole files are hashed rather than the builder functions alone, so a
+    change to anything a builder calls (run, resolve_zip_path, ...) also
+    misses the cache. Only the fst/lib modules the scripts import count.
+    """
+    scripts = scripts or (Path(__file__).resolve(),)
+    digests = {str(script.relative_to(ROOT)): script_digest(script) for script in scripts}
+    for script in scripts:
+        for module in lib_imports(script):
+            digests[str(module.relative_to(ROOT))] = sha256_file(module)
+    return digests
+
+
+def toolchain_fingerprint() -> str:
+    completed = build_trace.run_child(["foma", "-v"])
+    return (completed.stdout + completed.stderr).strip()
+
+
+def component_cache_key(component: dict, toolchain: str) -> str:
+    """Digest of everything a component build reads: sources, patches, pair files, code."""
+    inputs: list[list[str]] = []
+    if component.get("mode", "compile") == "copy-prebuilt":
+        inputs.append(["prebuilt", component["source"], sha256_file(resolve_prebuilt_model(component["source"]))])
+    else:
+        inputs.append(["zip", component["zip"], sha256_file(resolve_zip_path(component["zip"]))])
+    for patch_name in component.get("patches", []):
+        inputs.append(["patch", patch_name, sha256_file(PATCH_DIR / patch_name)])
+    extensions = component.get("add_pairs", [])
+    for extension in [extensions] if isinstance(extensions, str) else extensions:
+        inputs.append(["add_pairs", extension, sha256_file(PATCH_DIR / extension)])
+    for rejection_file in component.get("reject_pair_files", []):
+        inputs.append(["reject_pairs", rejection_file, sha256_file(PATCH_DIR / rejection_file)])
+    payload = {
+        "component": component,
+        "inputs": inputs,
+        "code": build_code_digests(),
+        "toolchain": toolchain,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def composition_cache_key(input_keys: dict[str, str], toolchain: str) -> str:
+    """The composition reads component models and sources plus its own builder and its imports."""
+    payload = {
+        "inputs": input_keys,
+        "code": build_code_digests(Path(__file__).resolve(), COMPOSITION_BUILDER),
+        "toolchain": toolchain,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
 
-    outputs_manifest = copy_outputs(built_paths)
-    inventory_destinations = (
-        CANONICAL_MODELS / auxiliary_inventory.name,
-        WORDLIST_MODELS / auxiliary_inventory.name,
-        SERVER_MODELS / auxiliary_inventory.name,
+
+def runtime_cache_key(model_path: Path, toolchain: str) -> str:
+    """The runtime variant depends only on the built model bytes, the build code and foma."""
+    payload = {
+        "model": sha256_file(model_path),
+        "code": build_code_digests(),
+        "toolchain": toolchain,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def cached_build(name: str, key: str, work_dir: Path, build: Callable[[], dict], enabled: bool) -> dict:
+    """Restore ``work_dir`` and the build result for ``key``, or build and store them.
+
+    Results are dicts whose Path values live under ``work_dir``; they are
+    stored relative to it next to a copy of the whole tree, since later steps
+    read sources (lexc files) from the work directories as well as models.
+    """
+    entry = BUILD_CACHE_DIR / name / key
+    log = getattr(_build_log, "handle", None)
+    if enabled and (entry / "result.json").exists():
+        with build_trace.stage("cache-restore"):
+            if work_dir.exists():
+                shutil.rmtree(work_dir)
+            shutil.copytree(entry / "tree", work_dir)
+            stored = json.loads((entry / "result.json").read_text(encoding="utf-8"))
+        result = {field: work_dir / rel for field, rel in stored["paths"].items()}
+        result.update(stored["values"])
+        result["record"]["build_cache"] = {"key": key, "status": "hit"}
+        os.utime(entry)
+        if log is not None:
+            log.write(f"restored from {entry.relative_to(ROOT)}\n")
+        return result
+
+    result = build()
+    if enabled:
+        with build_trace.stage("cache-store"):
+            staging = BUILD_CACHE_DIR / name / f".{key}.{os.getpid()}.{threading.get_ident()}"
+            if staging.exists():
+                shutil.rmtree(staging)
+            shutil.copytree(work_dir, staging / "tree")
+            stored = {
+                "paths": {
+                    field: str(value.relative_to(work_dir))
+                    for field, value in result.items() if isinstance(value, Path)
+                },
+                "values": {field: value for field, value in result.items() if not isinstance(value, Path)},
+            }
+            (staging / "result.json").write_text(json.dumps(stored, ensure_ascii=False) + "\n", encoding="utf-8")
+            if entry.exists():
+                shutil.rmtree(entry)
+            staging.replace(entry)
+            prune_build_cache(BUILD_CACHE_DIR / name)
+    result["record"]["build_cache"] = {"key": key, "status": "miss" if enabled else "disabled"}
+    return result
+
+
+def prune_build_cache(directory: Path) -> None:
+    """Keep the BUILD_CACHE_KEEP most recently used entries of one component."""
+    entries = sorted(
+        (path for path in directory.iterdir() if path.is_dir() and not path.name.startswith(".")),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
     )
-    for destination in inventory_destinations:
-        shutil.copy2(auxiliary_inventory, destination)
-    sidecars_manifest = [{
-        "file": auxiliary_inventory.name,
-        "sha256": sha256_file(auxiliary_inventory),
-        "size_bytes": auxiliary_inventory.stat().st_size,
-        "copied_to": [
-            "build/fst-models",
-            "static-word-list/fst-models",
-            "server/fst-models",
+    for stale in entries[BUILD_CACHE_KEEP:]:
+        shutil.rmtree(stale)
+
+
+def run_build_graph(tasks: dict[str, BuildTask], jobs: int) -> dict[str, dict]:
+    """Run each task once all of its dependencies finished, ``jobs`` at a time.
+
+    Ready tasks start in declaration order. Each task's commands and their
+    output go to ``LOG_DIR/<task>.log``; the first failure stops scheduling
+    and is re-raised once running tasks have finished.
+    """
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    results: dict[str, dict] = {}
+    pending = dict(tasks)
+    running: dict[Future, str] = {}
+    started: dict[str, float] = {}
+
+    def logged(name: str, task: BuildTask) -> dict:
+        started[name] = time.perf_counter()
+        print(f"  started  {name}", flush=True)
+        with (LOG_DIR / f"{name}.log").open("w", encoding="utf-8") as handle:
+            _build_log.handle = handle
+            try:
+                with build_trace.stage("task", task=name):
+                    return task.run({dep: results[dep] for dep in task.deps})
+            finally:
+                _build_log.handle = None
+
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for name in [name for name, task in pending.items() if all(dep in results for dep in task.deps)]:
+                running[executor.submit(logged, name, pending.pop(name))] = name
+            if not running:
+                raise RuntimeError(f"Unsatisfiable build dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except BaseException:
+                    pending.clear()
+                    print(f"  FAILED   {name} (log: {(LOG_DIR / f'{name}.log').relative_to(ROOT)})")
+                    for other in running:
+                        other.cancel()
+                    raise
+                print(f"  finished {name} in {time.perf_counter() - started[name]:.1f}s")
+    return results
+
+
+def build_all(
+    clean: bool,
+    jobs: int = 1,
+    use_cache: bool = True,
+    lexc_shards: int = 0,
+    verify_shards: bool = False,
+    trace_path: Path | None = None,
+) -> dict:
+    # Stage timings, CPU, child RSS and pipe bytes go to the manifest's
+    # ``build_profile`` (and, with ``trace_path``, a Chrome trace-event file).
+    trace = build_trace.start()
+    # A second early, for filesystems with coarse timestamps.
+    started = time.time() - 1
+    ensure_tools()
+
+    if not VENDOR.exists() and not PINNED_UPSTREAM_ZIPS.exists():
+        raise FileNotFoundError("Missing vendor source and fst/upstream-zips")
+
+    if clean and WORK_ROOT.exists():
+        shutil.rmtree(WORK_ROOT)
+    WORK_ROOT.mkdir(parents=True, exist_ok=True)
+
+    submodule_commit = resolve_vendor_commit()
+
+    # Components are independent of each other; the auxiliary composition
+    # only needs the models (and .work sources) named in COMPOSITION_INPUTS,
+    # and the router needs everything. Results are reassembled in COMPONENTS
+    # order, so the manifest does not depend on completion order.
+    # Each component is restored from BUILD_CACHE_DIR when nothing it reads
+    # has changed, so editing one verb patch rebuilds only that verb model
+    # (and the composition that reads it).
+    toolchain = toolchain_fingerprint()
+    component_names = [component["name"] for component in COMPONENTS]
+
+    # Components with a ``shard_lexicon`` compile as that many lexc shards
+    # when asked to; the settings join the component (and so its cache key).
+    def with_shards(component: dict) -> dict:
+        if "shard_lexicon" not in component or lexc_shards < 2:
+            return component
+        return {**component, "shards": lexc_shards, "verify_shards": verify_shards}
+
+    def build_cached_component(component: dict) -> dict:
+        key = component_cache_key(component, toolchain)
+        return cached_build(
+            component["name"], key, WORK_ROOT / component["name"],
+            lambda: build_component(component, use_cache), use_cache,
+        )
+
+    def build_cached_composition(deps: dict[str, dict]) -> dict:
+        key = composition_cache_key(
+            {name: deps[name]["record"]["build_cache"]["key"] for name in COMPOSITION_INPUTS}, toolchain,
+        )
+        inputs = {deps[name]["record"]["output"]: deps[name]["path"] for name in COMPOSITION_INPUTS}
+        return cached_build(
+            "verb-auxiliary", key, WORK_ROOT / "verb-auxiliary",
+            lambda: build_auxiliary_composition(inputs), use_cache,
+        )
+
+    # Every model is shipped as a minimized, arc-sorted variant that must be
+    # equivalent to what was built; the router is built over those variants
+    # so its sidecar hashes match the shipped files.
+    def build_cached_runtime_variant(name: str, deps: dict[str, dict]) -> dict:
+        model_path = deps[name]["path"]
+        out_dir = RUNTIME_WORK / name
+
+        def optimize() -> dict:
+            if out_dir.exists():
+                shutil.rmtree(out_dir)
+            with build_trace.stage("optimize"):
+                optimized_path, report = optimize_runtime_model(model_path, out_dir)
+            return {"path": optimized_path, "record": report}
+
+        return cached_build(
+            f"runtime-{name}", runtime_cache_key(model_path, toolchain), out_dir, optimize, use_cache,
+        )
+
+    model_names = [*component_names, "verb-auxiliary"]
+    tasks: dict[str, BuildTask] = {}
+    for component in COMPONENTS:
+        tasks[component["name"]] = BuildTask(
+            (), lambda _deps, component=with_shards(component): build_cached_component(component),
+        )
+    tasks["verb-auxiliary"] = BuildTask(COMPOSITION_INPUTS, build_cached_composition)
+    for name in model_names:
+        tasks[f"runtime-{name}"] = BuildTask((name,), lambda deps, name=name: build_cached_runtime_variant(name, deps))
+
+    def build_router(deps: dict[str, dict]) -> dict:
+        models = {deps[f"runtime-{name}"]["path"].name: deps[f"runtime-{name}"]["path"] for name in model_names}
+        with build_trace.stage("router"):
+            router_path, sidecar_path, report = build_any_model_router(models, WORK_ROOT / "any-model")
+        return {"path": router_path, "sidecar": sidecar_path, "report": report}
+
+    tasks["any-model"] = BuildTask(tuple(f"runtime-{name}" for name in model_names), build_router)
+    print(f"Building {len(COMPONENTS)} components with {jobs} job(s); logs in {LOG_DIR.relative_to(ROOT)}")
+    results = run_build_graph(tasks, jobs)
+    if use_cache:
+        # Once, after every component: pruning while they run would evict
+        # states other components had just stored or were about to restore.
+        PatchStateCache(PATCH_STATE_DIR).prune(used_since=started)
+
+    built_paths: dict[str, Path] = {}
+    patch_records: list[dict] = []
+    components_manifest: list[dict] = []
+    for name in component_names:
+        built_paths[results[name]["record"]["output"]] = results[f"runtime-{name}"]["path"]
+        patch_records.extend(results[name]["patches"])
+        components_manifest.append(results[name]["record"])
+
+    auxiliary = results["verb-auxiliary"]
+    auxiliary_sidecars = [auxiliary["inventory"], auxiliary["inventory_index"]]
+    built_paths[auxiliary["path"].name] = results["runtime-verb-auxiliary"]["path"]
+    components_manifest.append(auxiliary["record"])
+    runtime_models = [results[f"runtime-{name}"]["record"] for name in model_names]
+    runtime_models.append(results["any-model"]["report"])
+
+    router_path = results["any-model"]["path"]
+    router_sidecar_path = results["any-model"]["sidecar"]
+    router_sidecar_payload = json.loads(router_sidecar_path.read_text(encoding="utf-8"))
+    components_manifest.append({
+        "name": "any-model",
+        "mode": "generated-union",
+        "output": router_path.name,
+        "sidecar": router_sidecar_path.name,
+        "tag_format": router_sidecar_payload["tag_format"],
+        "bits": [
+            {"bit": row["bit"], "model": row["model"]} for row in router_sidecar_payload["bits"]
         ],
-    }]
+    })
+    built_paths[router_path.name] = router_path
+
+    with build_trace.stage("publish"):
+        outputs_manifest, sidecars_manifest, artifact_summary = publish_outputs(
+            built_paths, [*auxiliary_sidecars, router_sidecar_path], started,
+        )
 
     patch_records = sorted(patch_records, key=lambda x: x["file"])
 
@@ -1522,7 +2072,18 @@ def build_all(clean: bool) -> dict:
         "patches": patch_records,
         "outputs": outputs_manifest,
         "sidecars": sidecars_manifest,
+        "artifact_store": artifact_summary,
+        "runtime_models": sorted(runtime_models, key=lambda row: row["file"]),
+        "build_profile": {
+            "jobs": jobs,
+            "wall_seconds": round(time.perf_counter() - trace.origin, 3),
+            "totals": trace.totals(),
+            "stages": trace.rows(),
+        },
     }
+    if trace_path is not None:
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        trace_path.write_text(json.dumps(trace.chrome_trace()) + "\n", encoding="utf-8")
 
     MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
     MANIFEST_PATH.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
@@ -1532,12 +2093,63 @@ def build_all(clean: bool) -> dict:
 def main() -> None:
     parser = argparse.ArgumentParser(description="Build Solmaalai FST models from vendored sources")
     parser.add_argument("--no-clean", action="store_true", help="Do not clear fst/build/.work before build")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=int(os.environ.get("FST_BUILD_JOBS", "0")),
+        help="component builds to run at once (0 = all cores; env FST_BUILD_JOBS)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"rebuild every component instead of restoring unchanged ones from {BUILD_CACHE_DIR.relative_to(ROOT)}",
+    )
+    parser.add_argument(
+        "--lexc-shards",
+        type=int,
+        default=int(os.environ.get("FST_LEXC_SHARDS", "0")),
+        help="compile shardable lexicons (noun) as this many parallel shards (0 = monolithic; env FST_LEXC_SHARDS)",
+    )
+    parser.add_argument(
+        "--verify-shards",
+        action="store_true",
+        default=os.environ.get("FST_VERIFY_SHARDS") == "1",
+        help="also compile sharded components monolithically and diff sampled pairs (env FST_VERIFY_SHARDS=1)",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        default=Path(os.environ["FST_BUILD_TRACE"]) if os.environ.get("FST_BUILD_TRACE") else None,
+        help="write a Chrome trace-event file of the build stages (env FST_BUILD_TRACE)",
+    )
     args = parser.parse_args()
 
-    manifest = build_all(clean=not args.no_clean)
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    manifest = build_all(
+        clean=not args.no_clean,
+        jobs=jobs,
+        use_cache=not args.no_cache,
+        lexc_shards=args.lexc_shards,
+        verify_shards=args.verify_shards,
+        trace_path=args.trace,
+    )
     print("FST build completed")
     print(f"Submodule commit: {manifest['submodule']['commit']}")
     print(f"Models built: {len(manifest['outputs'])}")
+    records = [*manifest["components"], *manifest["runtime_models"]]
+    cache = [record["build_cache"]["status"] for record in records if "build_cache" in record]
+    print(f"Build cache: {cache.count('hit')} hit(s), {cache.count('miss')} miss(es)")
+    compiled = sum(row["compiled"]["size_bytes"] for row in manifest["runtime_models"])
+    optimized = sum(row["optimized"]["size_bytes"] for row in manifest["runtime_models"])
+    print(f"Runtime models: {compiled:,} bytes compiled -> {optimized:,} bytes shipped")
+    profile = manifest["build_profile"]
+    slowest = ", ".join(
+        f"{row['stage']} {row['wall_seconds']:.1f}s" for row in profile["totals"] if row["stage"] != "task"
+    )
+    print(f"Build time: {profile['wall_seconds']:.1f}s wall; by stage: {slowest}")
+    if args.trace:
+        print(f"Trace: {args.trace}")
     print(f"Manifest: {MANIFEST_PATH}")
 
 
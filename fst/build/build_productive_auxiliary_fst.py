@@ -5,12 +5,22 @@ from __future__ import annotations
 
 import argparse
 from collections import Counter, defaultdict
+from collections.abc import Generator
+from concurrent.futures import ThreadPoolExecutor
 import hashlib
 import json
 import re
 import subprocess
+import sys
 from dataclasses import dataclass
 from pathlib import Path
+from typing import NamedTuple, TypeVar
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "lib"))
+import auxiliary_inventory  # noqa: E402
+import lexc_index  # noqa: E402
+from flookup_pool import FlookupError, shared_pool  # noqa: E402
+from lexc_index import LexcEntry  # noqa: E402
 
 
 ROOT = Path(__file__).resolve().parents[1]
@@ -49,32 +59,8 @@ VERB_BASE_OWNER_EXCEPTIONS = {
 }
 
 
-@dataclass(frozen=True)
-class LexcEntry:
-    section: str
-    lexical: str
-    continuation: str
-
-    @property
-    def lemma(self) -> str:
-        return self.lexical.split(":", 1)[0].replace("%=", "=").strip()
-
-
 def parse_lexc(path: Path) -> tuple[LexcEntry, ...]:
-    section = ""
-    entries: list[LexcEntry] = []
-    for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
-        stripped = raw.strip()
-        if stripped.startswith("LEXICON "):
-            section = stripped.split(None, 1)[1].strip()
-            continue
-        body = raw.split("!", 1)[0].strip()
-        if not section or not body.endswith(";"):
-            continue
-        parts = body[:-1].strip().rsplit(None, 1)
-        if len(parts) == 2:
-            entries.append(LexcEntry(section, parts[0], parts[1]))
-    return tuple(entries)
+    return lexc_index.load(path).entries
 
 
 def is_base_verb_entry(entry: LexcEntry) -> bool:
@@ -87,58 +73,99 @@ def is_base_verb_entry(entry: LexcEntry) -> bool:
 
 
 def extract_section_tags(path: Path, section_name: str) -> list[str]:
-    section = ""
-    tags: set[str] = set()
-    for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
-        stripped = raw.strip()
-        if stripped.startswith("LEXICON "):
-            section = stripped.split(None, 1)[1].strip()
-            continue
-        body = raw.split("!", 1)[0].strip()
-        if section == section_name and body.startswith("+"):
-            tags.add(body.split(":", 1)[0].replace("%=", "=").strip().rstrip("#"))
-    return sorted(tags)
-
-
-def extract_all_section_tags(path: Path) -> dict[str, set[str]]:
-    """Index every analysis-bearing continuation in one source pass."""
-    section = ""
-    result: dict[str, set[str]] = defaultdict(set)
-    for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
-        stripped = raw.strip()
-        if stripped.startswith("LEXICON "):
-            section = stripped.split(None, 1)[1].strip()
-            continue
-        body = raw.split("!", 1)[0].strip()
-        if section and body.startswith("+"):
-            result[section].add(
-                body.split(":", 1)[0].replace("%=", "=").strip().rstrip("#")
-            )
-    return result
+    return list(lexc_index.load(path).tags(section_name))
 
 
 def run_flookup(
     model: Path, words: list[str], inverse: bool = False, chunk_size: int = 8000,
 ) -> dict[str, list[str]]:
     result: dict[str, list[str]] = defaultdict(list)
-    command = ["flookup"] + (["-i"] if inverse else []) + [str(model)]
-    for start in range(0, len(words), chunk_size):
-        chunk = words[start : start + chunk_size]
-        proc = subprocess.run(
-            command, input="\n".join(chunk) + "\n", text=True,
-            capture_output=True, check=False,
-        )
-        if proc.returncode:
-            raise RuntimeError(f"flookup failed for {model.name}: {proc.stderr.strip()}")
-        for line in proc.stdout.splitlines():
-            if "\t" not in line:
-                continue
-            left, right = line.split("\t", 1)
-            if right.strip() != "+?":
-                result[left.strip()].append(right.strip())
+    worker = shared_pool().worker(model, inverse=inverse)
+    try:
+        for word, outputs in worker.stream(words, window=chunk_size):
+            if outputs:
+                result[word.strip()].extend(outputs)
+    except FlookupError as exc:
+        raise RuntimeError(f"flookup failed for {model.name}: {exc}") from exc
     return result
 
 
+class Lookup(NamedTuple):
+    """Queries a builder needs answered by one model."""
+
+    model: str
+    queries: list[str]
+    inverse: bool = True
+
+
+Row = TypeVar("Row")
+# Builders yield the lookups they need, receive one result dict per lookup
+# (same order) and finally return their rows.
+PlannedBuilder = Generator[list[Lookup], list[dict[str, list[str]]], Row]
+
+
+def run_lookup_plan(
+    builders: dict[str, PlannedBuilder], fst_dir: Path,
+) -> tuple[dict[str, object], list[dict[str, object]]]:
+    """Drive ``builders`` together, answering their lookups in shared passes.
+
+    Each round merges every pending builder's queries per model and
+    direction, drops duplicates, and runs one batched flookup pass for each
+    (model, direction) in parallel. Returns the builders' results by name
+    and one stats row per pass.
+    """
+    results: dict[str, object] = {}
+    pending: dict[str, list[Lookup]] = {}
+
+    def advance(name: str, replies: list[dict[str, list[str]]] | None) -> None:
+        try:
+            pending[name] = builders[name].send(replies)
+        except StopIteration as done:
+            results[name] = done.value
+
+    for name in builders:
+        advance(name, None)
+    passes: list[dict[str, object]] = []
+    round_number = 0
+    while pending:
+        round_number += 1
+        batches: dict[tuple[str, bool], dict[str, None]] = {}
+        requested: Counter[tuple[str, bool]] = Counter()
+        for lookups in pending.values():
+            for lookup in lookups:
+                key = (lookup.model, lookup.inverse)
+                batches.setdefault(key, {}).update(dict.fromkeys(lookup.queries))
+                requested[key] += len(lookup.queries)
+        batches = {key: queries for key, queries in batches.items() if queries}
+        answers: dict[tuple[str, bool], dict[str, list[str]]] = {}
+        if batches:
+            with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+                futures = {
+                    key: executor.submit(run_flookup, fst_dir / key[0], list(queries), key[1])
+                    for key, queries in batches.items()
+                }
+                answers = {key: future.result() for key, future in futures.items()}
+        for (model, inverse), queries in sorted(batches.items()):
+            passes.append({
+                "round": round_number,
+                "model": model,
+                "inverse": inverse,
+                "requested_queries": requested[(model, inverse)],
+                "unique_queries": len(queries),
+                "answered_queries": len(answers[(model, inverse)]),
+            })
+        current, pending = pending, {}
+        for name, lookups in current.items():
+            replies = []
+            for lookup in lookups:
+                answered = answers.get((lookup.model, lookup.inverse), {})
+                replies.append({
+                    query: answered[query] for query in lookup.queries if query in answered
+                })
+            advance(name, replies)
+    return results, passes
+
+
 @dataclass(frozen=True)
 class Connector:
     lemma: str
@@ -272,18 +299,22 @@ def atomic_roots(source_root: Path) -> dict[str, list[str]]:
     return result
 
 
-def nominal_predicates(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str, str], ...]:
+def noun_root_lemmas(source_root: Path) -> list[str]:
+    """Noun lemmas whose continuation inflects them for case."""
     noun_path = source_root / "fst/build/.work/noun/Nouns.lexc"
-    lemmas = sorted({
+    return sorted({
         entry.lemma
         for entry in parse_lexc(noun_path)
         if "+" not in entry.lemma
         and NOUN_ROOT_CONTINUATION.fullmatch(entry.continuation)
     })
+
+
+def nominal_predicates(
+    lemmas: list[str],
+) -> PlannedBuilder[tuple[tuple[str, str, str], ...]]:
     queries = [f"{lemma}+noun+trans" for lemma in lemmas]
-    generated = run_flookup(fst_dir / "noun.fst", queries, inverse=True)
+    [generated] = yield [Lookup("noun.fst", queries)]
     rows = {
         (analysis.removesuffix("+noun+trans"), "noun", surface)
         for analysis, surfaces in generated.items()
@@ -296,17 +327,10 @@ def nominal_predicates(
 
 
 def nominal_existential_predicates(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str, str], ...]:
-    noun_path = source_root / "fst/build/.work/noun/Nouns.lexc"
-    lemmas = sorted({
-        entry.lemma
-        for entry in parse_lexc(noun_path)
-        if "+" not in entry.lemma
-        and NOUN_ROOT_CONTINUATION.fullmatch(entry.continuation)
-    })
+    lemmas: list[str],
+) -> PlannedBuilder[tuple[tuple[str, str, str], ...]]:
     queries = [f"{lemma}+noun+nom" for lemma in lemmas]
-    generated = run_flookup(fst_dir / "noun.fst", queries, inverse=True)
+    [generated] = yield [Lookup("noun.fst", queries)]
     return tuple(sorted({
         (analysis.removesuffix("+noun+nom"), "noun", surface)
         for analysis, surfaces in generated.items()
@@ -317,21 +341,14 @@ def nominal_existential_predicates(
 
 
 def nominal_locative_predicates(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str], ...]:
-    noun_path = source_root / "fst/build/.work/noun/Nouns.lexc"
-    lemmas = sorted({
-        entry.lemma
-        for entry in parse_lexc(noun_path)
-        if "+" not in entry.lemma
-        and NOUN_ROOT_CONTINUATION.fullmatch(entry.continuation)
-    })
+    lemmas: list[str],
+) -> PlannedBuilder[tuple[tuple[str, str], ...]]:
     queries = [
         query
         for lemma in lemmas
         for query in (f"{lemma}+noun+loc", f"{lemma}+noun+infInc+loc")
     ]
-    generated = run_flookup(fst_dir / "noun.fst", queries, inverse=True)
+    [generated] = yield [Lookup("noun.fst", queries)]
     return tuple(sorted({
         (lemma, surface)
         for analysis, surfaces in generated.items()
@@ -342,21 +359,14 @@ def nominal_locative_predicates(
 
 
 def nominal_dative_predicates(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str], ...]:
-    noun_path = source_root / "fst/build/.work/noun/Nouns.lexc"
-    lemmas = sorted({
-        entry.lemma
-        for entry in parse_lexc(noun_path)
-        if "+" not in entry.lemma
-        and NOUN_ROOT_CONTINUATION.fullmatch(entry.continuation)
-    })
+    lemmas: list[str],
+) -> PlannedBuilder[tuple[tuple[str, str], ...]]:
     queries = [
         query
         for lemma in lemmas
         for query in (f"{lemma}+noun+dat", f"{lemma}+noun+infInc+dat")
     ]
-    generated = run_flookup(fst_dir / "noun.fst", queries, inverse=True)
+    [generated] = yield [Lookup("noun.fst", queries)]
     return tuple(sorted({
         (lemma, surface)
         for analysis, surfaces in generated.items()
@@ -367,22 +377,15 @@ def nominal_dative_predicates(
 
 
 def nominal_genitive_predicates(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str], ...]:
+    lemmas: list[str],
+) -> PlannedBuilder[tuple[tuple[str, str], ...]]:
     """Return validated -இன் noun genitives for joined temporal postpositions."""
-    noun_path = source_root / "fst/build/.work/noun/Nouns.lexc"
-    lemmas = sorted({
-        entry.lemma
-        for entry in parse_lexc(noun_path)
-        if "+" not in entry.lemma
-        and NOUN_ROOT_CONTINUATION.fullmatch(entry.continuation)
-    })
     queries = [
         query
         for lemma in lemmas
         for query in (f"{lemma}+noun+gen", f"{lemma}+noun+infInc+gen")
     ]
-    generated = run_flookup(fst_dir / "noun.fst", queries, inverse=True)
+    [generated] = yield [Lookup("noun.fst", queries)]
     return tuple(sorted({
         (lemma, surface)
         for analysis, surfaces in generated.items()
@@ -418,8 +421,8 @@ def joined_nominal_predicate(stem: str, predicate: str) -> str | None:
 
 
 def become_pairs(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str, str], ...]:
+    source_root: Path,
+) -> PlannedBuilder[tuple[tuple[str, str, str], ...]]:
     path = (
         source_root / "fst/build/.work/verb-c-rest/"
         "ThamizhiVerbs-otherthan-3-4-62-11-12.lexc"
@@ -430,9 +433,7 @@ def become_pairs(
         if (tag.startswith("+verb+fin+") or tag.startswith("+verb+nonfin+"))
         and not any(marker in tag for marker in ("+caus", "+passive", "+imp", "+opt"))
     ]
-    generated = run_flookup(
-        fst_dir / "verb-c-rest.fst", ["ஆகு" + tag for tag in allowed], inverse=True
-    )
+    [generated] = yield [Lookup("verb-c-rest.fst", ["ஆகு" + tag for tag in allowed])]
     rows: set[tuple[str, str, str]] = set()
     for analysis, surfaces in generated.items():
         tags = analysis.removeprefix("ஆகு")
@@ -448,8 +449,8 @@ def become_pairs(
 
 
 def light_predicate_pairs(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str, str], ...]:
+    source_root: Path,
+) -> PlannedBuilder[tuple[tuple[str, str, str], ...]]:
     configurations = (
         ("அடை", "verb-c4", "ThamizhiVerbs-C4.lexc", "C4Vinf"),
         (
@@ -457,7 +458,7 @@ def light_predicate_pairs(
             "ThamizhiVerbs-otherthan-3-4-62-11-12.lexc", "C5Vinf",
         ),
     )
-    rows: set[tuple[str, str, str]] = set()
+    lookups: list[Lookup] = []
     for lemma, directory, filename, section in configurations:
         path = source_root / "fst/build/.work" / directory / filename
         tags = extract_section_tags(path, section)
@@ -466,10 +467,10 @@ def light_predicate_pairs(
             if (tag.startswith("+verb+fin+") or tag.startswith("+verb+nonfin+"))
             and not any(marker in tag for marker in ("+caus", "+passive", "+colloq"))
         ]
-        model = directory + ".fst"
-        generated = run_flookup(
-            fst_dir / model, [lemma + tag for tag in allowed], inverse=True
-        )
+        lookups.append(Lookup(directory + ".fst", [lemma + tag for tag in allowed]))
+    replies = yield lookups
+    rows: set[tuple[str, str, str]] = set()
+    for (lemma, *_), generated in zip(configurations, replies):
         rows.update({
             (lemma, analysis.removeprefix(lemma), surface)
             for analysis, surfaces in generated.items()
@@ -503,17 +504,10 @@ def direct_root_connectors(source_root: Path) -> set[Connector]:
     # so productive auxiliary composition is complete for both source styles.
     work = source_root / "fst/build/.work"
     for model, filename in VERB_SOURCE_FILES.items():
-        path = work / model.removesuffix(".fst") / filename
-        section = ""
-        for raw in path.read_text(encoding="utf-8", errors="replace").splitlines():
-            stripped = raw.strip()
-            if stripped.startswith("LEXICON "):
-                section = stripped.split(None, 1)[1].strip()
+        index = lexc_index.load(work / model.removesuffix(".fst") / filename)
+        for section, relation in index.terminals:
+            if section != "Root" or ":" not in relation:
                 continue
-            body = raw.split("!", 1)[0].strip()
-            if section != "Root" or not body.endswith("#;") or ":" not in body:
-                continue
-            relation = body[:-2].strip()
             analysis, surface = relation.split(":", 1)
             normalized = analysis.replace("%=", "=")
             match = re.match(r"^(.+?)\+verb\+nonfin\+sim(.+)$", normalized)
@@ -556,65 +550,33 @@ def complex_connector_form(tags: str) -> str | None:
     return None
 
 
-def complex_root_connectors(
-    source_root: Path, fst_dir: Path,
-) -> set[Connector]:
-    """Extract connectors from every continuation-owned complex verb root."""
-    rows: set[Connector] = set()
+def complex_root_queries(source_root: Path) -> dict[str, dict[str, tuple[str, str]]]:
+    """Connector analyses of every continuation-owned complex verb root, per model."""
+    by_model: dict[str, dict[str, tuple[str, str]]] = {}
     work = source_root / "fst/build/.work"
     for model, filename in VERB_SOURCE_FILES.items():
-        path = work / model.removesuffix(".fst") / filename
-        entries = parse_lexc(path)
-        direct_tags = extract_all_section_tags(path)
-        edges: dict[str, set[str]] = defaultdict(set)
-        for entry in entries:
-            if entry.lemma == "0":
-                edges[entry.section].add(entry.continuation)
-
-        resolved_cache: dict[str, tuple[str, ...]] = {}
-
-        def resolved_tags(continuation: str) -> tuple[str, ...]:
-            if continuation in resolved_cache:
-                return resolved_cache[continuation]
-            tags: set[str] = set()
-            seen: set[str] = set()
-            pending = [continuation]
-            while pending:
-                current = pending.pop()
-                if current in seen:
-                    continue
-                seen.add(current)
-                tags.update(direct_tags.get(current, ()))
-                pending.extend(edges.get(current, ()))
-            result = tuple(sorted(tags))
-            resolved_cache[continuation] = result
-            return result
-
+        index = lexc_index.load(work / model.removesuffix(".fst") / filename)
         queries: dict[str, tuple[str, str]] = {}
-        for entry in entries:
+        for entry in index.entries:
             if entry.lemma == "0" or "+" in entry.lemma:
                 continue
-            for tags in resolved_tags(entry.continuation):
+            for tags in index.resolved_tags(entry.continuation):
                 form = complex_connector_form(tags)
                 if form is not None:
                     queries[entry.lemma + tags] = (entry.lemma, form)
-        generated = (
-            run_flookup(fst_dir / model, list(queries), inverse=True)
-            if queries else {}
-        )
-        for analysis, surfaces in generated.items():
-            lemma, form = queries[analysis]
-            for surface in surfaces:
-                rows.add(Connector(lemma, surface, form, model))
-    return rows
+        by_model[model] = queries
+    return by_model
 
 
-def extract_connectors(source_root: Path, fst_dir: Path) -> tuple[Connector, ...]:
-    rows = direct_root_connectors(source_root)
-    rows.update(complex_root_connectors(source_root, fst_dir))
+def extract_connectors(source_root: Path) -> PlannedBuilder[tuple[Connector, ...]]:
+    # Every query maps its analysis to (lemma, connector form); all of them
+    # are looked up together and read back in this order.
+    planned: list[tuple[str, dict[str, tuple[str, str]]]] = [
+        (model, queries)
+        for model, queries in complex_root_queries(source_root).items()
+    ]
     roots = atomic_roots(source_root)
     for model, lemmas in roots.items():
-        model_path = fst_dir / model
         queries: dict[str, tuple[str, str]] = {}
         for lemma in lemmas:
             for form, grammatical_form, prefix, values, sandhi in (
@@ -634,11 +596,7 @@ def extract_connectors(source_root: Path, fst_dir: Path) -> tuple[Connector, ...
                 queries[analysis] = (lemma, "past_adjpart")
             analysis = f"{lemma}+verb+nonfin+sim+neg=ஆத்+adjpart=அ"
             queries[analysis] = (lemma, "neg_adjpart")
-        generated = run_flookup(model_path, list(queries), inverse=True)
-        for analysis, surfaces in generated.items():
-            lemma, form = queries[analysis]
-            for surface in surfaces:
-                rows.add(Connector(lemma, surface, form, model))
+        planned.append((model, queries))
 
     # Passive continuations are centralized in verb-c-rest even when the
     # lexical root belongs to C4/C11/etc. Querying only the owning model loses
@@ -656,17 +614,21 @@ def extract_connectors(source_root: Path, fst_dir: Path) -> tuple[Connector, ...
                 f"{'உ' if grammatical_form == 'vpart' else 'அ'}{sandhi}"
             )
             passive_queries[analysis] = (lemma, form)
-    generated = run_flookup(fst_dir / passive_model, list(passive_queries), inverse=True)
-    for analysis, surfaces in generated.items():
-        lemma, form = passive_queries[analysis]
-        for surface in surfaces:
-            rows.add(Connector(lemma, surface, form, passive_model))
+    planned.append((passive_model, passive_queries))
+
+    replies = yield [Lookup(model, list(queries)) for model, queries in planned]
+    rows = direct_root_connectors(source_root)
+    for (model, queries), generated in zip(planned, replies):
+        for analysis, surfaces in generated.items():
+            lemma, form = queries[analysis]
+            for surface in surfaces:
+                rows.add(Connector(lemma, surface, form, model))
     return tuple(sorted(rows, key=lambda row: (row.form, row.lemma, row.surface, row.model)))
 
 
 def simple_auxiliary_pairs(
-    source_root: Path, fst_dir: Path, lemma: str
-) -> tuple[tuple[str, str], ...]:
+    source_root: Path, lemma: str
+) -> PlannedBuilder[tuple[tuple[str, str], ...]]:
     model, directory, filename, section, _ = AUXILIARIES[lemma]
     tags = extract_section_tags(source_root / "fst/build/.work" / directory / filename, section)
     allowed = [
@@ -677,14 +639,21 @@ def simple_auxiliary_pairs(
         and "+passive" not in tag
         and "+colloq" not in tag
     ]
-    generated = run_flookup(fst_dir / model, [lemma + tag for tag in allowed], inverse=True)
+    irregular_surfaces = {
+        "கொள்": KOL_IRREGULAR_SURFACES,
+        "விடு": VIDU_COLLOQUIAL_SURFACES,
+        "இரு": IRU_COLLOQUIAL_SURFACES,
+    }.get(lemma, ())
+    generated, analyzed = yield [
+        Lookup(model, [lemma + tag for tag in allowed]),
+        Lookup(model, list(irregular_surfaces), inverse=False),
+    ]
     pairs = {
         (analysis.removeprefix(lemma), surface)
         for analysis, surfaces in generated.items()
         for surface in surfaces
     }
     if lemma == "கொள்":
-        analyzed = run_flookup(fst_dir / model, list(KOL_IRREGULAR_SURFACES))
         pairs.update(
             (analysis.removeprefix(lemma), surface)
             for surface, analyses in analyzed.items()
@@ -694,7 +663,6 @@ def simple_auxiliary_pairs(
             and "+caus" not in analysis
         )
     if lemma == "விடு":
-        analyzed = run_flookup(fst_dir / model, list(VIDU_COLLOQUIAL_SURFACES))
         pairs.update(
             (analysis.removeprefix(lemma), surface)
             for surface, analyses in analyzed.items()
@@ -704,7 +672,6 @@ def simple_auxiliary_pairs(
             and "+colloq" in analysis
         )
     if lemma == "இரு":
-        analyzed = run_flookup(fst_dir / model, list(IRU_COLLOQUIAL_SURFACES))
         pairs.update(
             (analysis.removeprefix(lemma), surface)
             for surface, analyses in analyzed.items()
@@ -715,8 +682,8 @@ def simple_auxiliary_pairs(
 
 
 def prefixed_vaa_pairs(
-    source_root: Path, fst_dir: Path,
-) -> tuple[tuple[str, str], ...]:
+    source_root: Path,
+) -> PlannedBuilder[tuple[tuple[str, str], ...]]:
     """Extract the complete simple வா paradigm for productive preverbs."""
     path = (
         source_root / "fst/build/.work/verb-c-rest/"
@@ -743,9 +710,7 @@ def prefixed_vaa_pairs(
         if (tag.startswith("+verb+fin+") or tag.startswith("+verb+nonfin+"))
         and not any(marker in tag for marker in ("+caus", "+passive"))
     ]
-    generated = run_flookup(
-        fst_dir / "verb-c-rest.fst", ["வா" + tag for tag in allowed], inverse=True
-    )
+    [generated] = yield [Lookup("verb-c-rest.fst", ["வா" + tag for tag in allowed])]
     return tuple(sorted({
         (analysis.removeprefix("வா"), surface)
         for analysis, surfaces in generated.items()
@@ -1757,8 +1722,10 @@ def build_lexc(
     return "\n".join(sections) + "\n", stats
 
 
-def build_upper_inventory(lexc: str) -> dict[str, object]:
-    """Represent the generated upper language without expanding LexC products."""
+def upper_routes(
+    lexc: str,
+) -> tuple[dict[str, set[str]], dict[str, set[tuple[str, str]]]]:
+    """Continuation tag sets and each lemma's (root suffix, continuation) routes."""
     sections: dict[str, list[str]] = defaultdict(list)
     current: str | None = None
     for raw_line in lexc.splitlines():
@@ -1795,21 +1762,17 @@ def build_upper_inventory(lexc: str) -> dict[str, object]:
             lemma_routes[lemma].add((root_suffix, target))
         else:
             raise ValueError(f"unknown generated continuation {target!r}")
+    return continuation_tags, lemma_routes
+
 
+def build_upper_inventory(
+    continuation_tags: dict[str, set[str]], lemma_routes: dict[str, set[tuple[str, str]]],
+) -> dict[str, object]:
+    """Represent the generated upper language without expanding LexC products."""
     route_groups: Counter[frozenset[tuple[str, str]]] = Counter(
         frozenset(routes) for routes in lemma_routes.values()
     )
-    frequencies: Counter[str] = Counter()
-    for routes, lemma_count in route_groups.items():
-        raw_tags: set[str] = set()
-        for root_suffix, continuation in routes:
-            suffixes = continuation_tags[continuation] if continuation else {""}
-            raw_tags.update(
-                (root_suffix + suffix).lstrip("+") for suffix in suffixes
-            )
-        for tags in raw_tags:
-            frequencies[tags] += lemma_count
-
+    frequencies = auxiliary_inventory.raw_tag_frequencies(route_groups, continuation_tags)
     return {
         "schema_version": "0.1.0",
         "lemmas": sorted(lemma_routes),
@@ -1841,39 +1804,49 @@ def main() -> int:
     parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT)
     args = parser.parse_args()
     args.output_dir.mkdir(parents=True, exist_ok=True)
-    connectors = extract_connectors(args.source_root, args.fst_dir)
-    iru = simple_auxiliary_pairs(args.source_root, args.fst_dir, "இரு")
-    vidu = simple_auxiliary_pairs(args.source_root, args.fst_dir, "விடு")
-    kol = simple_auxiliary_pairs(args.source_root, args.fst_dir, "கொள்")
-    prefixed_vaa = prefixed_vaa_pairs(args.source_root, args.fst_dir)
-    predicates = nominal_predicates(args.source_root, args.fst_dir)
-    existential_predicates = nominal_existential_predicates(args.source_root, args.fst_dir)
-    locative_predicates = nominal_locative_predicates(args.source_root, args.fst_dir)
-    dative_predicates = nominal_dative_predicates(args.source_root, args.fst_dir)
-    genitive_predicates = nominal_genitive_predicates(args.source_root, args.fst_dir)
-    become = become_pairs(args.source_root, args.fst_dir)
-    light_predicates = light_predicate_pairs(args.source_root, args.fst_dir)
+    noun_lemmas = noun_root_lemmas(args.source_root)
+    built, lookup_passes = run_lookup_plan({
+        "connectors": extract_connectors(args.source_root),
+        "iru": simple_auxiliary_pairs(args.source_root, "இரு"),
+        "vidu": simple_auxiliary_pairs(args.source_root, "விடு"),
+        "kol": simple_auxiliary_pairs(args.source_root, "கொள்"),
+        "prefixed_vaa": prefixed_vaa_pairs(args.source_root),
+        "predicates": nominal_predicates(noun_lemmas),
+        "existential_predicates": nominal_existential_predicates(noun_lemmas),
+        "locative_predicates": nominal_locative_predicates(noun_lemmas),
+        "dative_predicates": nominal_dative_predicates(noun_lemmas),
+        "genitive_predicates": nominal_genitive_predicates(noun_lemmas),
+        "become": become_pairs(args.source_root),
+        "light_predicates": light_predicate_pairs(args.source_root),
+    }, args.fst_dir)
     lexc, stats = build_lexc(
-        connectors, iru, vidu, kol, predicates, become, existential_predicates,
-        light_predicates,
-        locative_predicates=locative_predicates,
-        dative_predicates=dative_predicates,
-        genitive_predicates=genitive_predicates,
-        prefixed_vaa_templates=prefixed_vaa,
+        built["connectors"], built["iru"], built["vidu"], built["kol"],
+        built["predicates"], built["become"], built["existential_predicates"],
+        built["light_predicates"],
+        locative_predicates=built["locative_predicates"],
+        dative_predicates=built["dative_predicates"],
+        genitive_predicates=built["genitive_predicates"],
+        prefixed_vaa_templates=built["prefixed_vaa"],
     )
+    stats["lookup_passes"] = lookup_passes
     lexc_path = args.output_dir / "verb-auxiliary.lexc"
     fst_path = args.output_dir / "verb-auxiliary.fst"
     inventory_path = args.output_dir / "verb-auxiliary.inventory.json"
+    index_path = args.output_dir / "verb-auxiliary.inventory.bin"
     lexc_path.write_text(lexc, encoding="utf-8")
+    routes = upper_routes(lexc)
     inventory_path.write_text(
-        json.dumps(build_upper_inventory(lexc), ensure_ascii=False, separators=(",", ":"))
+        json.dumps(build_upper_inventory(*routes), ensure_ascii=False, separators=(",", ":"))
         + "\n",
         encoding="utf-8",
     )
+    index_tables = auxiliary_inventory.write_index(index_path, *routes)
     compile_fst(lexc_path, fst_path)
     stats["fst_bytes"] = fst_path.stat().st_size
     stats["inventory_bytes"] = inventory_path.stat().st_size
     stats["inventory_sha256"] = hashlib.sha256(inventory_path.read_bytes()).hexdigest()
+    stats["inventory_index"] = index_tables
+    stats["inventory_index_sha256"] = hashlib.sha256(index_path.read_bytes()).hexdigest()
     (args.output_dir / "summary.json").write_text(
         json.dumps(stats, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
         encoding="utf-8",
@@ -0,0 +1,227 @@
+"""Content-addressed model blobs linked into consumer directories.
+
+Every artifact is stored once under ``<store>/<sha[:2]>/<sha>`` (read-only)
+and hardlinked into each directory that ships it; across filesystems a
+reflink is tried, then a plain copy. Directories tracked by git are the
+exception (``publish(..., writable=True)``): their files may be edited in
+place, so they get a writable reflink or copy and never share the blob's
+inode. A consumer directory is never edited in place: the new file set is staged in a sibling directory and swapped in
+with one atomic ``renameat2(RENAME_EXCHANGE)``, so a process opening models
+sees either the old set or the new one. Consumers that are symlinks (a
+deployment's choice) get their link replaced instead. Files already open
+keep reading their old inode.
+
+Builds and installs hold a shared lock on the store while they add and
+publish; ``prune`` only runs when it can take the lock exclusively, so it
+never deletes a blob another build is about to publish.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import ctypes
+import errno
+import fcntl
+import hashlib
+import os
+import shutil
+import stat
+import subprocess
+from collections.abc import Callable, Collection, Iterator
+from pathlib import Path
+
+_AT_FDCWD = -100
+_RENAME_EXCHANGE = 2
+_FICLONE = 0x40049409
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _reflink(source: Path, destination: Path) -> bool:
+    try:
+        with source.open("rb") as src, destination.open("wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+    except OSError:
+        destination.unlink(missing_ok=True)
+        return False
+    shutil.copystat(source, destination)
+    return True
+
+
+def link_or_copy(source: Path, destination: Path) -> str:
+    """Put ``source``'s bytes at ``destination`` as cheaply as possible; returns how."""
+    try:
+        os.link(source, destination)
+        return "hardlink"
+    except OSError as error:
+        if error.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            raise
+    if _reflink(source, destination):
+        return "reflink"
+    shutil.copy2(source, destination)
+    return "copy"
+
+
+def clone_file(source: Path, destination: Path) -> str:
+    """Write an independent, writable copy of a blob; shares extents when it can."""
+    method = "reflink" if _reflink(source, destination) else "copy"
+    if method == "copy":
+        shutil.copy2(source, destination)
+    destination.chmod(0o644)
+    return method
+
+
+def tracked_by_git(directory: Path) -> bool:
+    """Whether git tracks any file under ``directory``; False outside a work tree."""
+    directory = Path(directory).resolve()
+    cwd = directory
+    while not cwd.is_dir():
+        cwd = cwd.parent
+    try:
+        completed = subprocess.run(
+            ["git", "ls-files", "-z", "--", str(directory)], cwd=cwd, capture_output=True,
+        )
+    except OSError:
+        return False
+    return completed.returncode == 0 and bool(completed.stdout)
+
+
+def exchange_directories(staged: Path, target: Path) -> None:
+    """Atomically swap two directory entries; ``staged`` then holds the old contents."""
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        result = libc.renameat2(
+            _AT_FDCWD, os.fsencode(staged), _AT_FDCWD, os.fsencode(target), _RENAME_EXCHANGE,
+        )
+    except AttributeError:
+        result, code = -1, errno.ENOSYS
+    else:
+        code = ctypes.get_errno() if result != 0 else 0
+    if result == 0:
+        return
+    if code not in (errno.ENOSYS, errno.EINVAL, errno.ENOTSUP):
+        raise OSError(code, os.strerror(code), str(target))
+    # No atomic exchange on this platform/filesystem: the target is missing
+    # between these two renames.
+    parked = target.with_name(f".{target.name}.old-{os.getpid()}")
+    target.rename(parked)
+    staged.rename(target)
+    parked.rename(staged)
+
+
+class ArtifactStore:
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+
+    def blob(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _lock_file(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        return (self.root / ".lock").open("a")
+
+    @contextlib.contextmanager
+    def session(self) -> Iterator[ArtifactStore]:
+        """Hold the store open while adding and publishing; ``prune`` waits its turn."""
+        with self._lock_file() as lock:
+            fcntl.flock(lock, fcntl.LOCK_SH)
+            yield self
+
+    def add(self, path: Path, digest: str | None = None) -> str:
+        """Store ``path``'s bytes (once per digest); returns the sha256."""
+        digest = digest or sha256_file(path)
+        blob = self.blob(digest)
+        if blob.exists() and blob.stat().st_size == path.stat().st_size:
+            # Mark it as in use by this build so an age-based prune keeps it.
+            os.utime(blob)
+            return digest
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        # A copy, not a link: build outputs may later be rewritten in place.
+        temporary = blob.with_name(f".{digest}.{os.getpid()}.tmp")
+        shutil.copyfile(path, temporary)
+        temporary.chmod(stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        os.replace(temporary, blob)
+        return digest
+
+    def publish(
+        self,
+        directory: Path,
+        files: dict[str, str],
+        keep: Callable[[Path], bool] = lambda path: True,
+        writable: bool = False,
+    ) -> dict[str, int]:
+        """Make ``directory`` hold ``files`` (name -> digest) in one atomic swap.
+
+        Existing entries that are not replaced are carried over when
+        ``keep`` accepts them. With ``writable`` the files are independent
+        writable clones instead of links to the blobs. Returns how many files
+        were hardlinked, reflinked or copied.
+        """
+        directory = Path(directory)
+        live = directory.resolve() if directory.is_symlink() else directory
+        staged = live.with_name(f".{live.name}.staging-{os.getpid()}")
+        if staged.exists():
+            shutil.rmtree(staged)
+        staged.mkdir(parents=True)
+        methods = {"hardlink": 0, "reflink": 0, "copy": 0}
+        place = clone_file if writable else link_or_copy
+        try:
+            if live.is_dir():
+                for existing in live.iterdir():
+                    if existing.name in files or not keep(existing):
+                        continue
+                    if existing.is_dir() and not existing.is_symlink():
+                        shutil.copytree(existing, staged / existing.name, symlinks=True, copy_function=link_or_copy)
+                    else:
+                        link_or_copy(existing, staged / existing.name)
+            for name, digest in sorted(files.items()):
+                methods[place(self.blob(digest), staged / name)] += 1
+            staged.chmod(live.stat().st_mode & 0o7777 if live.is_dir() else 0o755)
+        except BaseException:
+            shutil.rmtree(staged, ignore_errors=True)
+            raise
+
+        if directory.is_symlink():
+            generation = live.with_name(f"{directory.name}.{os.getpid()}.{os.urandom(4).hex()}")
+            staged.rename(generation)
+            link = directory.with_name(f".{directory.name}.link-{os.getpid()}")
+            link.unlink(missing_ok=True)
+            link.symlink_to(generation.relative_to(directory.parent) if generation.parent == directory.parent else generation)
+            os.replace(link, directory)
+            if live.name.startswith(f"{directory.name}."):
+                shutil.rmtree(live, ignore_errors=True)
+        elif directory.exists():
+            exchange_directories(staged, directory)
+            shutil.rmtree(staged)
+        else:
+            directory.parent.mkdir(parents=True, exist_ok=True)
+            staged.rename(directory)
+        return methods
+
+    def prune(self, keep: Collection[str], older_than: float) -> int:
+        """Drop blobs outside ``keep`` last used before ``older_than``; returns how many.
+
+        Skipped (returns 0) while another build or install holds a session, so
+        call it after leaving this process's own session.
+        """
+        if not self.root.is_dir():
+            return 0
+        with self._lock_file() as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            removed = 0
+            for blob in self.root.glob("??/*"):
+                if blob.name.startswith(".") or blob.name in keep or not blob.is_file():
+                    continue
+                if blob.stat().st_mtime < older_than:
+                    blob.unlink()
+                    removed += 1
+            return removed
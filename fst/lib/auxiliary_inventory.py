@@ -0,0 +1,314 @@
+"""Indexed binary form of the verb-auxiliary upper-language inventory.
+
+``verb-auxiliary.inventory.json`` lists every lemma and every raw tag string
+with its frequency, so a reader has to parse all of it. This format stores
+the same inventory as fixed-width little-endian records over one interned
+string table, and ``InventoryIndex`` answers queries straight from a memory
+map. Tag strings repeat the same ``+morpheme`` pieces over and over, so the
+strings are interned twice: each string is a run of piece ids, and each
+piece's UTF-8 bytes are stored once.
+
+- header: magic, version, then a row count and file offset for each table
+- pieces: ``u32`` end offsets into the UTF-8 blob at the end of the file
+- piece refs: ``u32`` piece ids
+- strings: ``u32`` end offsets into the piece refs (string 0 is ``""``)
+- lemmas: ``(string, route group)`` sorted by UTF-8 bytes
+- raw tags: ``(head string, tail string, frequency)`` sorted by the UTF-8
+  bytes of ``head + tail``; the halves are a root suffix and a continuation
+  tag, so raw tag strings are never stored whole
+- route groups: ``(first route, route count, lemma count)``
+- routes: ``(root suffix string, continuation or NO_CONTINUATION)``
+- continuations: ``(name string, first tag, tag count)``
+- continuation tags: ``u32`` strings
+
+Lemma and tag lookups binary-search their sorted tables and only decode the
+strings they touch.
+"""
+
+from __future__ import annotations
+
+import mmap
+import os
+import re
+import struct
+from collections import Counter
+from collections.abc import Callable, Iterator
+from pathlib import Path
+
+MAGIC = b"AUXINV\0\0"
+VERSION = 1
+NO_CONTINUATION = 0xFFFFFFFF
+# magic, version, upper analysis count, then (count, offset) for pieces,
+# piece refs, strings, lemmas, tags, route groups, routes, continuations and
+# continuation tags.
+_HEADER = struct.Struct("<8sIQ" + "II" * 9)
+_PIECE = re.compile(r"[^+]+|\+[^+]*")
+_U32 = struct.Struct("<I")
+_PAIR = struct.Struct("<II")
+_TRIPLE = struct.Struct("<III")
+
+Route = tuple[str, str]
+
+
+def _split_raw(root_suffix: str, suffix: str) -> tuple[str, str]:
+    """(head, tail) with ``head + tail == (root_suffix + suffix).lstrip("+")``."""
+    head = root_suffix.lstrip("+")
+    return (head, suffix) if head else ("", suffix.lstrip("+"))
+
+
+def raw_tag_frequencies(
+    route_groups: Counter[frozenset[Route]], continuation_tags: dict[str, set[str]],
+) -> Counter[str]:
+    """How many lemmas carry each raw upper tag string."""
+    frequencies: Counter[str] = Counter()
+    for routes, lemma_count in route_groups.items():
+        raw_tags: set[str] = set()
+        for root_suffix, continuation in routes:
+            suffixes = continuation_tags[continuation] if continuation else {""}
+            raw_tags.update((root_suffix + suffix).lstrip("+") for suffix in suffixes)
+        for tags in raw_tags:
+            frequencies[tags] += lemma_count
+    return frequencies
+
+
+def write_index(
+    path: Path,
+    continuation_tags: dict[str, set[str]],
+    lemma_routes: dict[str, set[Route]],
+) -> dict[str, int]:
+    """Write the index for ``lemma_routes`` to ``path``; returns its table sizes."""
+    pieces: dict[str, int] = {}
+    piece_refs = bytearray()
+    string_rows = bytearray()
+    strings: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+            for piece in _PIECE.findall(value):
+                piece_refs.extend(_U32.pack(pieces.setdefault(piece, len(pieces))))
+            string_rows.extend(_U32.pack(len(piece_refs) // _U32.size))
+        return index
+
+    intern("")
+
+    route_groups: Counter[frozenset[Route]] = Counter(
+        frozenset(routes) for routes in lemma_routes.values()
+    )
+    frequencies = raw_tag_frequencies(route_groups, continuation_tags)
+
+    continuation_names = sorted(continuation_tags)
+    continuation_ids = {name: index for index, name in enumerate(continuation_names)}
+    continuation_rows = bytearray()
+    continuation_tag_rows = bytearray()
+    first_tag = 0
+    for name in continuation_names:
+        tags = sorted(continuation_tags[name])
+        continuation_rows += _TRIPLE.pack(intern(name), first_tag, len(tags))
+        for tag in tags:
+            continuation_tag_rows += _U32.pack(intern(tag))
+        first_tag += len(tags)
+
+    groups = sorted(route_groups, key=sorted)
+    group_ids = {routes: index for index, routes in enumerate(groups)}
+    group_rows = bytearray()
+    route_rows = bytearray()
+    first_route = 0
+    for routes in groups:
+        ordered = sorted(routes)
+        group_rows += _TRIPLE.pack(first_route, len(ordered), route_groups[routes])
+        for root_suffix, continuation in ordered:
+            target = continuation_ids[continuation] if continuation else NO_CONTINUATION
+            route_rows += _PAIR.pack(intern(root_suffix), target)
+        first_route += len(ordered)
+
+    lemma_rows = bytearray()
+    for lemma in sorted(lemma_routes, key=lambda value: value.encode("utf-8")):
+        lemma_rows += _PAIR.pack(intern(lemma), group_ids[frozenset(lemma_routes[lemma])])
+    halves: dict[str, tuple[str, str]] = {}
+    for routes in groups:
+        for root_suffix, continuation in routes:
+            for suffix in continuation_tags[continuation] if continuation else ("",):
+                head, tail = _split_raw(root_suffix, suffix)
+                halves.setdefault(head + tail, (head, tail))
+    tag_rows = bytearray()
+    for tags in sorted(frequencies, key=lambda value: value.encode("utf-8")):
+        head, tail = halves[tags]
+        tag_rows += _TRIPLE.pack(intern(head), intern(tail), frequencies[tags])
+
+    blob = bytearray()
+    piece_rows = bytearray()
+    for piece in pieces:
+        blob += piece.encode("utf-8")
+        piece_rows += _U32.pack(len(blob))
+
+    sections = [
+        (len(pieces), piece_rows),
+        (len(piece_refs) // _U32.size, piece_refs),
+        (len(strings), string_rows),
+        (len(lemma_routes), lemma_rows),
+        (len(frequencies), tag_rows),
+        (len(groups), group_rows),
+        (first_route, route_rows),
+        (len(continuation_names), continuation_rows),
+        (first_tag, continuation_tag_rows),
+    ]
+    offset = _HEADER.size
+    layout: list[int] = []
+    for count, rows in sections:
+        layout += [count, offset]
+        offset += len(rows)
+    header = _HEADER.pack(MAGIC, VERSION, sum(frequencies.values()), *layout)
+
+    temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    with temporary.open("wb") as f:
+        f.write(header)
+        for _, rows in sections:
+            f.write(rows)
+        # The string blob follows the last table, at the end of the file.
+        f.write(blob)
+    os.replace(temporary, path)
+    return {
+        "pieces": len(pieces),
+        "strings": len(strings),
+        "lemmas": len(lemma_routes),
+        "raw_tags": len(frequencies),
+        "route_groups": len(groups),
+        "routes": first_route,
+        "continuations": len(continuation_names),
+        "bytes": path.stat().st_size,
+    }
+
+
+class InventoryIndex:
+    """Read-only view of an index file; nothing is decoded until asked for."""
+
+    def __init__(self, path: Path) -> None:
+        with Path(path).open("rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.upper_analysis_count, *layout = _HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: not a version {VERSION} auxiliary inventory index")
+        (
+            (_, self._pieces),
+            (_, self._piece_refs),
+            (_, self._strings),
+            (self.lemma_count, self._lemmas),
+            (self.raw_tag_count, self._tags),
+            (self.route_group_count, self._groups),
+            (_, self._routes),
+            (_, self._continuations),
+            (continuation_tag_count, self._continuation_tags),
+        ) = zip(layout[::2], layout[1::2])
+        self._blob = self._continuation_tags + continuation_tag_count * _U32.size
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> InventoryIndex:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _end(self, table: int, row: int) -> int:
+        """End offset of ``row``; a row spans ``_end(row - 1)`` to ``_end(row)``."""
+        return _U32.unpack_from(self._map, table + row * _U32.size)[0] if row >= 0 else 0
+
+    def _string_bytes(self, index: int) -> bytes:
+        parts = []
+        for ref in range(self._end(self._strings, index - 1), self._end(self._strings, index)):
+            piece = _U32.unpack_from(self._map, self._piece_refs + ref * _U32.size)[0]
+            start = self._blob + self._end(self._pieces, piece - 1)
+            parts.append(self._map[start:self._blob + self._end(self._pieces, piece)])
+        return b"".join(parts)
+
+    def _string(self, index: int) -> str:
+        return self._string_bytes(index).decode("utf-8")
+
+    def _lemma_bytes(self, row: int) -> bytes:
+        return self._string_bytes(_PAIR.unpack_from(self._map, self._lemmas + row * _PAIR.size)[0])
+
+    def _tag_bytes(self, row: int) -> bytes:
+        head, tail, _ = _TRIPLE.unpack_from(self._map, self._tags + row * _TRIPLE.size)
+        return self._string_bytes(head) + self._string_bytes(tail)
+
+    @staticmethod
+    def _search(key_at: Callable[[int], bytes], count: int, key: str) -> int | None:
+        """Row of ``key`` in a table whose keys are sorted by UTF-8 bytes."""
+        target = key.encode("utf-8")
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            found = key_at(middle)
+            if found < target:
+                low = middle + 1
+            elif found > target:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def __contains__(self, lemma: object) -> bool:
+        return isinstance(lemma, str) and self._search(self._lemma_bytes, self.lemma_count, lemma) is not None
+
+    def __len__(self) -> int:
+        return self.lemma_count
+
+    def lemmas(self) -> Iterator[str]:
+        for row in range(self.lemma_count):
+            yield self._string(_PAIR.unpack_from(self._map, self._lemmas + row * _PAIR.size)[0])
+
+    def raw_tag_frequencies(self) -> Iterator[tuple[str, int]]:
+        for row in range(self.raw_tag_count):
+            frequency = _TRIPLE.unpack_from(self._map, self._tags + row * _TRIPLE.size)[2]
+            yield self._tag_bytes(row).decode("utf-8"), frequency
+
+    def tag_frequency(self, tags: str) -> int:
+        """How many lemmas carry the raw tag string ``tags`` (0 if none)."""
+        row = self._search(self._tag_bytes, self.raw_tag_count, tags)
+        if row is None:
+            return 0
+        return _TRIPLE.unpack_from(self._map, self._tags + row * _TRIPLE.size)[2]
+
+    def _route_rows(self, lemma: str) -> list[tuple[int, int]]:
+        row = self._search(self._lemma_bytes, self.lemma_count, lemma)
+        if row is None:
+            return []
+        group = _PAIR.unpack_from(self._map, self._lemmas + row * _PAIR.size)[1]
+        first, count, _ = _TRIPLE.unpack_from(self._map, self._groups + group * _TRIPLE.size)
+        return [
+            _PAIR.unpack_from(self._map, self._routes + route * _PAIR.size)
+            for route in range(first, first + count)
+        ]
+
+    def routes(self, lemma: str) -> list[Route]:
+        """(root suffix, continuation) routes of ``lemma``; ``""`` is a final root."""
+        routes: list[Route] = []
+        for suffix, target in self._route_rows(lemma):
+            name = ""
+            if target != NO_CONTINUATION:
+                name = self._string(_TRIPLE.unpack_from(self._map, self._continuations + target * _TRIPLE.size)[0])
+            routes.append((self._string(suffix), name))
+        return routes
+
+    def lemma_tags(self, lemma: str) -> set[str]:
+        """Every raw upper tag string ``lemma`` takes."""
+        result: set[str] = set()
+        for suffix_id, target in self._route_rows(lemma):
+            root_suffix = self._string(suffix_id)
+            if target == NO_CONTINUATION:
+                result.add(root_suffix.lstrip("+"))
+                continue
+            _, first_tag, tag_count = _TRIPLE.unpack_from(
+                self._map, self._continuations + target * _TRIPLE.size
+            )
+            for tag in range(first_tag, first_tag + tag_count):
+                string = _U32.unpack_from(self._map, self._continuation_tags + tag * _U32.size)[0]
+                result.add((root_suffix + self._string(string)).lstrip("+"))
+        return result
+
+    def has_analysis(self, lemma: str, tags: str) -> bool:
+        return tags in self.lemma_tags(lemma)
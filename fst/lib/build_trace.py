@@ -0,0 +1,228 @@
+"""Wall/CPU time, child-process RSS and pipe traffic for build stages.
+
+Build code wraps its steps in ``stage(name)``; the task a stage belongs to
+is the outermost stage open on the same thread (or ``task=``). Subprocesses
+started through ``run_child`` or ``MeasuredPopen`` are reaped with
+``os.wait4``, which reports each child's own CPU time and peak RSS even when
+other tasks run children at the same time, and their pipe bytes are counted.
+A child counts towards every stage open on its thread.
+
+Nothing is recorded until ``start()`` installs a trace, so library code can
+call these helpers unconditionally.
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+
+# ru_maxrss is in kilobytes on Linux and bytes on macOS.
+_RSS_SCALE = 1024 if sys.platform == "darwin" else 1
+
+
+# MeasuredPopen overrides the private POSIX ``Popen._try_wait(wait_flags)``,
+# which every wait()/communicate() reaps through; checked on CPython 3.8 to
+# 3.13. Where it is missing (Windows, or a future CPython) the override is not
+# installed and children are recorded with no CPU time or RSS.
+_CAN_MEASURE = hasattr(subprocess.Popen, "_try_wait") and hasattr(os, "wait4")
+
+
+class MeasuredPopen(subprocess.Popen):
+    """Popen that keeps the child's resource usage when it is reaped."""
+
+    rusage = None
+
+    if _CAN_MEASURE:
+        def _try_wait(self, wait_flags):
+            try:
+                pid, status, rusage = os.wait4(self.pid, wait_flags)
+            except ChildProcessError:
+                # Same fallback as Popen: the child was reaped elsewhere.
+                return self.pid, 0
+            if pid == self.pid:
+                self.rusage = rusage
+            return pid, status
+
+
+class _Span:
+    def __init__(self, task: str, name: str, thread: int) -> None:
+        self.task = task
+        self.name = name
+        self.thread = thread
+        self.start = time.perf_counter()
+        self.cpu_start = time.thread_time()
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.children = 0
+        self.child_cpu = 0.0
+        self.child_peak_rss_kb = 0
+        self.pipe_bytes = 0
+
+    def row(self, origin: float) -> dict[str, object]:
+        return {
+            "task": self.task,
+            "stage": self.name,
+            "start_seconds": round(self.start - origin, 3),
+            "wall_seconds": round(self.wall, 3),
+            "cpu_seconds": round(self.cpu, 3),
+            "children": self.children,
+            "child_cpu_seconds": round(self.child_cpu, 3),
+            "child_peak_rss_kb": self.child_peak_rss_kb,
+            "pipe_bytes": self.pipe_bytes,
+        }
+
+
+class BuildTrace:
+    def __init__(self) -> None:
+        self.origin = time.perf_counter()
+        self.spans: list[_Span] = []
+        self.children: list[dict[str, object]] = []
+        self.threads: dict[int, int] = {}
+        self._open = threading.local()
+        self._lock = threading.Lock()
+
+    def _stack(self) -> list[_Span]:
+        stack = getattr(self._open, "stack", None)
+        if stack is None:
+            stack = self._open.stack = []
+        return stack
+
+    def _thread(self) -> int:
+        ident = threading.get_ident()
+        with self._lock:
+            return self.threads.setdefault(ident, len(self.threads) + 1)
+
+    @contextmanager
+    def stage(self, name: str, task: str | None = None) -> Iterator[None]:
+        stack = self._stack()
+        span = _Span(task or (stack[0].task if stack else name), name, self._thread())
+        stack.append(span)
+        try:
+            yield
+        finally:
+            stack.pop()
+            span.wall = time.perf_counter() - span.start
+            span.cpu = time.thread_time() - span.cpu_start
+            with self._lock:
+                self.spans.append(span)
+
+    def child(self, cmd: Sequence[str], started: float, rusage, pipe_bytes: int) -> None:
+        ended = time.perf_counter()
+        cpu = (rusage.ru_utime + rusage.ru_stime) if rusage is not None else 0.0
+        rss = rusage.ru_maxrss // _RSS_SCALE if rusage is not None else 0
+        thread = self._thread()
+        for span in self._stack():
+            span.children += 1
+            span.child_cpu += cpu
+            span.child_peak_rss_kb = max(span.child_peak_rss_kb, rss)
+            span.pipe_bytes += pipe_bytes
+        with self._lock:
+            self.children.append({
+                "command": os.path.basename(cmd[0]),
+                "thread": thread,
+                "start": started,
+                "wall": ended - started,
+                "cpu_seconds": round(cpu, 3),
+                "peak_rss_kb": rss,
+                "pipe_bytes": pipe_bytes,
+            })
+
+    def rows(self) -> list[dict[str, object]]:
+        """One row per finished stage, in start order."""
+        return [span.row(self.origin) for span in sorted(self.spans, key=lambda span: span.start)]
+
+    def totals(self) -> list[dict[str, object]]:
+        """Stage rows summed over tasks, slowest first."""
+        totals: dict[str, dict[str, object]] = {}
+        for span in self.spans:
+            row = totals.setdefault(span.name, {
+                "stage": span.name, "count": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0,
+                "child_cpu_seconds": 0.0, "child_peak_rss_kb": 0, "pipe_bytes": 0,
+            })
+            row["count"] += 1
+            row["wall_seconds"] += span.wall
+            row["cpu_seconds"] += span.cpu
+            row["child_cpu_seconds"] += span.child_cpu
+            row["child_peak_rss_kb"] = max(row["child_peak_rss_kb"], span.child_peak_rss_kb)
+            row["pipe_bytes"] += span.pipe_bytes
+        for row in totals.values():
+            for field in ("wall_seconds", "cpu_seconds", "child_cpu_seconds"):
+                row[field] = round(row[field], 3)
+        return sorted(totals.values(), key=lambda row: (-row["wall_seconds"], row["stage"]))
+
+    def chrome_trace(self) -> dict[str, object]:
+        """Trace Event Format (chrome://tracing, Perfetto): stages and their children."""
+        pid = os.getpid()
+        events: list[dict[str, object]] = [
+            {"ph": "M", "name": "thread_name", "pid": pid, "tid": tid, "args": {"name": f"worker {tid}"}}
+            for tid in sorted(self.threads.values())
+        ]
+        for span in self.spans:
+            row = span.row(self.origin)
+            events.append({
+                "ph": "X",
+                "name": span.task if span.name == "task" else span.name,
+                "cat": span.task,
+                "pid": pid,
+                "tid": span.thread,
+                "ts": round((span.start - self.origin) * 1e6),
+                "dur": round(span.wall * 1e6),
+                "args": {field: row[field] for field in row if field not in ("start_seconds", "wall_seconds")},
+            })
+        for child in self.children:
+            events.append({
+                "ph": "X",
+                "name": child["command"],
+                "cat": "subprocess",
+                "pid": pid,
+                "tid": child["thread"],
+                "ts": round((child["start"] - self.origin) * 1e6),
+                "dur": round(child["wall"] * 1e6),
+                "args": {field: child[field] for field in ("cpu_seconds", "peak_rss_kb", "pipe_bytes")},
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+_current: BuildTrace | None = None
+
+
+def start() -> BuildTrace:
+    """Install a fresh trace for the stages and children that follow."""
+    global _current
+    _current = BuildTrace()
+    return _current
+
+
+@contextmanager
+def stage(name: str, task: str | None = None) -> Iterator[None]:
+    if _current is None:
+        yield
+        return
+    with _current.stage(name, task):
+        yield
+
+
+def record_child(cmd: Sequence[str], started: float, rusage, pipe_bytes: int) -> None:
+    if _current is not None:
+        _current.child(cmd, started, rusage, pipe_bytes)
+
+
+def run_child(cmd: list[str], cwd: str | None = None, input: str | None = None) -> subprocess.CompletedProcess[str]:
+    """``subprocess.run(..., capture_output=True, text=True)``, measured; does not raise on failure."""
+    data = input.encode("utf-8") if input is not None else None
+    started = time.perf_counter()
+    with MeasuredPopen(
+        cmd,
+        cwd=cwd,
+        stdin=subprocess.PIPE if data is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    ) as proc:
+        stdout, stderr = proc.communicate(data)
+    record_child(cmd, started, proc.rusage, len(data or b"") + len(stdout) + len(stderr))
+    return subprocess.CompletedProcess(cmd, proc.returncode, stdout.decode("utf-8"), stderr.decode("utf-8"))
@@ -0,0 +1,260 @@
+"""Persistent, content-addressed cache of flookup results.
+
+Rows are keyed by (model sha256, direction, query), so a rebuilt model with
+new bytes never reuses stale answers while an unchanged model answers every
+previously seen query from disk. Misses (including ``+?``) are cached as an
+empty result list. The store is SQLite, safe to share between the worker
+processes of ``generate_fst_forms.py --jobs`` and the threads of one process,
+and bounded by a byte budget with least-recently-used eviction.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+from flookup_pool import FlookupWorker
+
+DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+SQL_BATCH = 500
+# Eviction frees down to this fraction of the budget so that a run sitting at
+# the limit does not evict on every store.
+EVICT_TARGET = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    model TEXT NOT NULL,
+    inverse INTEGER NOT NULL,
+    query TEXT NOT NULL,
+    outputs TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    used INTEGER NOT NULL,
+    UNIQUE (model, inverse, query)
+);
+CREATE INDEX IF NOT EXISTS results_used ON results (used);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('total_bytes', 0);
+"""
+
+_digest_memo: dict[tuple[str, int, int], str] = {}
+
+
+def model_digest(path: Path) -> str:
+    """sha256 of a model file, memoized on (path, mtime, size)."""
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    digest = _digest_memo.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            while True:
+                chunk = f.read(1024 * 1024)
+                if not chunk:
+                    break
+                h.update(chunk)
+        digest = h.hexdigest()
+        _digest_memo[key] = digest
+    return digest
+
+
+def empty_stats() -> dict[str, object]:
+    return {"hits": 0, "misses": 0, "evicted_rows": 0, "by_model": {}}
+
+
+def merge_stats(into: dict[str, object], delta: dict[str, object]) -> None:
+    for key in ("hits", "misses", "evicted_rows"):
+        into[key] += delta[key]
+    for label, counts in delta["by_model"].items():
+        row = into["by_model"].setdefault(label, {"hits": 0, "misses": 0})
+        row["hits"] += counts["hits"]
+        row["misses"] += counts["misses"]
+
+
+class LookupCache:
+    """SQLite-backed result store; one connection per process and thread."""
+
+    def __init__(self, path: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.stamp = int(time.time())
+        self.stats = empty_stats()
+        self._conns: dict[int, sqlite3.Connection] = {}
+        self._pid = -1
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, object]:
+        state = dict(self.__dict__)
+        state["_conns"] = {}
+        state["_pid"] = -1
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: dict[str, object]) -> None:
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        # A connection must never cross a fork, and each thread gets its own
+        # so pipelined lookup stages can share the cache.
+        ident = threading.get_ident()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._conns = {}
+                self._pid = os.getpid()
+            conn = self._conns.get(ident)
+            if conn is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Only this thread uses it; close() may run on another.
+                conn = sqlite3.connect(self.path, timeout=120, isolation_level=None, check_same_thread=False)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.executescript(SCHEMA)
+                self._conns[ident] = conn
+        return conn
+
+    def take_stats(self) -> dict[str, object]:
+        """Return counters accumulated since the last call and reset them."""
+        with self._lock:
+            stats, self.stats = self.stats, empty_stats()
+        return stats
+
+    def absorb(self, delta: dict[str, object]) -> None:
+        """Add counters taken from another process's (or thread's) ``take_stats``."""
+        with self._lock:
+            merge_stats(self.stats, delta)
+
+    def _count(self, model_path: Path, inverse: bool, hits: int, misses: int) -> None:
+        label = f"{model_path.name}:{'inverse' if inverse else 'forward'}"
+        with self._lock:
+            row = self.stats["by_model"].setdefault(label, {"hits": 0, "misses": 0})
+            row["hits"] += hits
+            row["misses"] += misses
+            self.stats["hits"] += hits
+            self.stats["misses"] += misses
+
+    def fetch(self, digest: str, inverse: bool, queries: list[str]) -> dict[str, list[str]]:
+        found: dict[str, list[str]] = {}
+        touched: list[tuple[int, int]] = []
+        for start in range(0, len(queries), SQL_BATCH):
+            chunk = queries[start:start + SQL_BATCH]
+            marks = ",".join("?" * len(chunk))
+            rows = self.conn.execute(
+                f"SELECT rowid, query, outputs, used FROM results "
+                f"WHERE model = ? AND inverse = ? AND query IN ({marks})",
+                [digest, int(inverse), *chunk],
+            )
+            for rowid, query, outputs, used in rows:
+                found[query] = json.loads(outputs)
+                if used < self.stamp:
+                    touched.append((self.stamp, rowid))
+        if touched:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.executemany("UPDATE results SET used = ? WHERE rowid = ?", touched)
+            self.conn.execute("COMMIT")
+        return found
+
+    def store(self, digest: str, inverse: bool, results: dict[str, list[str]]) -> None:
+        rows = []
+        added = 0
+        for query, outputs in results.items():
+            encoded = json.dumps(outputs, ensure_ascii=False)
+            size = len(query.encode("utf-8")) + len(encoded.encode("utf-8"))
+            rows.append((digest, int(inverse), query, encoded, size, self.stamp))
+            added += size
+        if not rows:
+            return
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            cursor = conn.executemany(
+                "INSERT OR IGNORE INTO results (model, inverse, query, outputs, size, used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            if cursor.rowcount != len(rows):
+                # Another process stored some of these first; recount exactly.
+                conn.execute(
+                    "UPDATE meta SET value = (SELECT COALESCE(SUM(size), 0) FROM results) "
+                    "WHERE key = 'total_bytes'"
+                )
+            else:
+                conn.execute("UPDATE meta SET value = value + ? WHERE key = 'total_bytes'", (added,))
+            total = conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+            if total > self.max_bytes:
+                self._evict(total)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _evict(self, total: int) -> None:
+        target = int(self.max_bytes * EVICT_TARGET)
+        victims: list[tuple[int]] = []
+        freed = 0
+        for rowid, size in self.conn.execute("SELECT rowid, size FROM results ORDER BY used, rowid"):
+            if total - freed <= target:
+                break
+            victims.append((rowid,))
+            freed += size
+        self.conn.executemany("DELETE FROM results WHERE rowid = ?", victims)
+        self.conn.execute("UPDATE meta SET value = value - ? WHERE key = 'total_bytes'", (freed,))
+        with self._lock:
+            self.stats["evicted_rows"] += len(victims)
+
+    def stream(
+        self, worker: FlookupWorker, queries: Iterable[str], batch_size: int = 5000,
+    ) -> Iterator[tuple[str, list[str]]]:
+        """Like ``FlookupWorker.stream`` but only cache misses reach flookup."""
+        digest = model_digest(worker.model_path)
+        batch: list[str] = []
+
+        def flush() -> Iterator[tuple[str, list[str]]]:
+            distinct = list(dict.fromkeys(batch))
+            known = self.fetch(digest, worker.inverse, distinct)
+            misses = [query for query in distinct if query not in known]
+            if misses:
+                fresh = worker.lookup(misses)
+                self.store(digest, worker.inverse, fresh)
+                known.update(fresh)
+            self._count(worker.model_path, worker.inverse, len(distinct) - len(misses), len(misses))
+            for query in batch:
+                yield query, known[query]
+
+        for query in queries:
+            batch.append(query)
+            if len(batch) >= batch_size:
+                yield from flush()
+                batch = []
+        if batch:
+            yield from flush()
+
+    def summary(self) -> dict[str, object]:
+        conn = self.conn
+        rows = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        total = conn.execute("SELECT value FROM meta WHERE key = 'total_bytes'").fetchone()[0]
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            "path": str(self.path),
+            "max_bytes": self.max_bytes,
+            "stored_rows": rows,
+            "stored_bytes": total,
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else None,
+            "evicted_rows": self.stats["evicted_rows"],
+            "by_model": {k: self.stats["by_model"][k] for k in sorted(self.stats["by_model"])},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            conns = list(self._conns.values()) if self._pid == os.getpid() else []
+            self._conns = {}
+        for conn in conns:
+            conn.close()
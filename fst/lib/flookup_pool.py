@@ -0,0 +1,346 @@
+"""Long-lived ``flookup -b`` workers shared by the Python morphology tooling.
+
+Every script used to start a fresh ``flookup`` for each query chunk, which
+reloads the model from disk each time. This module keeps one worker per
+(model, direction) alive for the life of the process, mirroring the server's
+``spawnFlookupProcess``, and streams batches through it.
+"""
+
+from __future__ import annotations
+
+import atexit
+import os
+import queue
+import shutil
+import subprocess
+import threading
+import time
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+NO_RESULT = "+?"
+# Upper bound on queries written to a worker but not yet read back. The
+# writer blocks once this many are in flight, which bounds memory and keeps
+# both pipes draining.
+DEFAULT_WINDOW = 4096
+WRITE_GROUP = 256
+# Seconds a worker may take to answer one query before it is treated as hung
+# and killed; the first answer also covers loading the model.
+DEFAULT_TIMEOUT = 240.0
+# "flookup" (default) talks to flookup subprocesses; "python" answers from
+# foma_reader's in-process tables instead.
+BACKENDS = ("flookup", "python")
+BACKEND_ENV = "FST_LOOKUP_BACKEND"
+
+
+class FlookupError(RuntimeError):
+    """A flookup worker could not be started or exited mid-batch."""
+
+
+def flookup_available() -> bool:
+    return shutil.which("flookup") is not None
+
+
+class FlookupWorker:
+    """One ``flookup -b`` process serving a single model in one direction.
+
+    flookup answers each input line with one or more ``input<TAB>output``
+    lines followed by a blank line, so results are framed on blank lines.
+    A writer thread feeds stdin while the caller reads stdout, which avoids
+    the pipe deadlock a write-everything-then-read loop would hit. A watchdog
+    kills the process if one answer takes longer than ``timeout`` seconds.
+    """
+
+    def __init__(
+        self, model_path: Path, inverse: bool = False, timeout: float | None = DEFAULT_TIMEOUT,
+    ) -> None:
+        self.model_path = Path(model_path)
+        self.inverse = inverse
+        self.timeout = timeout
+        self._proc: subprocess.Popen[str] | None = None
+        self._lock = threading.Lock()
+        # Set while the reader waits for a frame; read by the watchdog.
+        self._waiting_since: float | None = None
+        self._timed_out = False
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    @property
+    def busy(self) -> bool:
+        """True while a batch is streaming through this worker."""
+        return self._lock.locked()
+
+    def _ensure_started(self) -> subprocess.Popen[str]:
+        if self.alive:
+            return self._proc
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"FST model not found: {self.model_path}")
+        command = ["flookup", "-b"] + (["-i"] if self.inverse else []) + [str(self.model_path)]
+        try:
+            self._proc = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+            )
+        except FileNotFoundError as exc:
+            raise FlookupError("flookup not available on PATH") from exc
+        return self._proc
+
+    def stream(
+        self, queries: Iterable[str], window: int = DEFAULT_WINDOW,
+    ) -> Iterator[tuple[str, list[str]]]:
+        """Yield ``(query, results)`` in input order; ``+?`` misses are dropped."""
+        window = max(window, WRITE_GROUP)
+        with self._lock:
+            proc = self._ensure_started()
+            in_flight: queue.Queue[str | None] = queue.Queue(maxsize=window)
+            stop = threading.Event()
+            writer_error: list[BaseException] = []
+
+            def put(item: str | None) -> bool:
+                while not stop.is_set():
+                    try:
+                        in_flight.put(item, timeout=0.1)
+                        return True
+                    except queue.Full:
+                        continue
+                return False
+
+            def write() -> None:
+                # Every query is queued before it is written, and a group is
+                # never larger than the window, so the oldest queued query has
+                # always been flushed whenever the writer blocks on the queue.
+                group: list[str] = []
+                try:
+                    for item in queries:
+                        if "\n" in item or "\r" in item:
+                            raise ValueError(f"flookup query contains a newline: {item!r}")
+                        if not put(item):
+                            return
+                        if item:
+                            group.append(item)
+                        if len(group) >= WRITE_GROUP:
+                            proc.stdin.write("\n".join(group) + "\n")
+                            proc.stdin.flush()
+                            group.clear()
+                    if group:
+                        proc.stdin.write("\n".join(group) + "\n")
+                        proc.stdin.flush()
+                except BaseException as exc:  # surfaced to the reading side
+                    writer_error.append(exc)
+                finally:
+                    put(None)
+
+            def watch() -> None:
+                while not stop.wait(min(self.timeout, 1.0)):
+                    since = self._waiting_since
+                    if since is not None and time.monotonic() - since > self.timeout:
+                        self._timed_out = True
+                        proc.kill()
+                        return
+
+            self._timed_out = False
+            writer = threading.Thread(target=write, daemon=True)
+            writer.start()
+            watchdog = None
+            if self.timeout:
+                watchdog = threading.Thread(target=watch, daemon=True)
+                watchdog.start()
+            completed = False
+            try:
+                while True:
+                    item = in_flight.get()
+                    if item is None:
+                        break
+                    if not item:
+                        # Empty strings are never sent; they cannot analyze.
+                        yield item, []
+                        continue
+                    yield item, self._read_frame(proc)
+                completed = True
+            finally:
+                stop.set()
+                writer.join()
+                if watchdog is not None:
+                    watchdog.join()
+                if not completed:
+                    # Unread frames would be attributed to the next batch.
+                    self.close()
+            if writer_error:
+                self.close()
+                error = writer_error[0]
+                if isinstance(error, (BrokenPipeError, OSError)):
+                    raise FlookupError(
+                        f"flookup exited while reading {self.model_path.name}"
+                    ) from error
+                raise error
+
+    def _read_frame(self, proc: subprocess.Popen[str]) -> list[str]:
+        results: list[str] = []
+        self._waiting_since = time.monotonic()
+        while True:
+            line = proc.stdout.readline()
+            if not line:
+                self._waiting_since = None
+                if self._timed_out:
+                    raise FlookupError(
+                        f"flookup gave no answer for {self.timeout:g}s on "
+                        f"{self.model_path.name}; the worker was killed"
+                    )
+                raise FlookupError(
+                    f"flookup exited unexpectedly for {self.model_path.name} "
+                    f"(code {proc.poll()})"
+                )
+            line = line.rstrip("\n")
+            if not line:
+                self._waiting_since = None
+                return results
+            if "\t" not in line:
+                continue
+            output = line.split("\t", 1)[1].strip()
+            if output != NO_RESULT:
+                results.append(output)
+
+    def lookup(self, queries: Iterable[str]) -> dict[str, list[str]]:
+        """Return results for each distinct query; every query gets a key."""
+        distinct = list(dict.fromkeys(queries))
+        return dict(self.stream(distinct))
+
+    def close(self) -> None:
+        proc, self._proc = self._proc, None
+        if proc is None:
+            return
+        try:
+            if proc.stdin:
+                proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        if proc.stdout:
+            proc.stdout.close()
+
+
+def default_backend() -> str:
+    backend = os.environ.get(BACKEND_ENV, "flookup").strip().lower() or "flookup"
+    if backend not in BACKENDS:
+        raise ValueError(f"{BACKEND_ENV} must be one of {', '.join(BACKENDS)}, got {backend!r}")
+    return backend
+
+
+class FlookupPool:
+    """Keyed set of workers; one per resolved model path and direction.
+
+    With ``max_workers`` set, adding a worker past the cap closes the least
+    recently used idle ones, e.g. so that each of N pool processes does not
+    keep a flookup per model and direction alive.
+    """
+
+    def __init__(
+        self,
+        backend: str = "flookup",
+        timeout: float | None = DEFAULT_TIMEOUT,
+        max_workers: int | None = None,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"unknown lookup backend {backend!r}")
+        self.backend = backend
+        self.timeout = timeout
+        self.max_workers = max_workers
+        # Insertion order doubles as recency order: a hit moves to the end.
+        self._workers: dict[tuple[str, bool], FlookupWorker] = {}
+        self._lock = threading.Lock()
+
+    def worker(self, model_path: Path, inverse: bool = False) -> FlookupWorker:
+        key = (str(Path(model_path).resolve()), inverse)
+        evicted: list[FlookupWorker] = []
+        with self._lock:
+            worker = self._workers.pop(key, None)
+            if worker is None:
+                if self.backend == "python":
+                    from foma_reader import in_process_worker
+
+                    worker = in_process_worker(Path(model_path), inverse=inverse)
+                else:
+                    worker = FlookupWorker(Path(model_path), inverse=inverse, timeout=self.timeout)
+            if self.max_workers is not None:
+                idle = [k for k, w in self._workers.items() if not getattr(w, "busy", False)]
+                for stale in idle[:max(len(self._workers) + 1 - self.max_workers, 0)]:
+                    evicted.append(self._workers.pop(stale))
+            self._workers[key] = worker
+        for stale_worker in evicted:
+            stale_worker.close()
+        return worker
+
+    def lookup(
+        self, model_path: Path, queries: Iterable[str], inverse: bool = False,
+    ) -> dict[str, list[str]]:
+        return self.worker(model_path, inverse).lookup(queries)
+
+    def analyze(self, model_path: Path, words: Iterable[str]) -> dict[str, list[str]]:
+        """Forward (surface -> analysis) lookup."""
+        return self.lookup(model_path, words, inverse=False)
+
+    def generate(self, model_path: Path, analyses: Iterable[str]) -> dict[str, list[str]]:
+        """Inverse (analysis -> surface) lookup."""
+        return self.lookup(model_path, analyses, inverse=True)
+
+    def release(self, model_path: Path) -> None:
+        """Stop both directions for one model, e.g. once a build step is done."""
+        resolved = str(Path(model_path).resolve())
+        with self._lock:
+            keys = [key for key in self._workers if key[0] == resolved]
+            workers = [self._workers.pop(key) for key in keys]
+        for worker in workers:
+            worker.close()
+
+    def close(self) -> None:
+        with self._lock:
+            workers = list(self._workers.values())
+            self._workers.clear()
+        for worker in workers:
+            worker.close()
+
+    def __enter__(self) -> FlookupPool:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+_shared_pool: FlookupPool | None = None
+_shared_pool_lock = threading.Lock()
+
+
+def shared_pool() -> FlookupPool:
+    """Process-wide pool using the $FST_LOOKUP_BACKEND backend, closed at exit."""
+    global _shared_pool
+    if _shared_pool is None:
+        # First calls can race from executor threads; only one pool may win,
+        # or the loser's workers would never be closed.
+        with _shared_pool_lock:
+            if _shared_pool is None:
+                pool = FlookupPool(default_backend())
+                atexit.register(pool.close)
+                _shared_pool = pool
+    return _shared_pool
+
+
+def lookup(model_path: Path, queries: Iterable[str], inverse: bool = False) -> dict[str, list[str]]:
+    return shared_pool().lookup(model_path, queries, inverse=inverse)
+
+
+def analyze(model_path: Path, words: Iterable[str]) -> dict[str, list[str]]:
+    return shared_pool().analyze(model_path, words)
+
+
+def generate(model_path: Path, analyses: Iterable[str]) -> dict[str, list[str]]:
+    return shared_pool().generate(model_path, analyses)
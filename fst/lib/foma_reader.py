@@ -0,0 +1,342 @@
+"""In-process reader and lookup engine for gzip'd foma ``.fst`` files.
+
+Parses the ``##foma-net 1.0##`` text format that ``save stack`` writes into
+flat ``array`` tables (CSR arc offsets per state plus parallel in/out/target
+columns) and applies the transducer in either direction without spawning
+``flookup``. Results follow flookup conventions: input strings are split into
+symbols by greedy longest match against sigma, and every accepting path
+contributes one output string.
+"""
+
+from __future__ import annotations
+
+import gzip
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from random import Random
+
+from sigma_tokenizer import SigmaTokenizer
+
+EPSILON = 0
+UNKNOWN = 1
+IDENTITY = 2
+SPECIAL_SYMBOLS = {
+    "@_EPSILON_SYMBOL_@": EPSILON,
+    "@_UNKNOWN_SYMBOL_@": UNKNOWN,
+    "@_IDENTITY_SYMBOL_@": IDENTITY,
+}
+# Cap on epsilon steps taken without consuming input; guards against
+# epsilon cycles in nets that are not loop-free.
+MAX_EPSILON_CHAIN = 256
+
+
+class FomaFormatError(ValueError):
+    """The file is not a foma network this reader understands."""
+
+
+class FomaTransducer:
+    """A single foma network held in array-backed state/arc tables."""
+
+    def __init__(
+        self,
+        name: str,
+        sigma: dict[int, str],
+        offsets: array,
+        arc_in: array,
+        arc_out: array,
+        arc_target: array,
+        final: bytearray,
+        start_state: int = 0,
+    ) -> None:
+        self.name = name
+        self.sigma = sigma
+        self.offsets = offsets
+        self.arc_in = arc_in
+        self.arc_out = arc_out
+        self.arc_target = arc_target
+        self.final = final
+        self.start_state = start_state
+        self.symbol_ids = {symbol: num for num, symbol in sigma.items() if num not in SPECIAL_SYMBOLS.values()}
+        self.tokenizer = SigmaTokenizer(self.symbol_ids)
+        # Per direction, arcs of each state are ordered by the matched symbol
+        # so lookups bisect instead of scanning every arc. foma stores arcs as
+        # upper (analysis) : lower (surface); forward lookup is flookup's
+        # default "apply up", which matches the lower side.
+        self._order = {False: self._sorted_arcs(arc_out), True: self._sorted_arcs(arc_in)}
+
+    @property
+    def state_count(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def arc_count(self) -> int:
+        return len(self.arc_in)
+
+    def _sorted_arcs(self, keys: array) -> tuple[array, array]:
+        order = array("l")
+        sorted_keys = array("l")
+        offsets = self.offsets
+        for state in range(self.state_count):
+            lo, hi = offsets[state], offsets[state + 1]
+            arcs = sorted(range(lo, hi), key=keys.__getitem__)
+            order.extend(arcs)
+            sorted_keys.extend(keys[arc] for arc in arcs)
+        return order, sorted_keys
+
+    @classmethod
+    def load(cls, path: Path) -> FomaTransducer:
+        path = Path(path)
+        opener = gzip.open if _is_gzip(path) else open
+        with opener(path, "rt", encoding="utf-8") as f:
+            return cls._parse(path.name, f)
+
+    @classmethod
+    def _parse(cls, name: str, lines: Iterable[str]) -> FomaTransducer:
+        lines = iter(lines)
+        header = next(lines, "").rstrip("\n")
+        if header != "##foma-net 1.0##":
+            raise FomaFormatError(f"{name}: not a foma-net 1.0 file")
+        section = ""
+        props: list[str] = []
+        sigma: dict[int, str] = {}
+        offsets = array("l", [0])
+        arc_in = array("l")
+        arc_out = array("l")
+        arc_target = array("l")
+        final = bytearray()
+        current = -1
+        for raw in lines:
+            line = raw.rstrip("\n")
+            if line.startswith("##") and line.endswith("##"):
+                section = line
+                if section == "##end##":
+                    break
+                continue
+            if section == "##props##":
+                props = line.split()
+            elif section == "##sigma##":
+                num, _, symbol = line.partition(" ")
+                sigma[int(num)] = symbol
+            elif section == "##states##":
+                fields = [int(field) for field in line.split()]
+                if len(fields) == 5 and fields[0] == -1:
+                    continue
+                if len(fields) in (4, 5):
+                    state = fields[0]
+                    if state != current + 1:
+                        raise FomaFormatError(f"{name}: states are not numbered consecutively at {state}")
+                    if current >= 0:
+                        offsets.append(len(arc_in))
+                    current = state
+                    if len(fields) == 4:
+                        symbol_in, target, is_final = fields[1], fields[2], fields[3]
+                        symbol_out = symbol_in
+                    else:
+                        symbol_in, symbol_out, target, is_final = fields[1:]
+                    final.append(1 if is_final == 1 else 0)
+                elif len(fields) == 3:
+                    symbol_in, symbol_out, target = fields
+                elif len(fields) == 2:
+                    symbol_in, target = fields
+                    symbol_out = symbol_in
+                else:
+                    raise FomaFormatError(f"{name}: malformed state line {line!r}")
+                if target != -1:
+                    arc_in.append(symbol_in)
+                    arc_out.append(symbol_out)
+                    arc_target.append(target)
+        if section != "##end##":
+            raise FomaFormatError(f"{name}: missing ##end## marker")
+        if current < 0:
+            raise FomaFormatError(f"{name}: network has no states")
+        offsets.append(len(arc_in))
+        if props and int(props[0]) not in (1, 2):
+            raise FomaFormatError(f"{name}: unsupported arity {props[0]}")
+        return cls(name, sigma, offsets, arc_in, arc_out, arc_target, final)
+
+    def tokenize(self, text: str) -> list[tuple[int, str]] | None:
+        """Greedy longest-match split of ``text`` into (symbol id, token) pairs.
+
+        Characters outside sigma become IDENTITY tokens, as in foma's apply.
+        """
+        symbol_ids = self.symbol_ids
+        return [(symbol_ids.get(piece, IDENTITY), piece) for piece in self.tokenizer.split(text)]
+
+    def lookup(self, text: str, inverse: bool = False) -> list[str]:
+        """All outputs for one input; forward is surface -> analysis."""
+        if not text:
+            return []
+        tokens = self.tokenize(text)
+        order, keys = self._order[inverse]
+        emit_col = self.arc_out if inverse else self.arc_in
+        offsets = self.offsets
+        targets = self.arc_target
+        final = self.final
+        sigma = self.sigma
+        total = len(tokens)
+        results: list[str] = []
+
+        def emit(symbol: int, token: str) -> str:
+            if symbol == EPSILON:
+                return ""
+            if symbol == IDENTITY or symbol == UNKNOWN:
+                return token
+            return sigma[symbol]
+
+        # Depth-first over (state, position, output pieces, epsilon chain).
+        stack: list[tuple[int, int, tuple[str, ...], int]] = [(self.start_state, 0, (), 0)]
+        while stack:
+            state, position, pieces, chain = stack.pop()
+            if position == total and final[state]:
+                results.append("".join(pieces))
+            lo, hi = offsets[state], offsets[state + 1]
+            if lo == hi:
+                continue
+            branches: list[tuple[int, int, tuple[str, ...], int]] = []
+            if chain < MAX_EPSILON_CHAIN:
+                start = bisect_left(keys, EPSILON, lo, hi)
+                stop = bisect_right(keys, EPSILON, start, hi)
+                for index in range(start, stop):
+                    arc = order[index]
+                    branches.append((targets[arc], position, pieces + (emit(emit_col[arc], ""),), chain + 1))
+            if position < total:
+                symbol, token = tokens[position]
+                candidates = (symbol,) if symbol != IDENTITY else (IDENTITY, UNKNOWN)
+                for wanted in candidates:
+                    start = bisect_left(keys, wanted, lo, hi)
+                    stop = bisect_right(keys, wanted, start, hi)
+                    for index in range(start, stop):
+                        arc = order[index]
+                        out_symbol = emit_col[arc]
+                        if wanted == IDENTITY and out_symbol != IDENTITY:
+                            continue
+                        branches.append((targets[arc], position + 1, pieces + (emit(out_symbol, token),), 0))
+            # Reverse so arcs are explored in table order.
+            stack.extend(reversed(branches))
+        return results
+
+    def stream(self, queries: Iterable[str], inverse: bool = False) -> Iterator[tuple[str, list[str]]]:
+        """Same contract as ``FlookupWorker.stream``."""
+        for query in queries:
+            if "\n" in query or "\r" in query:
+                raise ValueError(f"lookup query contains a newline: {query!r}")
+            yield query, self.lookup(query, inverse=inverse)
+
+    def apply_batch(self, queries: Iterable[str], inverse: bool = False) -> dict[str, list[str]]:
+        """Results for each distinct query; every query gets a key."""
+        return dict(self.stream(dict.fromkeys(queries), inverse=inverse))
+
+    def analyze(self, words: Iterable[str]) -> dict[str, list[str]]:
+        return self.apply_batch(words, inverse=False)
+
+    def generate(self, analyses: Iterable[str]) -> dict[str, list[str]]:
+        return self.apply_batch(analyses, inverse=True)
+
+    def random_lower(self, count: int, seed: int = 0, max_length: int = 64) -> list[str]:
+        """Up to ``count`` distinct surfaces from random accepting paths (like foma's random-lower).
+
+        Arcs with identity/unknown symbols are not taken, so every string is
+        spelled with sigma symbols.
+        """
+        rng = Random(seed)
+        offsets, arc_out, targets, final, sigma = self.offsets, self.arc_out, self.arc_target, self.final, self.sigma
+        words: dict[str, None] = {}
+        for _ in range(count * 4):
+            if len(words) >= count:
+                break
+            state = self.start_state
+            pieces: list[str] = []
+            for _ in range(max_length):
+                arcs = [arc for arc in range(offsets[state], offsets[state + 1]) if arc_out[arc] not in (IDENTITY, UNKNOWN)]
+                if final[state] and (not arcs or rng.random() < 0.25):
+                    if pieces:
+                        words["".join(pieces)] = None
+                    break
+                if not arcs:
+                    break
+                arc = rng.choice(arcs)
+                if arc_out[arc] != EPSILON:
+                    pieces.append(sigma[arc_out[arc]])
+                state = targets[arc]
+        return list(words)
+
+
+class InProcessWorker:
+    """Adapter exposing a loaded transducer through the FlookupWorker API."""
+
+    def __init__(self, transducer: FomaTransducer, model_path: Path, inverse: bool) -> None:
+        self.transducer = transducer
+        self.model_path = Path(model_path)
+        self.inverse = inverse
+
+    def stream(self, queries: Iterable[str], window: int = 0) -> Iterator[tuple[str, list[str]]]:
+        return self.transducer.stream(queries, inverse=self.inverse)
+
+    def lookup(self, queries: Iterable[str]) -> dict[str, list[str]]:
+        return self.transducer.apply_batch(queries, inverse=self.inverse)
+
+    def close(self) -> None:
+        """Nothing to stop; tables stay cached for the process."""
+
+
+_loaded: dict[tuple[str, int, int], FomaTransducer] = {}
+_loaded_lock = threading.Lock()
+
+
+def load_transducer(path: Path) -> FomaTransducer:
+    """Load once per process, keyed on (path, mtime, size); safe to call from threads."""
+    path = Path(path)
+    stat = path.stat()
+    key = (str(path.resolve()), stat.st_mtime_ns, stat.st_size)
+    # One lock for all models: loads are rare and parsing holds the GIL anyway,
+    # and it keeps two threads from parsing the same large file twice.
+    with _loaded_lock:
+        transducer = _loaded.get(key)
+        if transducer is None:
+            transducer = FomaTransducer.load(path)
+            _loaded[key] = transducer
+    return transducer
+
+
+def in_process_worker(path: Path, inverse: bool = False) -> InProcessWorker:
+    return InProcessWorker(load_transducer(path), path, inverse)
+
+
+def read_header(path: Path) -> dict[str, object]:
+    """Size counts and sigma from a foma-net file's header, without its state table."""
+    path = Path(path)
+    opener = gzip.open if _is_gzip(path) else open
+    section = ""
+    props: list[str] = []
+    sigma: list[str] = []
+    with opener(path, "rt", encoding="utf-8") as f:
+        if f.readline().rstrip("\n") != "##foma-net 1.0##":
+            raise FomaFormatError(f"{path.name}: not a foma-net 1.0 file")
+        for raw in f:
+            line = raw.rstrip("\n")
+            if line.startswith("##") and line.endswith("##"):
+                section = line
+                if section in ("##states##", "##end##"):
+                    break
+            elif section == "##props##":
+                props = line.split()
+            elif section == "##sigma##":
+                sigma.append(line.partition(" ")[2])
+    if len(props) < 6:
+        raise FomaFormatError(f"{path.name}: missing props line")
+    return {
+        "arity": int(props[0]),
+        "arcs": int(props[1]),
+        "states": int(props[2]),
+        "final_states": int(props[4]),
+        "paths": int(props[5]),
+        "sigma": [symbol for symbol in sigma if symbol not in SPECIAL_SYMBOLS],
+    }
+
+
+def _is_gzip(path: Path) -> bool:
+    with path.open("rb") as f:
+        return f.read(2) == b"\x1f\x8b"
@@ -0,0 +1,221 @@
+"""Parsed lexc sources, indexed once per file content.
+
+The auxiliary builder and the form generator both read the verb lexc files
+for the same facts: the ``lexical continuation ;`` entries, the analysis tags
+each lexicon contributes, the epsilon (``0``) continuation graph between
+lexicons and the tag closure reachable from a continuation. ``load`` parses a
+file into a ``LexcIndex`` holding all of these, memoizes it for the life of
+the process and persists it as JSON keyed by the file's sha256, so an
+unchanged source is never parsed twice. The on-disk cache keeps the
+``CACHE_KEEP`` most recently used files.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import defaultdict
+from pathlib import Path
+from typing import NamedTuple
+
+# Bump when the parse changes; older cache files are then ignored.
+FORMAT = 1
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "build" / ".cache" / "lexc-index"
+# A build reads about eight lexc files, so this holds a few source sets.
+CACHE_KEEP = 32
+
+
+class LexcEntry(NamedTuple):
+    section: str
+    lexical: str
+    continuation: str
+
+    @property
+    def lemma(self) -> str:
+        return self.lexical.split(":", 1)[0].replace("%=", "=").strip()
+
+
+class LexcIndex:
+    def __init__(
+        self,
+        digest: str,
+        entries: tuple[LexcEntry, ...],
+        terminals: tuple[tuple[str, str], ...],
+        section_tags: dict[str, tuple[str, ...]],
+        closures: dict[str, tuple[str, ...]],
+    ) -> None:
+        self.digest = digest
+        # Every ``lexical continuation ;`` line.
+        self.entries = entries
+        # (lexicon, relation) for every line ending in ``#;``.
+        self.terminals = terminals
+        # Analysis tags (lexical side of ``+...`` lines) each lexicon declares.
+        self.section_tags = section_tags
+        # Tags reachable from each continuation an entry uses, following
+        # epsilon entries.
+        self.closures = closures
+
+    def tags(self, section: str) -> tuple[str, ...]:
+        return self.section_tags.get(section, ())
+
+    def resolved_tags(self, continuation: str) -> tuple[str, ...]:
+        closure = self.closures.get(continuation)
+        if closure is None:
+            closure = _closure(continuation, self.section_tags, _epsilon_edges(self.entries))
+            self.closures[continuation] = closure
+        return closure
+
+    def to_json(self) -> dict[str, object]:
+        return {
+            "format": FORMAT,
+            "digest": self.digest,
+            "entries": self.entries,
+            "terminals": [list(terminal) for terminal in self.terminals],
+            "section_tags": {section: list(tags) for section, tags in self.section_tags.items()},
+            "closures": {continuation: list(tags) for continuation, tags in self.closures.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict[str, object]) -> LexcIndex:
+        return cls(
+            data["digest"],
+            tuple(LexcEntry._make(entry) for entry in data["entries"]),
+            tuple(tuple(terminal) for terminal in data["terminals"]),
+            {section: tuple(tags) for section, tags in data["section_tags"].items()},
+            {continuation: tuple(tags) for continuation, tags in data["closures"].items()},
+        )
+
+
+def _epsilon_edges(entries: tuple[LexcEntry, ...]) -> dict[str, set[str]]:
+    edges: dict[str, set[str]] = defaultdict(set)
+    for entry in entries:
+        if entry.lemma == "0":
+            edges[entry.section].add(entry.continuation)
+    return edges
+
+
+def _closure(
+    continuation: str, section_tags: dict[str, tuple[str, ...]], edges: dict[str, set[str]],
+) -> tuple[str, ...]:
+    tags: set[str] = set()
+    seen: set[str] = set()
+    pending = [continuation]
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        tags.update(section_tags.get(current, ()))
+        pending.extend(edges.get(current, ()))
+    return tuple(sorted(tags))
+
+
+def parse(text: str, digest: str = "") -> LexcIndex:
+    section = ""
+    entries: list[LexcEntry] = []
+    terminals: list[tuple[str, str]] = []
+    section_tags: dict[str, set[str]] = defaultdict(set)
+    for raw in text.splitlines():
+        stripped = raw.strip()
+        if stripped.startswith("LEXICON "):
+            section = stripped.split(None, 1)[1].strip()
+            continue
+        body = raw.split("!", 1)[0].strip()
+        if not section or not body:
+            continue
+        if body.startswith("+"):
+            section_tags[section].add(body.split(":", 1)[0].replace("%=", "=").strip().rstrip("#"))
+        if not body.endswith(";"):
+            continue
+        if body.endswith("#;"):
+            terminals.append((section, body[:-2].strip()))
+        parts = body[:-1].strip().rsplit(None, 1)
+        if len(parts) == 2:
+            entries.append(LexcEntry(section, parts[0], parts[1]))
+
+    entry_tuple = tuple(entries)
+    tags = {name: tuple(sorted(values)) for name, values in section_tags.items()}
+    edges = _epsilon_edges(entry_tuple)
+    closures = {
+        continuation: _closure(continuation, tags, edges)
+        for continuation in sorted({e.continuation for e in entry_tuple if e.lemma != "0"})
+    }
+    return LexcIndex(digest, entry_tuple, tuple(terminals), tags, closures)
+
+
+_memo: dict[str, LexcIndex] = {}
+_stamps: dict[Path, tuple[int, int, str]] = {}
+_lock = threading.Lock()
+
+
+def load(path: Path, cache_dir: Path | None = DEFAULT_CACHE_DIR) -> LexcIndex:
+    """The index of ``path``, from memory, the on-disk cache or a fresh parse.
+
+    Pass ``cache_dir=None`` to skip the on-disk cache.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    with _lock:
+        stamp = _stamps.get(path)
+        if stamp is not None and stamp[:2] == (stat.st_mtime_ns, stat.st_size):
+            return _memo[stamp[2]]
+
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    with _lock:
+        index = _memo.get(digest)
+    if index is None:
+        cached = cache_dir / f"{digest}.json" if cache_dir is not None else None
+        index = _read_cache(cached, digest) if cached is not None else None
+        if index is None:
+            index = parse(data.decode("utf-8", errors="replace"), digest)
+            if cached is not None:
+                _write_cache(cached, index)
+                _prune_cache(cache_dir)
+    with _lock:
+        _memo.setdefault(digest, index)
+        _stamps[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return _memo[digest]
+
+
+def _read_cache(path: Path, digest: str) -> LexcIndex | None:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if data.get("format") != FORMAT or data.get("digest") != digest:
+        return None
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+    return LexcIndex.from_json(data)
+
+
+def _write_cache(path: Path, index: LexcIndex) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        temporary.write_text(
+            json.dumps(index.to_json(), ensure_ascii=False, separators=(",", ":")), encoding="utf-8",
+        )
+        os.replace(temporary, path)
+    except OSError:
+        # A read-only checkout still works; it just parses every time.
+        pass
+
+
+def _prune_cache(cache_dir: Path, keep: int = CACHE_KEEP) -> None:
+    """Drop all but the ``keep`` most recently used cache files."""
+    entries = []
+    for entry in cache_dir.glob("*.json"):
+        try:
+            entries.append((entry.stat().st_mtime, entry))
+        except FileNotFoundError:
+            continue
+    entries.sort(reverse=True)
+    for _, stale in entries[keep:]:
+        # Another build may be pruning the same directory.
+        stale.unlink(missing_ok=True)
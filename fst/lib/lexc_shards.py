@@ -0,0 +1,133 @@
+"""Partition a lexc source into shards whose compiled nets union to the whole.
+
+Lexc compiles to the union of every path through its continuation graph, and
+the rewrite rules a foma script composes after ``read lexc`` distribute over
+that union. So if some lexicons are never both on one path (none reaches
+another, or itself), each shard can keep every line of the source but only a
+subset of those lexicons' entries: every path lives in exactly the shard
+holding the one split entry it uses (or in all shards when it uses none), and
+the union of the compiled shards is the monolithic network.
+
+Entries of the split lexicons are grouped by lexicon and initial letter, and
+the groups are packed into shards largest first so entry counts stay even.
+"""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+from typing import NamedTuple
+
+_UNESCAPED_BANG = re.compile(r"(?<!%)!")
+_UNESCAPED_SEMICOLON = re.compile(r"(?<!%);")
+
+
+class LexcLexicon(NamedTuple):
+    name: str
+    # (line index, comment-free body) of every line inside the lexicon that carries content.
+    entries: list[tuple[int, str]]
+    continuations: set[str]
+    # Every entry is a single ``... Continuation ;`` line, so entries can be dropped one by one.
+    line_entries: bool
+
+
+class LexcShard(NamedTuple):
+    path: Path
+    entries: int
+    # (lexicon, initial letter) groups of split entries this shard holds.
+    groups: list[tuple[str, str]]
+
+
+def _body(line: str) -> str:
+    return _UNESCAPED_BANG.split(line, 1)[0].strip()
+
+
+def parse_lexicons(lines: list[str]) -> dict[str, LexcLexicon]:
+    lexicons: dict[str, LexcLexicon] = {}
+    current: LexcLexicon | None = None
+    for index, line in enumerate(lines):
+        body = _body(line)
+        if body.startswith("LEXICON "):
+            name = body.split(None, 1)[1].strip()
+            current = lexicons.setdefault(name, LexcLexicon(name, [], set(), True))
+            continue
+        if body == "END":
+            break
+        if current is None or not body:
+            continue
+        current.entries.append((index, body))
+        if len(_UNESCAPED_SEMICOLON.findall(body)) != 1 or not body.endswith(";"):
+            lexicons[current.name] = current = current._replace(line_entries=False)
+        for entry in _UNESCAPED_SEMICOLON.split(body):
+            words = entry.split()
+            if words:
+                current.continuations.add(words[-1])
+    return lexicons
+
+
+def _reachable(lexicons: dict[str, LexcLexicon]) -> dict[str, set[str]]:
+    """Lexicons reachable (in one or more steps) from each lexicon."""
+    reach: dict[str, set[str]] = {}
+    for name in lexicons:
+        seen: set[str] = set()
+        stack = [c for c in lexicons[name].continuations if c in lexicons]
+        while stack:
+            target = stack.pop()
+            if target in seen:
+                continue
+            seen.add(target)
+            stack.extend(c for c in lexicons[target].continuations if c in lexicons and c not in seen)
+        reach[name] = seen
+    return reach
+
+
+def split_lexicons(lexicons: dict[str, LexcLexicon]) -> list[str]:
+    """Largest lexicons that no path can visit twice or together with another chosen one."""
+    reach = _reachable(lexicons)
+    chosen: list[str] = []
+    for name in sorted(lexicons, key=lambda n: (-len(lexicons[n].entries), n)):
+        lexicon = lexicons[name]
+        if not lexicon.entries or not lexicon.line_entries or name in reach[name]:
+            continue
+        if any(name in reach[other] or other in reach[name] for other in chosen):
+            continue
+        chosen.append(name)
+    return chosen
+
+
+def _initial(body: str) -> str:
+    return body[1] if body.startswith("%") and len(body) > 1 else body[0]
+
+
+def write_shards(lexc_path: Path, count: int, out_dir: Path) -> list[LexcShard]:
+    """Write ``count`` shard copies of ``lexc_path`` to ``out_dir``; returns them in order."""
+    if count < 2:
+        raise ValueError(f"need at least two shards, got {count}")
+    lines = lexc_path.read_text(encoding="utf-8").splitlines(keepends=True)
+    lexicons = parse_lexicons(lines)
+    chosen = split_lexicons(lexicons)
+    if not chosen:
+        raise ValueError(f"{lexc_path.name} has no lexicon that can be split into shards")
+
+    groups: dict[tuple[str, str], list[int]] = {}
+    for name in chosen:
+        for index, body in lexicons[name].entries:
+            groups.setdefault((name, _initial(body)), []).append(index)
+    loads = [0] * count
+    members: list[list[tuple[str, str]]] = [[] for _ in range(count)]
+    owner: dict[int, int] = {}
+    for group in sorted(groups, key=lambda g: (-len(groups[g]), g)):
+        shard = loads.index(min(loads))
+        loads[shard] += len(groups[group])
+        members[shard].append(group)
+        for index in groups[group]:
+            owner[index] = shard
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    shards: list[LexcShard] = []
+    for shard in range(count):
+        path = out_dir / f"{lexc_path.stem}.shard{shard}{lexc_path.suffix}"
+        with path.open("w", encoding="utf-8") as f:
+            f.writelines(line for index, line in enumerate(lines) if owner.get(index, shard) == shard)
+        shards.append(LexcShard(path, loads[shard], sorted(members[shard])))
+    return shards
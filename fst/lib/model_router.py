@@ -0,0 +1,92 @@
+"""Route surface words to the runtime models that can analyze them.
+
+``build_fsts.py`` emits ``any-model.fst``: the union, over every runtime
+model, of ``[tag .x. model.l]`` where the tag is a single multichar symbol
+naming the model file. A forward lookup of a surface therefore returns the
+names of exactly the models whose lower side accepts it, so one lookup
+rejects an unknown word and a known one is sent only to its owning models.
+The ``any-model.json`` sidecar fixes the bit order and records the sha256 of
+every model the router was built from; a router whose sources no longer match
+the models beside it is ignored.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from flookup_cache import model_digest
+from flookup_pool import FlookupPool, shared_pool
+
+ROUTER_FILE = "any-model.fst"
+ROUTER_SIDECAR = "any-model.json"
+ROUTER_SCHEMA = 1
+TAG_FORMAT = "model-file-symbol"
+
+
+def router_sidecar(router_path: Path, models: Mapping[str, Path]) -> dict[str, object]:
+    """Sidecar payload for a router built from ``models`` in the given order."""
+    return {
+        "schema_version": ROUTER_SCHEMA,
+        "file": router_path.name,
+        "sha256": model_digest(router_path),
+        "tag_format": TAG_FORMAT,
+        "bits": [
+            {"bit": bit, "model": name, "sha256": model_digest(path)}
+            for bit, (name, path) in enumerate(models.items())
+        ],
+    }
+
+
+class ModelRouter:
+    """A verified router plus the bit order from its sidecar."""
+
+    def __init__(self, path: Path, models: list[str], pool: FlookupPool | None = None) -> None:
+        self.path = Path(path)
+        self.models = models
+        self.bits = {name: bit for bit, name in enumerate(models)}
+        self._pool = pool
+
+    @property
+    def pool(self) -> FlookupPool:
+        return self._pool if self._pool is not None else shared_pool()
+
+    def owners(self, words: Iterable[str]) -> dict[str, list[str]]:
+        """Owning models per distinct word, in sidecar bit order; [] if none."""
+        found = self.pool.analyze(self.path, words)
+        return {
+            word: sorted((tag for tag in tags if tag in self.bits), key=self.bits.__getitem__)
+            for word, tags in found.items()
+        }
+
+    def bitmask(self, models: Iterable[str]) -> int:
+        mask = 0
+        for name in models:
+            mask |= 1 << self.bits[name]
+        return mask
+
+
+def load_router(model_dir: Path, pool: FlookupPool | None = None) -> ModelRouter | None:
+    """Router in ``model_dir``, or None if absent or built from other models."""
+    model_dir = Path(model_dir)
+    router_path = model_dir / ROUTER_FILE
+    sidecar_path = model_dir / ROUTER_SIDECAR
+    if not router_path.exists() or not sidecar_path.exists():
+        return None
+    try:
+        sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return None
+    if sidecar.get("schema_version") != ROUTER_SCHEMA or sidecar.get("tag_format") != TAG_FORMAT:
+        return None
+    if sidecar.get("sha256") != model_digest(router_path):
+        return None
+    bits = sorted(sidecar.get("bits", []), key=lambda row: row["bit"])
+    if [row["bit"] for row in bits] != list(range(len(bits))):
+        return None
+    for row in bits:
+        model_path = model_dir / row["model"]
+        if not model_path.exists() or model_digest(model_path) != row["sha256"]:
+            return None
+    return ModelRouter(router_path, [row["model"] for row in bits], pool=pool)
@@ -0,0 +1,383 @@
+"""In-process application of ordered unified-diff patch stacks.
+
+Replaces one ``git apply --check`` plus one ``git apply`` subprocess per
+patch. The whole stack is applied to an in-memory tree of the files it
+touches and written back once; nothing is written if any hunk fails. Matching
+follows ``git apply`` without fuzz: a hunk's preimage (context and removed
+lines) must match exactly, searched outward from the line its header names.
+
+With a cache directory, the touched files are snapshotted under a chain
+digest (base key, then each patch's sha256 in order), so a stack that only
+gained patches at the end restores the longest cached prefix and replays
+just the new ones.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections.abc import Sequence
+from pathlib import Path, PurePosixPath
+from typing import NamedTuple
+
+DEV_NULL = "/dev/null"
+# Prefix states are also snapshotted every this many patches, so editing a
+# patch in the middle of a long stack does not replay it from the start.
+CHECKPOINT_EVERY = 32
+# States kept by prune() beyond those used since the current build started.
+DEFAULT_KEEP_STATES = 24
+
+
+class PatchError(RuntimeError):
+    """A patch is malformed or a hunk does not apply to the current tree."""
+
+
+class Hunk(NamedTuple):
+    header: str
+    old_start: int
+    old_count: int
+    new_start: int
+    new_count: int
+    old_lines: list[str]
+    new_lines: list[str]
+    # False when a ``\ No newline at end of file`` marker follows that
+    # side's last line.
+    old_final_newline: bool = True
+    new_final_newline: bool = True
+
+
+class FilePatch(NamedTuple):
+    old_path: str
+    new_path: str
+    hunks: list[Hunk]
+
+
+def _header_path(value: str) -> str:
+    path = value.split("\t", 1)[0].strip()
+    if path == DEV_NULL:
+        return path
+    if path.startswith(("a/", "b/")):
+        path = path[2:]
+    pure = PurePosixPath(path)
+    if pure.is_absolute() or ".." in pure.parts:
+        raise PatchError(f"unsafe path in patch header: {value!r}")
+    return path
+
+
+def _hunk_range(value: str) -> tuple[int, int]:
+    start, _, count = value.partition(",")
+    return int(start), int(count) if count else 1
+
+
+def parse_patch(text: str, name: str = "<patch>") -> list[FilePatch]:
+    """Split a unified diff into per-file hunk lists; git headers are skipped."""
+    lines = text.split("\n")
+    if lines and lines[-1] == "":
+        lines.pop()
+    patches: list[FilePatch] = []
+    index = 0
+    while index < len(lines):
+        line = lines[index]
+        if not line.startswith("--- ") or index + 1 >= len(lines) or not lines[index + 1].startswith("+++ "):
+            index += 1
+            continue
+        old_path = _header_path(line[4:])
+        new_path = _header_path(lines[index + 1][4:])
+        index += 2
+        hunks: list[Hunk] = []
+        while index < len(lines) and lines[index].startswith("@@ "):
+            header = lines[index]
+            try:
+                ranges = header.split("@@")[1].split()
+                old_start, old_count = _hunk_range(ranges[0][1:])
+                new_start, new_count = _hunk_range(ranges[1][1:])
+            except (IndexError, ValueError) as exc:
+                raise PatchError(f"{name}:{index + 1}: malformed hunk header {header!r}") from exc
+            index += 1
+            old_lines: list[str] = []
+            new_lines: list[str] = []
+            newline = {" ": True, "-": True, "+": True}
+            tag = ""
+            while len(old_lines) < old_count or len(new_lines) < new_count or (
+                index < len(lines) and lines[index].startswith("\\")
+            ):
+                if index >= len(lines):
+                    raise PatchError(f"{name}: hunk {header!r} is truncated")
+                body = lines[index]
+                if body.startswith("\\"):
+                    # Applies to the line just read: its side(s) end without a newline.
+                    if tag in ("-", " "):
+                        newline["-"] = False
+                    if tag in ("+", " "):
+                        newline["+"] = False
+                    index += 1
+                    continue
+                tag, content = body[:1] or " ", body[1:]
+                if tag == " ":
+                    old_lines.append(content)
+                    new_lines.append(content)
+                elif tag == "-":
+                    old_lines.append(content)
+                elif tag == "+":
+                    new_lines.append(content)
+                else:
+                    raise PatchError(f"{name}:{index + 1}: unexpected line in hunk {header!r}: {body!r}")
+                index += 1
+            if len(old_lines) != old_count or len(new_lines) != new_count:
+                raise PatchError(f"{name}: hunk {header!r} line counts do not match its header")
+            hunks.append(Hunk(
+                header, old_start, old_count, new_start, new_count, old_lines, new_lines,
+                newline["-"], newline["+"],
+            ))
+        if not hunks:
+            raise PatchError(f"{name}: no hunks for {new_path}")
+        patches.append(FilePatch(old_path, new_path, hunks))
+    if not patches:
+        raise PatchError(f"{name}: not a unified diff")
+    return patches
+
+
+def _find_preimage(image: list[str], old_lines: list[str], estimate: int) -> int:
+    """Nearest position to ``estimate`` where ``old_lines`` match, or -1."""
+    span = len(old_lines)
+    limit = len(image) - span
+    if limit < 0:
+        return -1
+    if not old_lines:
+        return min(max(estimate, 0), len(image))
+    first = old_lines[0]
+    estimate = min(max(estimate, 0), limit)
+    for distance in range(0, max(estimate, limit - estimate) + 1):
+        for pos in (estimate - distance, estimate + distance) if distance else (estimate,):
+            if 0 <= pos <= limit and image[pos] == first and image[pos:pos + span] == old_lines:
+                return pos
+    return -1
+
+
+def _mismatch(image: list[str], old_lines: list[str], estimate: int) -> str:
+    """Describe the first preimage line that differs at the header position."""
+    for offset, expected in enumerate(old_lines):
+        position = estimate + offset
+        if position >= len(image):
+            return f"line {position + 1}: expected {expected!r}, found end of file"
+        if image[position] != expected:
+            return f"line {position + 1}: expected {expected!r}, found {image[position]!r}"
+    return f"line {estimate + 1}: preimage not found"
+
+
+class FileImage:
+    """One file held as lines, with its trailing-newline state."""
+
+    def __init__(self, lines: list[str], final_newline: bool = True) -> None:
+        self.lines = lines
+        self.final_newline = final_newline
+
+    @classmethod
+    def read(cls, path: Path) -> FileImage:
+        text = path.read_bytes().decode("utf-8", errors="surrogateescape")
+        lines = text.split("\n")
+        final_newline = lines[-1] == ""
+        if final_newline:
+            lines.pop()
+        return cls(lines, final_newline)
+
+    def write(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        text = "\n".join(self.lines) + ("\n" if self.final_newline and self.lines else "")
+        path.write_bytes(text.encode("utf-8", errors="surrogateescape"))
+
+
+class PatchTree:
+    """Lazily loaded in-memory view of the files a patch stack touches."""
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        self.files: dict[str, FileImage | None] = {}
+
+    def get(self, rel: str) -> FileImage | None:
+        if rel not in self.files:
+            path = self.root / rel
+            self.files[rel] = FileImage.read(path) if path.is_file() else None
+        return self.files[rel]
+
+    def apply(self, patch_name: str, text: str) -> None:
+        """Apply one patch; raises PatchError naming the first failing hunk."""
+        staged: dict[str, FileImage | None] = {}
+        for file_patch in parse_patch(text, patch_name):
+            source = file_patch.new_path if file_patch.old_path == DEV_NULL else file_patch.old_path
+            current = staged[source] if source in staged else self.get(source)
+            if file_patch.old_path == DEV_NULL:
+                if current is not None:
+                    raise PatchError(f"{patch_name}: {source} already exists")
+                image = FileImage([])
+            elif current is None:
+                raise PatchError(f"{patch_name}: {source} does not exist")
+            else:
+                image = FileImage(list(current.lines), current.final_newline)
+            for number, hunk in enumerate(file_patch.hunks, start=1):
+                # Earlier hunks are already applied, so the new-side start is
+                # where this preimage should sit (as in git's find_pos).
+                estimate = max(hunk.new_start - 1, 0)
+                position = _find_preimage(image.lines, hunk.old_lines, estimate)
+                if position < 0:
+                    raise PatchError(
+                        f"{patch_name}: hunk {number} of {source} ({hunk.header}) does not apply; "
+                        f"{_mismatch(image.lines, hunk.old_lines, estimate)}"
+                    )
+                at_end = position + len(hunk.old_lines) == len(image.lines)
+                if at_end and hunk.old_lines and hunk.old_final_newline != image.final_newline:
+                    raise PatchError(
+                        f"{patch_name}: hunk {number} of {source} ({hunk.header}) does not apply; "
+                        "the end-of-file newline differs"
+                    )
+                image.lines[position:position + len(hunk.old_lines)] = hunk.new_lines
+                if at_end:
+                    image.final_newline = hunk.new_final_newline
+            if file_patch.new_path == DEV_NULL:
+                staged[source] = None
+            else:
+                staged[file_patch.new_path] = image
+                if file_patch.new_path != source:
+                    staged[source] = None
+        self.files.update(staged)
+
+    def write(self) -> list[str]:
+        """Write every loaded file back under root; returns the paths touched."""
+        for rel, image in self.files.items():
+            path = self.root / rel
+            if image is None:
+                if path.exists():
+                    path.unlink()
+            else:
+                image.write(path)
+        return sorted(self.files)
+
+
+def chain_digest(previous: str, patch_sha256: str) -> str:
+    return hashlib.sha256(f"{previous}\n{patch_sha256}".encode("utf-8")).hexdigest()
+
+
+class PatchStateCache:
+    """Snapshots of touched files after a patch-stack prefix, keyed by chain digest.
+
+    Entries are written to a staging directory and renamed into place, and
+    ``restore`` treats an entry that vanished mid-read as a miss, so builds
+    (threads or processes) can share the directory without a lock. Nothing
+    is evicted while storing; the build calls ``prune`` once at the end.
+    """
+
+    def __init__(self, directory: Path, keep: int = DEFAULT_KEEP_STATES) -> None:
+        self.directory = Path(directory)
+        self.keep = keep
+
+    def has(self, digest: str) -> bool:
+        return (self.directory / digest / "files.json").exists()
+
+    def restore(self, digest: str, tree: PatchTree) -> bool:
+        """Load the state for ``digest`` into ``tree``; False (tree untouched) on a miss."""
+        entry = self.directory / digest
+        try:
+            listing = json.loads((entry / "files.json").read_text(encoding="utf-8"))
+            files = {
+                rel: FileImage.read(entry / "tree" / rel) if present else None
+                for rel, present in listing.items()
+            }
+            os.utime(entry)
+        except (OSError, ValueError):
+            return False
+        tree.files.update(files)
+        return True
+
+    def store(self, digest: str, tree: PatchTree) -> None:
+        entry = self.directory / digest
+        if self.has(digest):
+            try:
+                os.utime(entry)
+            except OSError:
+                pass
+            return
+        staging = self.directory / f".{digest}.{os.getpid()}.{threading.get_ident()}"
+        if staging.exists():
+            shutil.rmtree(staging)
+        listing: dict[str, bool] = {}
+        for rel, image in tree.files.items():
+            listing[rel] = image is not None
+            if image is not None:
+                image.write(staging / "tree" / rel)
+        staging.mkdir(parents=True, exist_ok=True)
+        (staging / "files.json").write_text(json.dumps(listing, sort_keys=True) + "\n", encoding="utf-8")
+        try:
+            staging.replace(entry)
+        except OSError:
+            # Another build stored the same state first.
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def prune(self, used_since: float | None = None) -> int:
+        """Drop all but the ``keep`` newest states, never one used since ``used_since``.
+
+        Stores and restores touch an entry's mtime, so passing the build's
+        start time keeps every state the build relied on, however many
+        components it has. Returns the number of states removed.
+        """
+        if not self.directory.exists():
+            return 0
+        entries: list[tuple[float, Path]] = []
+        for path in self.directory.iterdir():
+            if path.name.startswith(".") or not path.is_dir():
+                continue
+            try:
+                mtime = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if used_since is None or mtime < used_since:
+                entries.append((mtime, path))
+        entries.sort(reverse=True)
+        for _mtime, stale in entries[self.keep:]:
+            shutil.rmtree(stale, ignore_errors=True)
+        return len(entries[self.keep:])
+
+
+class StackResult(NamedTuple):
+    applied: int
+    restored: int
+    touched: list[str]
+
+
+def apply_patch_stack(
+    root: Path,
+    patches: Sequence[Path],
+    base_key: str = "",
+    cache: PatchStateCache | None = None,
+) -> StackResult:
+    """Apply ``patches`` in order to the files under ``root`` in one pass.
+
+    ``base_key`` must identify the unpatched tree (e.g. the source zip's
+    sha256); it seeds the chain digests used by ``cache``.
+    """
+    digests: list[str] = []
+    previous = base_key
+    for patch in patches:
+        if not patch.exists():
+            raise FileNotFoundError(f"Patch file not found: {patch}")
+        previous = chain_digest(previous, hashlib.sha256(patch.read_bytes()).hexdigest())
+        digests.append(previous)
+
+    tree = PatchTree(root)
+    restored = 0
+    if cache is not None and base_key:
+        for count in range(len(digests), 0, -1):
+            if cache.restore(digests[count - 1], tree):
+                restored = count
+                break
+
+    for index in range(restored, len(patches)):
+        patch = patches[index]
+        tree.apply(patch.name, patch.read_bytes().decode("utf-8", errors="surrogateescape"))
+        if cache is not None and base_key and (index + 1) % CHECKPOINT_EVERY == 0 and index + 1 < len(patches):
+            cache.store(digests[index], tree)
+    if cache is not None and base_key and digests and restored < len(digests):
+        cache.store(digests[-1], tree)
+    return StackResult(applied=len(patches) - restored, restored=restored, touched=tree.write())
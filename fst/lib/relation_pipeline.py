@@ -0,0 +1,183 @@
+"""Streaming stages for rewriting finite (upper, lower) relations.
+
+Pairs are read straight from ``foma``'s ``print pairs`` output and from
+reviewed TSV files, pushed one at a time through a list of stages (reject,
+rewrite, dedupe, ...), and collected into the single set of distinct pairs
+that the acyclic compiler needs. Nothing is staged on disk and no stage
+keeps a full copy of the relation. Each stage counts what it received and
+emitted and the time spent in it.
+"""
+
+from __future__ import annotations
+
+import abc
+import subprocess
+import tempfile
+import time
+from collections.abc import Callable, Iterable, Iterator
+from pathlib import Path
+
+from build_trace import MeasuredPopen, record_child
+
+Pair = tuple[str, str]
+BASE = "base"
+
+
+class Stage(abc.ABC):
+    """One step of the pipeline; ``apply`` returns the (possibly new) pair or None to drop it."""
+
+    name = "stage"
+
+    def __init__(self, name: str | None = None) -> None:
+        if name is not None:
+            self.name = name
+        self.received = 0
+        self.emitted = 0
+        self.seconds = 0.0
+
+    @abc.abstractmethod
+    def apply(self, pair: Pair, origin: str) -> Pair | None:
+        ...
+
+    def report(self) -> dict[str, object]:
+        return {"stage": self.name, "in": self.received, "out": self.emitted, "seconds": round(self.seconds, 4)}
+
+
+class Reject(Stage):
+    """Drop exact pairs; optionally only those coming from some origins."""
+
+    name = "reject"
+
+    def __init__(self, rejected: set[Pair], origins: set[str] | None = None, name: str | None = None) -> None:
+        super().__init__(name)
+        self.rejected = rejected
+        self.origins = origins
+        self.matched: set[Pair] = set()
+
+    def apply(self, pair: Pair, origin: str) -> Pair | None:
+        if pair in self.rejected and (self.origins is None or origin in self.origins):
+            self.matched.add(pair)
+            return None
+        return pair
+
+
+class Dedupe(Stage):
+    """Keep the first occurrence of each pair and count the survivors per origin."""
+
+    name = "dedupe"
+
+    def __init__(self, name: str | None = None) -> None:
+        super().__init__(name)
+        self.seen: set[Pair] = set()
+        self.by_origin: dict[str, int] = {}
+
+    def apply(self, pair: Pair, origin: str) -> Pair | None:
+        if pair in self.seen:
+            return None
+        self.seen.add(pair)
+        self.by_origin[origin] = self.by_origin.get(origin, 0) + 1
+        return pair
+
+
+class RewriteUpper(Stage):
+    """Map the upper side through ``rewrite``; counts pairs it changed."""
+
+    name = "rewrite-upper"
+
+    def __init__(self, rewrite: Callable[[str], str], name: str | None = None) -> None:
+        super().__init__(name)
+        self.rewrite = rewrite
+        self.changed = 0
+
+    def apply(self, pair: Pair, origin: str) -> Pair | None:
+        upper = self.rewrite(pair[0])
+        if upper == pair[0]:
+            return pair
+        self.changed += 1
+        return upper, pair[1]
+
+
+def foma_pairs(model_path: Path) -> Iterator[Pair]:
+    """Stream ``print pairs`` of a finite network from a foma subprocess."""
+    script = f"load stack {model_path}\nprint pairs\nquit\n".encode("utf-8")
+    started = time.perf_counter()
+    # stderr goes to a file rather than a pipe: nothing reads it until stdout
+    # is done, and a full stderr pipe would block foma mid-dump.
+    with tempfile.TemporaryFile() as errors:
+        proc = MeasuredPopen(
+            ["foma", "-q"],
+            cwd=str(model_path.parent),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=errors,
+        )
+        # The script is tiny, so writing it up front cannot fill the pipe.
+        proc.stdin.write(script)
+        proc.stdin.close()
+        received = 0
+        try:
+            for raw in proc.stdout:
+                received += len(raw)
+                line = raw.decode("utf-8").rstrip("\n")
+                upper, tab, lower = line.partition("\t")
+                if not tab:
+                    raise RuntimeError(f"Malformed finite relation pair in {model_path.name}: {line!r}")
+                yield upper, lower
+        finally:
+            proc.stdout.close()
+            code = proc.wait()
+            errors.seek(0)
+            stderr = errors.read()
+            record_child(["foma"], started, proc.rusage, len(script) + received + len(stderr))
+    if code != 0:
+        raise subprocess.CalledProcessError(code, ["foma", "-q"], stderr=stderr.decode("utf-8", errors="replace"))
+
+
+def tsv_pairs(path: Path) -> Iterator[Pair]:
+    """Pairs from a reviewed ``upper<TAB>lower`` file."""
+    with path.open(encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            values = line.rstrip("\n").split("\t", 1)
+            if len(values) != 2:
+                raise ValueError(f"Malformed relation row in {path}:{line_number}: {line.rstrip()!r}")
+            yield values[0], values[1]
+
+
+class PipelineResult:
+    def __init__(self, pairs: set[Pair], sources: list[dict[str, object]], stages: list[Stage]) -> None:
+        self.pairs = pairs
+        self.sources = sources
+        self.stages = stages
+
+    def report(self) -> list[dict[str, object]]:
+        return [*self.sources, *(stage.report() for stage in self.stages)]
+
+
+def run_pipeline(sources: Iterable[tuple[str, Iterable[Pair]]], stages: list[Stage]) -> PipelineResult:
+    """Push every pair from each (origin, pairs) source through ``stages`` in order."""
+    distinct: set[Pair] = set()
+    source_reports: list[dict[str, object]] = []
+    clock = time.perf_counter
+    for origin, pairs in sources:
+        count = 0
+        reading = 0.0
+        iterator = iter(pairs)
+        while True:
+            started = clock()
+            pair = next(iterator, None)
+            reading += clock() - started
+            if pair is None:
+                break
+            count += 1
+            for stage in stages:
+                stage.received += 1
+                started = clock()
+                pair = stage.apply(pair, origin)
+                stage.seconds += clock() - started
+                if pair is None:
+                    break
+                stage.emitted += 1
+            if pair is not None:
+                distinct.add(pair)
+        source_reports.append({"stage": f"read:{origin}", "in": count, "out": count, "seconds": round(reading, 4)})
+    return PipelineResult(distinct, source_reports, stages)
@@ -0,0 +1,86 @@
+"""Split strings into a model's sigma symbols the way flookup does.
+
+flookup reads its input by greedy longest match against the network's
+alphabet, so multichar symbols (tags like ``+sandhik`` or whole-word symbols
+left by older regex compiles) win over their single characters. The symbols
+are held in a character trie, so each step costs the length of the match
+rather than a scan of the whole alphabet. Characters that start no symbol
+come back as one-character pieces (foma's identity/unknown input).
+
+Tokenizers are cached per key (a model's sha256), since building one from
+a large sigma and, in the build, reading that sigma from foma are the
+expensive parts.
+"""
+
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable, Iterable
+
+
+class SigmaTokenizer:
+    """Character trie over an alphabet of (possibly multichar) symbols."""
+
+    def __init__(self, symbols: Iterable[str]) -> None:
+        self.children: list[dict[str, int]] = [{}]
+        self.terminal: list[bool] = [False]
+        self.symbols: set[str] = set()
+        for symbol in symbols:
+            if symbol:
+                self._insert(symbol)
+
+    def _insert(self, symbol: str) -> None:
+        node = 0
+        for character in symbol:
+            child = self.children[node].get(character)
+            if child is None:
+                child = len(self.terminal)
+                self.children[node][character] = child
+                self.children.append({})
+                self.terminal.append(False)
+            node = child
+        self.terminal[node] = True
+        self.symbols.add(symbol)
+
+    def longest_at(self, text: str, start: int) -> int:
+        """Length of the longest symbol starting at ``start``; 0 if none does."""
+        children = self.children
+        terminal = self.terminal
+        node = 0
+        best = 0
+        position = start
+        length = len(text)
+        while position < length:
+            node = children[node].get(text[position], -1)
+            if node < 0:
+                break
+            position += 1
+            if terminal[node]:
+                best = position - start
+        return best
+
+    def split(self, text: str) -> list[str]:
+        """Greedy longest-match pieces; characters outside sigma stand alone."""
+        pieces: list[str] = []
+        position = 0
+        length = len(text)
+        while position < length:
+            size = self.longest_at(text, position) or 1
+            pieces.append(text[position:position + size])
+            position += size
+        return pieces
+
+
+_cache: dict[str, SigmaTokenizer] = {}
+_cache_lock = threading.Lock()
+
+
+def cached_tokenizer(key: str, symbols: Callable[[], Iterable[str]]) -> SigmaTokenizer:
+    """The tokenizer for ``key``, building it from ``symbols()`` on first use."""
+    with _cache_lock:
+        tokenizer = _cache.get(key)
+    if tokenizer is None:
+        tokenizer = SigmaTokenizer(symbols())
+        with _cache_lock:
+            tokenizer = _cache.setdefault(key, tokenizer)
+    return tokenizer
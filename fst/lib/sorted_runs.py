@@ -0,0 +1,144 @@
+"""Deduplicated, sorted word unions that spill to disk past a memory budget.
+
+``SortedRuns`` collects words tagged with the source they came from (a model
+index, say). Once the buffered words are estimated to pass ``budget_bytes`` they
+are written out as one sorted run file and dropped from memory. ``merged()``
+k-way merges the runs with whatever is still buffered and yields each distinct
+word once, in sorted order, with the lowest source that contributed it. That is
+enough to recover "new words from source N" counts without holding the union
+in memory. Without a budget nothing is spilled. Run files go to a private
+directory under ``directory`` (default: the system temp directory, so
+``TMPDIR`` applies) and are deleted by ``close()``.
+"""
+
+from __future__ import annotations
+
+import heapq
+import resource
+import shutil
+import sys
+import tempfile
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+# Rough per-entry cost of the buffer dict beyond the string itself.
+ENTRY_OVERHEAD = 48
+# Runs merged at once; past this the runs are first folded into one, which
+# keeps the merge well inside the open-file limit.
+MAX_FAN_IN = 64
+# ru_maxrss is in kilobytes on Linux and bytes on macOS.
+_RSS_SCALE = 1024 if sys.platform == "darwin" else 1
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / _RSS_SCALE / 1024
+
+
+class SortedRuns:
+    def __init__(self, budget_bytes: int | None = None, directory: Path | None = None) -> None:
+        self.budget_bytes = budget_bytes
+        self.directory = directory
+        self.buffer: dict[str, int] = {}
+        self.buffered_bytes = 0
+        self.runs: list[Path] = []
+        self._spill_dir: Path | None = None
+        self._serial = 0
+
+    def add(self, word: str, source: int = 0) -> None:
+        known = self.buffer.get(word)
+        if known is None:
+            self.buffer[word] = source
+            self.buffered_bytes += sys.getsizeof(word) + ENTRY_OVERHEAD
+            if self.budget_bytes is not None and self.buffered_bytes > self.budget_bytes:
+                self.spill()
+        elif source < known:
+            self.buffer[word] = source
+
+    def update(self, words: Iterable[str], source: int = 0) -> None:
+        for word in words:
+            self.add(word, source)
+
+    def spill(self) -> None:
+        """Write the buffer out as a sorted run and empty it."""
+        if not self.buffer:
+            return
+        if self._spill_dir is None:
+            if self.directory is not None:
+                self.directory.mkdir(parents=True, exist_ok=True)
+            self._spill_dir = Path(tempfile.mkdtemp(prefix="sorted-runs-", dir=self.directory))
+        self._write_run((word, self.buffer[word]) for word in sorted(self.buffer))
+        self.buffer = {}
+        self.buffered_bytes = 0
+        if len(self.runs) >= MAX_FAN_IN:
+            runs, self.runs = self.runs, []
+            self._write_run(_merge_runs(runs))
+            for path in runs:
+                path.unlink()
+
+    def _write_run(self, items: Iterable[tuple[str, int]]) -> None:
+        path = self._spill_dir / f"run-{self._serial:05d}.tsv"
+        self._serial += 1
+        with open(path, "w", encoding="utf-8") as f:
+            for word, source in items:
+                f.write(f"{word}\t{source}\n")
+        self.runs.append(path)
+
+    def merged(self) -> Iterator[tuple[str, int]]:
+        """Each distinct word, sorted, with the lowest source that added it."""
+        buffered = ((word, self.buffer[word]) for word in sorted(self.buffer))
+        return _merge_runs(self.runs, buffered)
+
+    def words(self) -> Iterator[str]:
+        for word, _source in self.merged():
+            yield word
+
+    def count(self) -> int:
+        if not self.runs:
+            return len(self.buffer)
+        return sum(1 for _ in self.merged())
+
+    def close(self) -> None:
+        """Delete the run files."""
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+        self.runs = []
+
+    def __enter__(self) -> SortedRuns:
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+
+def _merge_runs(
+    runs: list[Path], *streams: Iterator[tuple[str, int]],
+) -> Iterator[tuple[str, int]]:
+    files = [open(path, encoding="utf-8") for path in runs]
+    try:
+        current: str | None = None
+        lowest = 0
+        # heapq.merge orders equal words by source, so the first is the lowest.
+        for word, source in heapq.merge(*(_read_run(f) for f in files), *streams):
+            if word != current:
+                if current is not None:
+                    yield current, lowest
+                current, lowest = word, source
+        if current is not None:
+            yield current, lowest
+    finally:
+        for f in files:
+            f.close()
+
+
+def _read_run(f) -> Iterator[tuple[str, int]]:
+    for line in f:
+        word, source = line.rstrip("\n").rsplit("\t", 1)
+        yield word, int(source)
+
+
+def budget_from_mb(megabytes: int) -> int | None:
+    """``--memory-budget-mb`` value to a byte budget; 0 (or less) means unlimited."""
+    return megabytes * 1024 * 1024 if megabytes > 0 else None
+
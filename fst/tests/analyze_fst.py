@@ -6,12 +6,15 @@ from __future__ import annotations
 import argparse
 import json
 import re
-import subprocess
+import sys
 from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+import flookup_pool  # noqa: E402
+
 REPORT_DIR = ROOT / "fst" / "reports"
 
 
@@ -22,27 +25,7 @@ def read_lines(path: Path | None) -> list[str]:
 
 
 def run_flookup(fst_path: Path, inputs: list[str], inverse: bool) -> dict[str, list[str]]:
-    cmd = ["flookup"]
-    if inverse:
-        cmd.append("-i")
-    cmd.append(str(fst_path))
-
-    proc = subprocess.run(
-        cmd,
-        input="\n".join(inputs) + "\n",
-        text=True,
-        capture_output=True,
-        check=True,
-    )
-
-    mapping: dict[str, list[str]] = {item: [] for item in inputs}
-    for line in proc.stdout.splitlines():
-        if "\t" not in line:
-            continue
-        left, right = line.split("\t", 1)
-        if left in mapping:
-            mapping[left].append(right.strip())
-    return mapping
+    return flookup_pool.lookup(fst_path, inputs, inverse=inverse)
 
 
 def suffix_bucket(word: str, n: int = 3) -> str:
@@ -80,7 +63,7 @@ def main() -> None:
     generated = []
     per_query_counts = {}
     for query, results in lookup.items():
-        valid = [r for r in results if r and r != "+?"]
+        valid = [r for r in results if r]
         per_query_counts[query] = len(valid)
         generated.extend(valid)
 
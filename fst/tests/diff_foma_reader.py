@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""Differential check of the in-process foma reader against flookup.
+
+Every query the regression fixtures make (plus, by default, the inverse of
+each analysis flookup returns for them) is answered by both engines; any
+difference in the result multiset is a failure.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+from flookup_pool import FlookupPool, flookup_available  # noqa: E402
+from foma_reader import FomaTransducer  # noqa: E402
+
+FIXTURE_DIR = ROOT / "fst" / "tests" / "fixtures"
+REPORT_DIR = ROOT / "fst" / "reports"
+FST_MODEL_DIR_CANDIDATES = [
+    ROOT / "server" / "fst-models",
+    ROOT / "runtime",
+    ROOT / "build" / "fst-models",
+    ROOT / "static-word-list" / "fst-models",
+]
+
+
+def fail(message: str) -> None:
+    print(f"FAIL: {message}")
+    sys.exit(1)
+
+
+def resolve_model_dir(explicit: Path | None) -> Path:
+    if explicit is not None:
+        return explicit
+    for candidate in FST_MODEL_DIR_CANDIDATES:
+        if (candidate / "noun.fst").exists():
+            return candidate
+    fail("No FST model directory found; run npm run fst:build")
+
+
+def fixture_queries() -> dict[str, dict[bool, set[str]]]:
+    """Map model -> {inverse: queries} from every morphology fixture."""
+    queries: dict[str, dict[bool, set[str]]] = defaultdict(lambda: {False: set(), True: set()})
+    noun = json.loads((FIXTURE_DIR / "noun_morph_regressions.json").read_text(encoding="utf-8"))
+    queries["noun.fst"][True].update(item["analysis"] for item in noun["inverse_must_include"])
+    for key in ("analysis_must_recognize", "analysis_should_reject", "dictionary_must_include", "dictionary_must_exclude"):
+        queries["noun.fst"][False].update(noun.get(key, []))
+    verbs = json.loads((FIXTURE_DIR / "verb_morph_regressions.json").read_text(encoding="utf-8"))
+    for model, fixture in verbs["models"].items():
+        queries[model][False].update(fixture.get("analysis_must_recognize", []))
+        queries[model][False].update(fixture.get("analysis_must_reject", []))
+    misc = json.loads((FIXTURE_DIR / "misc_morph_regressions.json").read_text(encoding="utf-8"))
+    for model, fixture in misc.get("models", {}).items():
+        queries[model][False].update(fixture.get("must_analyze", {}))
+        queries[model][False].update(fixture.get("must_not_analyze", {}))
+        queries[model][True].update(fixture.get("must_generate", {}))
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Diff the in-process foma reader against flookup")
+    parser.add_argument("--model-dir", type=Path, help="Directory holding the .fst models")
+    parser.add_argument("--no-round-trip", action="store_true", help="Skip inverse lookups of returned analyses")
+    parser.add_argument("--report", type=Path, help="Write a JSON report here")
+    args = parser.parse_args()
+
+    if not flookup_available():
+        fail("flookup not available; the reference engine is required")
+    model_dir = resolve_model_dir(args.model_dir)
+    pool = FlookupPool("flookup")
+    mismatches: list[dict[str, object]] = []
+    model_rows: list[dict[str, object]] = []
+
+    for model, by_direction in sorted(fixture_queries().items()):
+        model_path = model_dir / model
+        if not model_path.exists():
+            fail(f"Missing {model} in {model_dir}")
+        started = time.perf_counter()
+        transducer = FomaTransducer.load(model_path)
+        load_seconds = time.perf_counter() - started
+        timings = {"flookup": 0.0, "python": 0.0}
+        compared = 0
+        for inverse in (False, True):
+            queries = sorted(by_direction[inverse])
+            if inverse and not args.no_round_trip:
+                forward = pool.lookup(model_path, sorted(by_direction[False]))
+                queries = sorted(set(queries).union(*forward.values()))
+            if not queries:
+                continue
+            started = time.perf_counter()
+            expected = pool.lookup(model_path, queries, inverse=inverse)
+            timings["flookup"] += time.perf_counter() - started
+            started = time.perf_counter()
+            actual = transducer.apply_batch(queries, inverse=inverse)
+            timings["python"] += time.perf_counter() - started
+            for query in queries:
+                compared += 1
+                want = sorted(expected.get(query, []))
+                got = sorted(actual.get(query, []))
+                if want != got:
+                    mismatches.append({
+                        "model": model,
+                        "direction": "inverse" if inverse else "forward",
+                        "query": query,
+                        "flookup": want,
+                        "python": got,
+                    })
+        pool.release(model_path)
+        model_rows.append({
+            "model": model,
+            "states": transducer.state_count,
+            "arcs": transducer.arc_count,
+            "queries": compared,
+            "load_seconds": round(load_seconds, 3),
+            "flookup_seconds": round(timings["flookup"], 3),
+            "python_seconds": round(timings["python"], 3),
+        })
+        print(
+            f"{model}: {compared} queries, {transducer.state_count} states, "
+            f"load {load_seconds:.2f}s, flookup {timings['flookup']:.2f}s, python {timings['python']:.2f}s"
+        )
+
+    report = {
+        "generated_at_utc": datetime.now(timezone.utc).isoformat(),
+        "model_dir": str(model_dir),
+        "models": model_rows,
+        "mismatch_count": len(mismatches),
+        "mismatches": mismatches[:200],
+    }
+    report_path = args.report
+    if report_path is None:
+        REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        report_path = REPORT_DIR / "foma-reader-diff.json"
+    report_path.write_text(json.dumps(report, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    print(f"Wrote report: {report_path}")
+
+    if mismatches:
+        for row in mismatches[:10]:
+            print(f"  {row['model']} {row['direction']} {row['query']}: flookup={row['flookup']} python={row['python']}")
+        fail(f"{len(mismatches)} lookup(s) differ between flookup and the in-process reader")
+    print("PASS: in-process foma reader matches flookup on all fixture queries")
+
+
+if __name__ == "__main__":
+    main()
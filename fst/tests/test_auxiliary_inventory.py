@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""The binary auxiliary inventory answers what its source routes say."""
+
+from __future__ import annotations
+
+import shutil
+import sys
+import tempfile
+import unittest
+from collections import Counter
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+from auxiliary_inventory import InventoryIndex, raw_tag_frequencies, write_index  # noqa: E402
+
+CONTINUATION_TAGS = {
+    "AuxFinite": {"+aux+fin+past+3sm", "+aux+fin+pres+1s", "+aux+fin+fut+3pl"},
+    "AuxNonFinite": {"+aux+nonfin+inf", "+aux+nonfin+vbp"},
+    "Empty": set(),
+}
+LEMMA_ROUTES = {
+    "இரு": {("+verb", "AuxFinite"), ("+verb", "AuxNonFinite")},
+    "கொள்": {("+verb", "AuxFinite")},
+    "விடு": {("+verb", "AuxFinite")},
+    "படு": {("+verb+passive", "AuxNonFinite"), ("+verb", "")},
+    "போ": {("", "AuxNonFinite")},
+    "வா": {("+verb", "Empty")},
+}
+
+
+def expected_tags(lemma: str) -> set[str]:
+    tags: set[str] = set()
+    for root_suffix, continuation in LEMMA_ROUTES[lemma]:
+        suffixes = CONTINUATION_TAGS[continuation] if continuation else {""}
+        tags.update((root_suffix + suffix).lstrip("+") for suffix in suffixes)
+    return tags
+
+
+class InventoryIndexTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp = Path(tempfile.mkdtemp(prefix="inventory-test-"))
+        cls.path = cls.temp / "verb-auxiliary.inventory.bin"
+        cls.sizes = write_index(cls.path, CONTINUATION_TAGS, LEMMA_ROUTES)
+        cls.index = InventoryIndex(cls.path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.index.close()
+        shutil.rmtree(cls.temp, ignore_errors=True)
+
+    def test_sizes(self) -> None:
+        self.assertEqual(self.sizes["lemmas"], len(LEMMA_ROUTES))
+        self.assertEqual(self.sizes["continuations"], len(CONTINUATION_TAGS))
+        self.assertEqual(self.sizes["bytes"], self.path.stat().st_size)
+        # கொள் and விடு share one route group.
+        self.assertEqual(self.sizes["route_groups"], len(LEMMA_ROUTES) - 1)
+
+    def test_lemmas_round_trip(self) -> None:
+        self.assertEqual(len(self.index), len(LEMMA_ROUTES))
+        self.assertEqual(
+            list(self.index.lemmas()),
+            sorted(LEMMA_ROUTES, key=lambda lemma: lemma.encode("utf-8")),
+        )
+        for lemma in LEMMA_ROUTES:
+            self.assertIn(lemma, self.index)
+        self.assertNotIn("இல்", self.index)
+        self.assertNotIn(None, self.index)
+
+    def test_routes_round_trip(self) -> None:
+        for lemma, routes in LEMMA_ROUTES.items():
+            with self.subTest(lemma=lemma):
+                self.assertEqual(set(self.index.routes(lemma)), routes)
+        self.assertEqual(self.index.routes("இல்"), [])
+
+    def test_lemma_tags(self) -> None:
+        for lemma in LEMMA_ROUTES:
+            with self.subTest(lemma=lemma):
+                self.assertEqual(self.index.lemma_tags(lemma), expected_tags(lemma))
+        self.assertTrue(self.index.has_analysis("படு", "verb+passive+aux+nonfin+inf"))
+        self.assertTrue(self.index.has_analysis("படு", "verb"))
+        self.assertFalse(self.index.has_analysis("படு", "verb+aux+nonfin+inf"))
+        self.assertEqual(self.index.lemma_tags("வா"), set())
+
+    def test_tag_frequencies(self) -> None:
+        route_groups = Counter(frozenset(routes) for routes in LEMMA_ROUTES.values())
+        expected = raw_tag_frequencies(route_groups, CONTINUATION_TAGS)
+        self.assertEqual(dict(self.index.raw_tag_frequencies()), dict(expected))
+        self.assertEqual(
+            list(tags for tags, _ in self.index.raw_tag_frequencies()),
+            sorted(expected, key=lambda tags: tags.encode("utf-8")),
+        )
+        self.assertEqual(self.index.tag_frequency("verb+aux+fin+past+3sm"), 3)
+        self.assertEqual(self.index.tag_frequency("aux+nonfin+inf"), 1)
+        self.assertEqual(self.index.tag_frequency("verb+aux+fin+past+1pl"), 0)
+        self.assertEqual(self.index.upper_analysis_count, sum(expected.values()))
+
+    def test_rejects_other_files(self) -> None:
+        other = self.temp / "not-an-index.bin"
+        other.write_bytes(b"\0" * 256)
+        with self.assertRaises(ValueError):
+            InventoryIndex(other)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""foma_reader on a small hand-written net, in both directions."""
+
+from __future__ import annotations
+
+import gzip
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+from foma_reader import FomaFormatError, FomaTransducer, load_transducer  # noqa: E402
+
+# Upper side {மர, மர+Pl}; lower side {மர, நர}, with +Pl deleted. The first
+# arc of each state carries its state number and final flag; 2- and 3-field
+# lines are further arcs (in==out and in:out).
+NET = """\
+##foma-net 1.0##
+##props##
+2 4 4 6 2 0 2 0 1 1 1 2 0 0 small
+##sigma##
+0 @_EPSILON_SYMBOL_@
+3 ம
+4 ந
+5 ர
+6 +Pl
+##states##
+0 3 4 1 0
+3 1
+1 5 2 0
+2 6 0 3 1
+3 -1 -1 1
+-1 -1 -1 -1 -1
+##end##
+"""
+
+
+class FomaReaderTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.temp = Path(tempfile.mkdtemp(prefix="foma-reader-test-"))
+        cls.path = cls.temp / "small.fst"
+        with gzip.open(cls.path, "wt", encoding="utf-8") as f:
+            f.write(NET)
+        cls.net = FomaTransducer.load(cls.path)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        shutil.rmtree(cls.temp, ignore_errors=True)
+
+    def test_tables(self) -> None:
+        self.assertEqual(self.net.state_count, 4)
+        self.assertEqual(self.net.arc_count, 4)
+
+    def test_apply_up(self) -> None:
+        self.assertEqual(sorted(self.net.lookup("மர")), ["மர", "மர+Pl"])
+        self.assertEqual(sorted(self.net.lookup("நர")), ["மர", "மர+Pl"])
+
+    def test_apply_down(self) -> None:
+        self.assertEqual(sorted(self.net.lookup("மர+Pl", inverse=True)), ["நர", "மர"])
+        self.assertEqual(sorted(self.net.lookup("மர", inverse=True)), ["நர", "மர"])
+
+    def test_rejected_input(self) -> None:
+        self.assertEqual(self.net.lookup("மம"), [])
+        self.assertEqual(self.net.lookup("ம"), [])
+        self.assertEqual(self.net.lookup("zz"), [])
+        self.assertEqual(self.net.lookup(""), [])
+
+    def test_batch_matches_single_lookups(self) -> None:
+        queries = ["மர", "நர", "zz", "மர"]
+        self.assertEqual(
+            self.net.apply_batch(queries),
+            {query: self.net.lookup(query) for query in queries},
+        )
+        self.assertEqual(
+            [(query, sorted(results)) for query, results in self.net.stream(queries, inverse=True)],
+            [(query, sorted(self.net.lookup(query, inverse=True))) for query in queries],
+        )
+
+    def test_plain_text_and_shared_load(self) -> None:
+        plain = self.temp / "plain.fst"
+        plain.write_text(NET, encoding="utf-8")
+        self.assertEqual(sorted(FomaTransducer.load(plain).lookup("நர")), ["மர", "மர+Pl"])
+        self.assertIs(load_transducer(plain), load_transducer(plain))
+
+    def test_malformed_files(self) -> None:
+        cases = {
+            "header": "##foma-net 2.0##\n##end##\n",
+            "end": NET.replace("##end##\n", ""),
+            "numbering": NET.replace("1 5 2 0", "5 5 2 0"),
+        }
+        for label, text in cases.items():
+            with self.subTest(label=label):
+                path = self.temp / f"{label}.fst"
+                path.write_text(text, encoding="utf-8")
+                with self.assertRaises(FomaFormatError):
+                    FomaTransducer.load(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
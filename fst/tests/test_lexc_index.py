@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""lexc_index parses, caches and feeds verb templates to the form generator."""
+
+from __future__ import annotations
+
+import importlib.util
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+import lexc_index  # noqa: E402
+
+SOURCE = """\
+Multichar_Symbols +verb +fin +nonfin +sim +past +3sm +1s +inf +complex +passive
+
+LEXICON Root
+செய்:செய் C3Past ;
+படி:படி C3Past ;
+பார்:பார் C3NonFinite ;
+
+LEXICON C3Past
++verb+fin+sim+past+3sm:தான் #;   ! a finite form
++verb+fin+sim+past+1s:தேன் VerbQuestion ;
+0 C3NonFinite ;
+
+LEXICON C3NonFinite
++verb+nonfin+sim+inf:ய #;
++verb+complex+passive+fin+sim+past+3sm:ப்பட்டான் #;
+
+LEXICON VerbQuestion
++%=qn:ஆ #;
+"""
+
+
+def load_generator():
+    spec = importlib.util.spec_from_file_location(
+        "generate_fst_forms", ROOT / "static-word-list" / "generate_fst_forms.py",
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class LexcIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp = Path(tempfile.mkdtemp(prefix="lexc-index-test-"))
+        self.cache = self.temp / "cache"
+        self.path = self.temp / "ThamizhiVerbs-C3.lexc"
+        self.path.write_text(SOURCE, encoding="utf-8")
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp, ignore_errors=True)
+
+    def test_parse(self) -> None:
+        index = lexc_index.parse(SOURCE, "digest")
+        self.assertEqual(
+            [entry.lemma for entry in index.entries if entry.section == "Root"],
+            ["செய்", "படி", "பார்"],
+        )
+        self.assertEqual(
+            index.terminals,
+            (
+                ("C3Past", "+verb+fin+sim+past+3sm:தான்"),
+                ("C3NonFinite", "+verb+nonfin+sim+inf:ய"),
+                ("C3NonFinite", "+verb+complex+passive+fin+sim+past+3sm:ப்பட்டான்"),
+                ("VerbQuestion", "+%=qn:ஆ"),
+            ),
+        )
+        self.assertEqual(index.tags("VerbQuestion"), ("+=qn",))
+        self.assertEqual(index.tags("Missing"), ())
+
+    def test_closure_follows_epsilon_entries(self) -> None:
+        index = lexc_index.parse(SOURCE, "digest")
+        self.assertEqual(
+            set(index.resolved_tags("C3Past")),
+            set(index.tags("C3Past")) | set(index.tags("C3NonFinite")),
+        )
+        self.assertEqual(index.resolved_tags("C3NonFinite"), index.tags("C3NonFinite"))
+
+    def test_disk_cache_round_trip(self) -> None:
+        first = lexc_index.load(self.path, cache_dir=self.cache)
+        cached = list(self.cache.glob("*.json"))
+        self.assertEqual([path.stem for path in cached], [first.digest])
+
+        lexc_index._memo.clear()
+        lexc_index._stamps.clear()
+        second = lexc_index.load(self.path, cache_dir=self.cache)
+        self.assertIsNot(second, first)
+        self.assertEqual(second.to_json(), first.to_json())
+
+    def test_edit_is_reparsed(self) -> None:
+        before = lexc_index.load(self.path, cache_dir=self.cache)
+        self.path.write_text(SOURCE + "LEXICON Extra\n+verb+fin+sim+past+1s:ேன் #;\n", encoding="utf-8")
+        after = lexc_index.load(self.path, cache_dir=self.cache)
+        self.assertNotEqual(after.digest, before.digest)
+        self.assertIn("Extra", after.section_tags)
+
+    def test_cache_keeps_most_recent(self) -> None:
+        for number in range(5):
+            path = self.temp / f"{number}.lexc"
+            path.write_text(f"LEXICON Root\nx{number} #;\n", encoding="utf-8")
+            lexc_index.load(path, cache_dir=self.cache)
+        lexc_index._prune_cache(self.cache, keep=2)
+        self.assertEqual(len(list(self.cache.glob("*.json"))), 2)
+
+    def test_verb_templates(self) -> None:
+        generator = load_generator()
+        # Memoized here, so the generator's own load never writes the repo cache.
+        lexc_index.load(self.path, cache_dir=self.cache)
+        self.assertEqual(
+            generator.extract_verb_templates_from_lexc(self.path),
+            ["+verb+fin+sim+past+1s", "+verb+fin+sim+past+3sm", "+verb+nonfin+sim+inf"],
+        )
+        self.assertEqual(
+            generator.extract_verb_templates_from_lexc(self.path, conservative=False),
+            [
+                "+verb+complex+passive+fin+sim+past+3sm",
+                "+verb+fin+sim+past+1s",
+                "+verb+fin+sim+past+3sm",
+                "+verb+nonfin+sim+inf",
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""patch_stack applies a stack exactly as ``git apply`` does, cached or not."""
+
+from __future__ import annotations
+
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+from patch_stack import PatchError, PatchStateCache, apply_patch_stack  # noqa: E402
+
+BASE = {
+    "lexicon/Verbs.lexc": "".join(f"entry{n} Cont{n % 3} ;\n" for n in range(40)),
+    "lexicon/Nouns.lexc": "LEXICON Root\nமரம் N ;\nவீடு N ;\n",
+    "notes.txt": "no trailing newline",
+}
+
+PATCHES = [
+    # Two hunks in one file; the second sits below lines the first adds.
+    """\
+--- a/lexicon/Verbs.lexc
++++ b/lexicon/Verbs.lexc
+@@ -2,3 +2,5 @@ entry0 Cont0 ;
+ entry1 Cont1 ;
+ entry2 Cont2 ;
++added1 Cont0 ;
++added2 Cont1 ;
+ entry3 Cont0 ;
+@@ -30,3 +32,3 @@ entry28 Cont1 ;
+ entry29 Cont2 ;
+-entry30 Cont0 ;
++entry30 Cont2 ;
+ entry31 Cont1 ;
+""",
+    # A new file, and an edit to a file with no trailing newline.
+    """\
+--- /dev/null
++++ b/lexicon/Extra.lexc
+@@ -0,0 +1,2 @@
++LEXICON Extra
++புதிய N ;
+--- a/notes.txt
++++ b/notes.txt
+@@ -1 +1,2 @@
+-no trailing newline
+\\ No newline at end of file
++no trailing newline
++now there is one
+""",
+    # A hunk whose header line numbers are stale (offset by the first patch).
+    """\
+--- a/lexicon/Verbs.lexc
++++ b/lexicon/Verbs.lexc
+@@ -18,3 +18,3 @@
+ entry17 Cont2 ;
+-entry18 Cont0 ;
++entry18 Cont1 ;
+ entry19 Cont1 ;
+""",
+    # Deleting a file.
+    """\
+--- a/lexicon/Nouns.lexc
++++ /dev/null
+@@ -1,3 +0,0 @@
+-LEXICON Root
+-மரம் N ;
+-வீடு N ;
+""",
+]
+
+
+def write_tree(root: Path) -> None:
+    for rel, text in BASE.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+
+def snapshot(root: Path) -> dict[str, bytes]:
+    return {
+        str(path.relative_to(root)): path.read_bytes()
+        for path in sorted(root.rglob("*"))
+        if path.is_file()
+    }
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class PatchStackTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp = Path(tempfile.mkdtemp(prefix="patch-stack-test-"))
+        self.patches: list[Path] = []
+        for number, text in enumerate(PATCHES, start=1):
+            path = self.temp / "patches" / f"{number:04d}.patch"
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(text, encoding="utf-8")
+            self.patches.append(path)
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp, ignore_errors=True)
+
+    def git_applied(self, count: int) -> dict[str, bytes]:
+        root = Path(tempfile.mkdtemp(prefix=f"git-{count}-", dir=self.temp))
+        write_tree(root)
+        for patch in self.patches[:count]:
+            subprocess.run(
+                ["git", "apply", "--unsafe-paths", f"--directory={root.relative_to(self.temp)}", str(patch)],
+                cwd=self.temp, check=True, capture_output=True,
+            )
+        return snapshot(root)
+
+    def stack_applied(self, name: str, count: int, cache: PatchStateCache | None = None):
+        root = self.temp / name
+        write_tree(root)
+        result = apply_patch_stack(root, self.patches[:count], base_key="base", cache=cache)
+        return result, snapshot(root)
+
+    def test_matches_git_apply(self) -> None:
+        for count in range(1, len(self.patches) + 1):
+            with self.subTest(patches=count):
+                result, tree = self.stack_applied(f"stack-{count}", count)
+                self.assertEqual(result.applied, count)
+                self.assertEqual(tree, self.git_applied(count))
+
+    def test_cached_prefix_matches_git_apply(self) -> None:
+        cache = PatchStateCache(self.temp / "states")
+        first, _ = self.stack_applied("cold", 2, cache)
+        self.assertEqual((first.applied, first.restored), (2, 0))
+
+        # The two-patch state is restored and only the rest is replayed.
+        second, tree = self.stack_applied("warm", len(self.patches), cache)
+        self.assertEqual((second.applied, second.restored), (len(self.patches) - 2, 2))
+        self.assertEqual(tree, self.git_applied(len(self.patches)))
+
+        third, tree = self.stack_applied("hot", len(self.patches), cache)
+        self.assertEqual((third.applied, third.restored), (0, len(self.patches)))
+        self.assertEqual(tree, self.git_applied(len(self.patches)))
+
+    def test_missing_state_is_a_miss(self) -> None:
+        cache = PatchStateCache(self.temp / "states")
+        self.stack_applied("cold", len(self.patches), cache)
+        for entry in (self.temp / "states").iterdir():
+            (entry / "files.json").unlink()
+        result, tree = self.stack_applied("after-prune", len(self.patches), cache)
+        self.assertEqual(result.restored, 0)
+        self.assertEqual(tree, self.git_applied(len(self.patches)))
+
+    def test_failing_hunk_names_patch_and_leaves_tree(self) -> None:
+        bad = self.temp / "patches" / "bad.patch"
+        bad.write_text(
+            "--- a/notes.txt\n+++ b/notes.txt\n@@ -1 +1 @@\n-something else\n+replacement\n",
+            encoding="utf-8",
+        )
+        root = self.temp / "bad"
+        write_tree(root)
+        with self.assertRaisesRegex(PatchError, r"bad\.patch: hunk 1 of notes\.txt"):
+            apply_patch_stack(root, [self.patches[0], bad])
+        self.assertEqual(snapshot(root), {rel: text.encode("utf-8") for rel, text in BASE.items()})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""SortedRuns yields the same union, spilled or not, and cleans up after itself."""
+
+from __future__ import annotations
+
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+import sorted_runs  # noqa: E402
+from sorted_runs import SortedRuns, budget_from_mb  # noqa: E402
+
+
+def sample(seed: int, count: int) -> list[tuple[str, int]]:
+    rng = random.Random(seed)
+    letters = "அஆஇஈஉகஙசஞடணதநபமயரலவழளறன"
+    return [
+        ("".join(rng.choice(letters) for _ in range(rng.randint(1, 4))), rng.randrange(6))
+        for _ in range(count)
+    ]
+
+
+def expected_union(items: list[tuple[str, int]]) -> list[tuple[str, int]]:
+    lowest: dict[str, int] = {}
+    for word, source in items:
+        lowest[word] = min(source, lowest.get(word, source))
+    return sorted(lowest.items())
+
+
+class SortedRunsTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.temp = Path(tempfile.mkdtemp(prefix="sorted-runs-test-"))
+
+    def tearDown(self) -> None:
+        shutil.rmtree(self.temp, ignore_errors=True)
+
+    def collect(self, items: list[tuple[str, int]], budget: int | None) -> tuple[list[tuple[str, int]], int, int]:
+        with SortedRuns(budget, self.temp) as runs:
+            for word, source in items:
+                runs.add(word, source)
+            return list(runs.merged()), runs.count(), len(runs.runs)
+
+    def test_unbudgeted_union_stays_in_memory(self) -> None:
+        items = sample(1, 3000)
+        merged, count, spilled = self.collect(items, None)
+        self.assertEqual(merged, expected_union(items))
+        self.assertEqual(count, len(merged))
+        self.assertEqual(spilled, 0)
+
+    def test_spilled_union_matches_in_memory_union(self) -> None:
+        items = sample(2, 3000)
+        merged, count, spilled = self.collect(items, 2048)
+        self.assertGreater(spilled, 1)
+        self.assertEqual(merged, expected_union(items))
+        self.assertEqual(count, len(merged))
+
+    def test_lowest_source_wins_across_runs(self) -> None:
+        with SortedRuns(1, self.temp) as runs:
+            runs.add("மரம்", 3)
+            runs.add("வீடு", 0)
+            runs.add("மரம்", 1)
+            runs.add("மரம்", 2)
+            self.assertEqual(list(runs.merged()), [("மரம்", 1), ("வீடு", 0)])
+            self.assertEqual(list(runs.words()), ["மரம்", "வீடு"])
+
+    def test_runs_past_fan_in_are_folded(self) -> None:
+        original = sorted_runs.MAX_FAN_IN
+        sorted_runs.MAX_FAN_IN = 4
+        try:
+            items = sample(3, 2000)
+            merged, _count, spilled = self.collect(items, 512)
+        finally:
+            sorted_runs.MAX_FAN_IN = original
+        self.assertLessEqual(spilled, 5)
+        self.assertEqual(merged, expected_union(items))
+
+    def test_close_removes_run_files(self) -> None:
+        with SortedRuns(64, self.temp) as runs:
+            runs.update(word for word, _ in sample(4, 500))
+            self.assertTrue(runs.runs)
+        self.assertEqual(list(self.temp.iterdir()), [])
+
+    def test_run_files_are_removed_when_the_body_raises(self) -> None:
+        with self.assertRaises(KeyError):
+            with SortedRuns(64, self.temp) as runs:
+                runs.update(word for word, _ in sample(5, 500))
+                raise KeyError("boom")
+        self.assertEqual(list(self.temp.iterdir()), [])
+
+    def test_budget_from_mb(self) -> None:
+        self.assertEqual(budget_from_mb(2), 2 * 1024 * 1024)
+        self.assertIsNone(budget_from_mb(0))
+        self.assertIsNone(budget_from_mb(-1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+"""Run the dict:build pipeline as an incremental DAG of stages.
+
+Each stage declares its command, the stages it waits for, the files (or
+globs) and environment variables it reads, and the files it writes. A stage
+is skipped when the sha256 fingerprint of its command, environment and
+inputs matches its last successful run and its outputs are still the files
+that run wrote. Stages whose dependencies are done run concurrently; the
+summary at the end shows each stage's time and the critical path.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "static-word-list" / "cache"
+STATE_FILE = CACHE_DIR / "dict_build_state.json"
+STATE_SCHEMA = 1
+LOG_DIR = CACHE_DIR / "dict-build-logs"
+
+MODEL_INPUTS = tuple(
+    f"{directory}/{pattern}"
+    for directory in ("build/fst-models", "server/fst-models", "static-word-list/fst-models")
+    for pattern in ("*.fst", "*.json")
+)
+WORD_SOURCE_INPUTS = (
+    "static-word-list/tamillexicon_headwords.txt",
+    "static-word-list/wiktionary_exclusions.txt",
+    "static-word-list/cache/vuizur_tamil.tsv",
+    "static-word-list/cache/tawiktionary-latest-all-titles-in-ns0.gz",
+    "static-word-list/cache/tawiktionary_pos_headwords.jsonl",
+)
+GENERATED_FORMS = "static-word-list/fst_generated_forms.txt"
+GENERATION_OUTPUTS = (
+    GENERATED_FORMS,
+    "static-word-list/fst_classified_headwords.json",
+    "static-word-list/fst_heuristic_classified_headwords.json",
+    "static-word-list/fst_heuristic_forms.txt",
+    "static-word-list/fst_heuristic_audit.json",
+    "static-word-list/fst_generation_audit.json",
+    "static-word-list/fst_unclassified_vuizur_headwords.json",
+    "static-word-list/fst_unclassified_vuizur_summary.json",
+)
+DICTIONARY_OUTPUTS = (
+    "public/tamil_dictionary.txt",
+    "static-word-list/full_tamil_dictionary.txt",
+    "static-word-list/lemma_dictionary.txt",
+)
+ENTITY_SOURCES = (
+    "static-word-list/entity-sources/tamil_geography.jsonl",
+    "static-word-list/entity-sources/tamil_reviewed_entities.jsonl",
+    "static-word-list/entity-sources/gameplay_reviewed_names.jsonl",
+)
+HEURISTIC_ENV = (
+    "INCLUDE_HEURISTIC_LEMMAS",
+    "INCLUDE_HEURISTIC_INFLECTIONS",
+    "FORCE_REFRESH_TAWIKTIONARY_DUMP",
+    "HEURISTIC_SUFFIX_WINDOW",
+)
+
+
+class Stage(NamedTuple):
+    command: tuple[str, ...]
+    deps: tuple[str, ...] = ()
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    # Variables set for the command, and variables read from the caller's
+    # environment; both are part of the fingerprint.
+    env: tuple[tuple[str, str], ...] = ()
+    env_keys: tuple[str, ...] = ()
+
+
+def pipeline_stages(full: bool) -> dict[str, Stage]:
+    """The stages of ``npm run dict:build`` (``full``) or ``dict:build:conservative``."""
+    python = sys.executable
+    return {
+        "verify-lock": Stage(
+            command=(python, "scripts/verify_morphology_lock.py", "--runtime-dir", "server/fst-models"),
+            inputs=("scripts/verify_morphology_lock.py", "morphology.lock.json", "server/fst-models/*"),
+        ),
+        "gameplay-exclusions": Stage(
+            command=(
+                python, "scripts/build_gameplay_exclusions.py", *ENTITY_SOURCES,
+                "--output", "server/gameplay-proper-noun-exclusions.txt",
+            ),
+            inputs=("scripts/build_gameplay_exclusions.py", *ENTITY_SOURCES),
+            outputs=("server/gameplay-proper-noun-exclusions.txt",),
+        ),
+        "generate-forms": Stage(
+            command=(python, "static-word-list/generate_fst_forms.py"),
+            deps=("verify-lock",),
+            inputs=(
+                "static-word-list/generate_fst_forms.py",
+                "fst/lib/*.py",
+                "morphology.lock.json",
+                *MODEL_INPUTS,
+                "fst/build/.work/verb-*/ThamizhiVerbs-*.lexc",
+                "fst/reports/artifacts/sources/verb-*/ThamizhiVerbs-*.lexc",
+                *WORD_SOURCE_INPUTS,
+            ),
+            outputs=GENERATION_OUTPUTS,
+            env=(("FULL_FST_GENERATION", "true" if full else "false"),),
+            env_keys=(*HEURISTIC_ENV, "FST_GENERATION_FULL_REBUILD"),
+        ),
+        "ai-prefixes": Stage(
+            command=(python, "scripts/build_ai_prefix_index.py"),
+            deps=("generate-forms",),
+            inputs=("scripts/build_ai_prefix_index.py", GENERATED_FORMS, "fst/tests/fixtures/*.json", "morphology.lock.json"),
+            outputs=("public/tamil_ai_prefixes.bloom", "public/tamil_ai_prefixes.manifest.json"),
+        ),
+        "dictionary": Stage(
+            command=(python, "static-word-list/build_dictionary.py"),
+            deps=("generate-forms", "gameplay-exclusions"),
+            inputs=(
+                "static-word-list/build_dictionary.py",
+                GENERATED_FORMS,
+                "static-word-list/fst_heuristic_forms.txt",
+                "server/gameplay-proper-noun-exclusions.txt",
+                "server/gameplay-common-word-exceptions.txt",
+                *WORD_SOURCE_INPUTS,
+            ),
+            outputs=DICTIONARY_OUTPUTS,
+            env_keys=HEURISTIC_ENV,
+        ),
+        "regressions": Stage(
+            command=(
+                python, "fst/tests/run_fst_regressions.py", "--check-dictionary",
+                *(("--full-mode",) if full else ()),
+            ),
+            deps=("dictionary",),
+            inputs=(
+                "fst/tests/run_fst_regressions.py",
+                "fst/tests/fixtures/*.json",
+                "fst/lib/*.py",
+                "fst/patches/*",
+                "fst/build/manifest.json",
+                "static-word-list/generate_fst_forms.py",
+                *MODEL_INPUTS,
+                *GENERATION_OUTPUTS,
+                *DICTIONARY_OUTPUTS,
+            ),
+        ),
+    }
+
+
+class FileDigests:
+    """sha256 per file, reusing the last run's digest while size and mtime match."""
+
+    def __init__(self, previous: dict[str, list]) -> None:
+        self.previous = previous
+        self.current: dict[str, list] = {}
+        self.lock = threading.Lock()
+
+    def digest(self, rel: str) -> str | None:
+        path = ROOT / rel
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        key = [stat.st_size, stat.st_mtime_ns]
+        with self.lock:
+            cached = self.current.get(rel) or self.previous.get(rel)
+        if cached and cached[:2] == key:
+            digest = cached[2]
+        else:
+            h = hashlib.sha256()
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    h.update(chunk)
+            digest = h.hexdigest()
+        with self.lock:
+            self.current[rel] = [*key, digest]
+        return digest
+
+
+def expand_inputs(patterns: tuple[str, ...]) -> list[str]:
+    files: set[str] = set()
+    for pattern in patterns:
+        if any(character in pattern for character in "*?["):
+            files.update(path.relative_to(ROOT).as_posix() for path in ROOT.glob(pattern) if path.is_file())
+        else:
+            files.add(pattern)
+    return sorted(files)
+
+
+def stage_fingerprint(stage: Stage, digests: FileDigests) -> str:
+    payload = {
+        "command": [Path(stage.command[0]).name, *stage.command[1:]],
+        "env": dict(stage.env),
+        "caller_env": {key: os.environ.get(key, "") for key in stage.env_keys},
+        "inputs": [[rel, digests.digest(rel)] for rel in expand_inputs(stage.inputs)],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def output_digests(stage: Stage, digests: FileDigests) -> dict[str, str | None]:
+    return {rel: digests.digest(rel) for rel in stage.outputs}
+
+
+def load_state(path: Path) -> dict:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {"schema_version": STATE_SCHEMA, "stages": {}, "files": {}}
+    if state.get("schema_version") != STATE_SCHEMA:
+        return {"schema_version": STATE_SCHEMA, "stages": {}, "files": {}}
+    return state
+
+
+def write_state(path: Path, state: dict) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_suffix(".tmp")
+    staging.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    staging.replace(path)
+
+
+class StageResult(NamedTuple):
+    status: str  # "ran", "skipped", "failed" or "blocked"
+    seconds: float
+
+
+def run_stage(name: str, stage: Stage, state: dict, state_lock: threading.Lock, digests: FileDigests, force: bool) -> StageResult:
+    started = time.perf_counter()
+    fingerprint = stage_fingerprint(stage, digests)
+    with state_lock:
+        previous = state["stages"].get(name)
+    if (
+        not force
+        and previous is not None
+        and previous.get("fingerprint") == fingerprint
+        and previous.get("outputs") == output_digests(stage, digests)
+    ):
+        seconds = time.perf_counter() - started
+        print(f"  skipped  {name} (up to date)", flush=True)
+        return StageResult("skipped", seconds)
+
+    print(f"  started  {name}: {' '.join(stage.command[1:])}", flush=True)
+    LOG_DIR.mkdir(parents=True, exist_ok=True)
+    log_path = LOG_DIR / f"{name}.log"
+    env = {**os.environ, **dict(stage.env)}
+    with log_path.open("w", encoding="utf-8") as log:
+        completed = subprocess.run(stage.command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+    seconds = time.perf_counter() - started
+    if completed.returncode != 0:
+        with state_lock:
+            state["stages"].pop(name, None)
+        print(f"  FAILED   {name} (exit {completed.returncode}; log: {log_path.relative_to(ROOT)})", flush=True)
+        for line in log_path.read_text(encoding="utf-8", errors="replace").splitlines()[-20:]:
+            print(f"    {line}", flush=True)
+        return StageResult("failed", seconds)
+    with state_lock:
+        state["stages"][name] = {"fingerprint": fingerprint, "outputs": output_digests(stage, digests)}
+    print(f"  finished {name} in {seconds:.1f}s", flush=True)
+    return StageResult("ran", seconds)
+
+
+def run_pipeline(stages: dict[str, Stage], jobs: int, state_path: Path, force: bool) -> dict[str, StageResult]:
+    """Run each stage once its dependencies are done, ``jobs`` at a time.
+
+    Ready stages start in declaration order. After a failure no further
+    stage starts (as with the old ``&&`` chain); stages already running
+    finish, and everything not started is reported as blocked.
+    """
+    state = load_state(state_path)
+    state_lock = threading.Lock()
+    digests = FileDigests(state.get("files", {}))
+    results: dict[str, StageResult] = {}
+    pending = dict(stages)
+    running: dict[Future, str] = {}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or running:
+            for name in [name for name, stage in pending.items() if all(dep in results for dep in stage.deps)]:
+                running[pool.submit(run_stage, name, pending.pop(name), state, state_lock, digests, force)] = name
+            if not running:
+                raise RuntimeError(f"Unsatisfiable stage dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                if results[name].status == "failed":
+                    for blocked in pending:
+                        results[blocked] = StageResult("blocked", 0.0)
+                    pending.clear()
+            with state_lock:
+                state["files"] = {**state.get("files", {}), **digests.current}
+                write_state(state_path, state)
+    return results
+
+
+def critical_path(stages: dict[str, Stage], results: dict[str, StageResult]) -> tuple[list[str], float]:
+    """Longest chain of dependent stages by elapsed time."""
+    finish: dict[str, float] = {}
+    via: dict[str, str | None] = {}
+
+    def visit(name: str) -> float:
+        if name not in finish:
+            deps = stages[name].deps
+            before = max(deps, key=visit) if deps else None
+            via[name] = before
+            finish[name] = results[name].seconds + (finish[before] if before else 0.0)
+        return finish[name]
+
+    end = max(stages, key=visit)
+    path: list[str] = []
+    node: str | None = end
+    while node is not None:
+        path.append(node)
+        node = via[node]
+    return path[::-1], finish[end]
+
+
+def print_summary(stages: dict[str, Stage], results: dict[str, StageResult], wall: float) -> None:
+    path, length = critical_path(stages, results)
+    print("\nStage summary:")
+    for name in stages:
+        result = results[name]
+        marker = "*" if name in path else " "
+        print(f" {marker} {name:<20} {result.status:<8} {result.seconds:8.1f}s")
+    print(f"Critical path (*): {' -> '.join(path)} = {length:.1f}s of {wall:.1f}s wall time")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--conservative",
+        action="store_true",
+        help="conservative generation and regressions without --full-mode (dict:build:conservative)",
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=int(os.environ.get("DICT_BUILD_JOBS", "0")),
+        help="stages run at once (0 = as many as are ready; env DICT_BUILD_JOBS)",
+    )
+    parser.add_argument("--force", action="store_true", help="run every stage even if it is up to date")
+    parser.add_argument("--state", type=Path, default=STATE_FILE, help="fingerprints of the last successful runs")
+    args = parser.parse_args()
+
+    stages = pipeline_stages(full=not args.conservative)
+    jobs = args.jobs if args.jobs > 0 else len(stages)
+    started = time.perf_counter()
+    results = run_pipeline(stages, jobs, args.state, args.force)
+    print_summary(stages, results, time.perf_counter() - started)
+    failed = [name for name, result in results.items() if result.status in ("failed", "blocked")]
+    if failed:
+        raise SystemExit(f"dict:build failed: {', '.join(failed)}")
+
+
+if __name__ == "__main__":
+    main()
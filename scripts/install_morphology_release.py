@@ -6,11 +6,18 @@ from __future__ import annotations
 import argparse
 import hashlib
 import json
-import shutil
+import sys
 import tarfile
 import tempfile
+import time
 from pathlib import Path
 
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+from artifact_store import ArtifactStore, tracked_by_git  # noqa: E402
+
+DEFAULT_STORE = ROOT / "fst" / "build" / ".cache" / "artifacts"
+
 
 def sha256(path: Path) -> str:
     digest = hashlib.sha256()
@@ -43,7 +50,15 @@ def expected_runtime_files(manifest: dict[str, object]) -> list[dict[str, object
     return rows
 
 
-def install(archive: Path, destinations: list[Path], lock_file: Path | None) -> None:
+def replaced_by_release(path: Path) -> bool:
+    """Model and sidecar files in a runtime dir belong to the installed release."""
+    return path.is_file() and path.suffix in {".fst", ".json", ".bin"}
+
+
+def install(
+    archive: Path, destinations: list[Path], lock_file: Path | None, store_root: Path = DEFAULT_STORE,
+) -> None:
+    started = time.time() - 1
     with tempfile.TemporaryDirectory(prefix="tamil-morphology-release-") as temp_name:
         temp = Path(temp_name)
         with tarfile.open(archive, "r:gz") as bundle:
@@ -57,33 +72,34 @@ def install(archive: Path, destinations: list[Path], lock_file: Path | None) ->
         manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
         rows = expected_runtime_files(manifest)
 
-        sources: list[tuple[Path, str]] = []
-        for row in rows:
-            filename = row.get("file")
-            expected = row.get("sha256")
-            if not isinstance(filename, str) or not isinstance(expected, str):
-                raise RuntimeError(f"Malformed runtime artifact row: {row!r}")
-            source = root / "runtime" / filename
-            if not source.is_file():
-                raise RuntimeError(f"Missing runtime artifact: {filename}")
-            actual = sha256(source)
-            if actual != expected:
-                raise RuntimeError(
-                    f"Digest mismatch for {filename}: expected {expected}, got {actual}"
+        store = ArtifactStore(store_root)
+        files: dict[str, str] = {}
+        with store.session():
+            for row in rows:
+                filename = row.get("file")
+                expected = row.get("sha256")
+                if not isinstance(filename, str) or not isinstance(expected, str):
+                    raise RuntimeError(f"Malformed runtime artifact row: {row!r}")
+                source = root / "runtime" / filename
+                if not source.is_file():
+                    raise RuntimeError(f"Missing runtime artifact: {filename}")
+                actual = sha256(source)
+                if actual != expected:
+                    raise RuntimeError(
+                        f"Digest mismatch for {filename}: expected {expected}, got {actual}"
+                    )
+                files[filename] = store.add(source, actual)
+
+            # Each runtime dir is swapped to the verified set at once, so a running
+            # server never loads a mix of old and new models.
+            for destination in destinations:
+                store.publish(
+                    destination,
+                    files,
+                    keep=lambda path: not replaced_by_release(path),
+                    writable=tracked_by_git(destination),
                 )
-            sources.append((source, filename))
-
-        for destination in destinations:
-            destination.mkdir(parents=True, exist_ok=True)
-            expected_names = {filename for _, filename in sources}
-            for existing in destination.iterdir():
-                if existing.is_file() and existing.name not in expected_names:
-                    if existing.suffix in {".fst", ".json"}:
-                        existing.unlink()
-            for source, filename in sources:
-                temporary = destination / f".{filename}.tmp"
-                shutil.copy2(source, temporary)
-                temporary.replace(destination / filename)
+        store.prune(set(files.values()), older_than=started)
 
         if lock_file is not None:
             lock_file.parent.mkdir(parents=True, exist_ok=True)
@@ -106,8 +122,14 @@ def main() -> None:
         help="Destination for verified runtime files; may be repeated.",
     )
     parser.add_argument("--lock-file", type=Path)
+    parser.add_argument(
+        "--store",
+        type=Path,
+        default=DEFAULT_STORE,
+        help="Content-addressed store the runtime dirs link into.",
+    )
     args = parser.parse_args()
-    install(args.archive.resolve(), args.runtime_dir, args.lock_file)
+    install(args.archive.resolve(), args.runtime_dir, args.lock_file, args.store)
 
 
 if __name__ == "__main__":
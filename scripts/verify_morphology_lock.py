@@ -17,6 +17,33 @@ def sha256(path: Path) -> str:
     return digest.hexdigest()
 
 
+def verify_router(directory: Path, router: dict[str, object], expected: dict[str, str]) -> None:
+    """Check an optional any-model router against the locked models it routes to."""
+    router_path = directory / router["file"]
+    sidecar_path = directory / router["sidecar"]
+    if not router_path.exists() and not sidecar_path.exists():
+        if router.get("required"):
+            raise SystemExit(f"{directory}: missing required router {router['file']}")
+        return
+    if not router_path.exists() or not sidecar_path.exists():
+        raise SystemExit(f"{directory}: router needs both {router['file']} and {router['sidecar']}")
+    router_hash = sha256(router_path)
+    pinned = router.get("sha256")
+    if pinned is not None and router_hash != pinned:
+        raise SystemExit(f"{router_path}: expected {pinned}, got {router_hash}")
+    sidecar = json.loads(sidecar_path.read_text(encoding="utf-8"))
+    if sidecar.get("sha256") != router_hash:
+        raise SystemExit(f"{sidecar_path}: does not describe {router_path.name}")
+    if sidecar.get("tag_format") != router["tag_format"]:
+        raise SystemExit(f"{sidecar_path}: tag format {sidecar.get('tag_format')!r} is not {router['tag_format']!r}")
+    bits = sorted(sidecar.get("bits", []), key=lambda row: row["bit"])
+    if [row["model"] for row in bits] != router["bits"]:
+        raise SystemExit(f"{sidecar_path}: bit order differs from the lock")
+    for row in bits:
+        if expected.get(row["model"]) != row["sha256"]:
+            raise SystemExit(f"{sidecar_path}: {row['model']} was routed from a model that is not locked")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--lock-file", type=Path, default=Path("morphology.lock.json"))
@@ -26,11 +53,13 @@ def main() -> None:
     runtime = manifest["runtime"]
     rows = [*runtime["artifacts"], *runtime.get("sidecars", [])]
     expected = {row["file"]: row["sha256"] for row in rows}
+    router = runtime.get("router")
+    router_names = {router["file"], router["sidecar"]} if router else set()
     for directory in args.runtime_dir:
         actual_names = {
             path.name for path in directory.iterdir()
-            if path.is_file() and path.suffix in {".fst", ".json"}
-        }
+            if path.is_file() and path.suffix in {".fst", ".json", ".bin"}
+        } - router_names
         if actual_names != set(expected):
             missing = sorted(set(expected) - actual_names)
             extra = sorted(actual_names - set(expected))
@@ -41,6 +70,8 @@ def main() -> None:
                 raise SystemExit(
                     f"{directory / filename}: expected {expected_hash}, got {actual_hash}"
                 )
+        if router:
+            verify_router(directory, router, expected)
         print(f"Verified {len(expected)} locked runtime files in {directory}")
 
 
@@ -0,0 +1,79 @@
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+const { analysisFromLookupLine } = require('./word-validation-policy');
+
+// any-model.fst maps each surface to the file names of the models that can
+// analyze it; any-model.json records the bit order and source model hashes.
+const ROUTER_FST_FILE = 'any-model.fst';
+const ROUTER_SIDECAR_FILE = 'any-model.json';
+const ROUTER_SCHEMA = 1;
+const ROUTER_TAG_FORMAT = 'model-file-symbol';
+
+function sha256File(filename) {
+    return crypto.createHash('sha256').update(fs.readFileSync(filename)).digest('hex');
+}
+
+/**
+ * Read and verify the router sidecar in fstDir.
+ * Returns { fstName, models } or null when the router is absent, malformed,
+ * or was built from models other than the ones now on disk.
+ */
+function loadRouterManifest(fstDir) {
+    const routerPath = path.join(fstDir, ROUTER_FST_FILE);
+    const sidecarPath = path.join(fstDir, ROUTER_SIDECAR_FILE);
+    if (!fs.existsSync(routerPath) || !fs.existsSync(sidecarPath)) return null;
+    let sidecar;
+    try {
+        sidecar = JSON.parse(fs.readFileSync(sidecarPath, 'utf8'));
+    } catch {
+        return null;
+    }
+    if (sidecar.schema_version !== ROUTER_SCHEMA || sidecar.tag_format !== ROUTER_TAG_FORMAT) return null;
+    if (sidecar.sha256 !== sha256File(routerPath)) return null;
+    const bits = Array.isArray(sidecar.bits) ? [...sidecar.bits].sort((a, b) => a.bit - b.bit) : [];
+    if (bits.length === 0 || bits.some((row, index) => row.bit !== index)) return null;
+    for (const row of bits) {
+        const modelPath = path.join(fstDir, row.model);
+        if (!fs.existsSync(modelPath) || sha256File(modelPath) !== row.sha256) return null;
+    }
+    return { fstName: ROUTER_FST_FILE, models: bits.map((row) => row.model) };
+}
+
+/**
+ * Owning model names from one word's router lookup lines; [] for +?.
+ */
+function ownersFromLookupLines(lines, models) {
+    const known = new Set(models);
+    const owners = new Set();
+    for (const line of lines) {
+        const tag = analysisFromLookupLine(line);
+        if (known.has(tag)) owners.add(tag);
+    }
+    return models.filter((model) => owners.has(model));
+}
+
+/**
+ * Models to query after a router lookup returned `owners`.
+ * `live` are the model names with a running flookup process. Models the
+ * router does not cover (e.g. installed after it was built) are always
+ * queried, since the router cannot rule them out. `ownerDown` is true when
+ * an owning model has no live process, so an empty answer is not a verdict.
+ */
+function routeModels(live, owners, routerModels) {
+    const covered = new Set(routerModels);
+    const owning = new Set(owners);
+    const liveSet = new Set(live);
+    return {
+        models: live.filter((model) => !covered.has(model) || owning.has(model)),
+        ownerDown: owners.some((model) => !liveSet.has(model)),
+    };
+}
+
+module.exports = {
+    ROUTER_FST_FILE,
+    ROUTER_SIDECAR_FILE,
+    loadRouterManifest,
+    ownersFromLookupLines,
+    routeModels,
+};
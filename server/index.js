@@ -5,6 +5,12 @@ const {
     hasPlayableAnalysis,
     isPlayableWordShape,
 } = require('./word-validation-policy');
+const {
+    ROUTER_FST_FILE,
+    loadRouterManifest,
+    ownersFromLookupLines,
+    routeModels,
+} = require('./fst-router');
 
 function loadLocalEnvFile() {
     const envPath = path.join(__dirname, '.env');
@@ -1712,6 +1718,9 @@ const CORE_FST_FILES = [
 
 // Long-lived flookup child processes: Map<fstName, { process, callbackQueue, alive }>
 const fstProcesses = new Map();
+// Optional any-model router, kept apart from the analyzers it routes to.
+const routerProcesses = new Map();
+let routerModels = null;
 let flookupAvailable = false;
 
 function checkFlookup() {
@@ -1723,7 +1732,7 @@ function checkFlookup() {
     }
 }
 
-function spawnFlookupProcess(fstName, attempt = 1) {
+function spawnFlookupProcess(fstName, attempt = 1, registry = fstProcesses) {
     const fstPath = path.join(FST_DIR, fstName);
     if (!fs.existsSync(fstPath)) return null;
 
@@ -1782,14 +1791,14 @@ function spawnFlookupProcess(fstName, attempt = 1) {
         if (attempt < maxAttempts) {
             console.log(`  flookup ${fstName} exited (code ${code}), respawning (attempt ${attempt + 1})...`);
             setTimeout(() => {
-                const newEntry = spawnFlookupProcess(fstName, attempt + 1);
+                const newEntry = spawnFlookupProcess(fstName, attempt + 1, registry);
                 if (newEntry) {
-                    fstProcesses.set(fstName, newEntry);
+                    registry.set(fstName, newEntry);
                 }
             }, 5000);
         } else {
             console.log(`  flookup ${fstName} exited after ${maxAttempts} attempts, giving up`);
-            fstProcesses.delete(fstName);
+            registry.delete(fstName);
         }
     });
 
@@ -1841,6 +1850,22 @@ function initFstProcesses() {
         }
     }
 
+    const router = loadRouterManifest(FST_DIR);
+    if (router && router.models.every((fstName) => availableFsts.includes(fstName))) {
+        const entry = spawnFlookupProcess(router.fstName, 1, routerProcesses);
+        if (entry) {
+            routerProcesses.set(router.fstName, entry);
+            routerModels = router.models;
+            console.log(`  Started: ${router.fstName} (routes ${router.models.length} models)`);
+            const unrouted = availableFsts.filter((fstName) => !router.models.includes(fstName));
+            if (unrouted.length > 0) {
+                console.log(`  Not covered by ${router.fstName}, always queried: ${unrouted.join(', ')}`);
+            }
+        }
+    } else if (fs.existsSync(path.join(FST_DIR, ROUTER_FST_FILE))) {
+        console.log(`  Skipped: ${ROUTER_FST_FILE} does not match the installed models`);
+    }
+
     console.log(`FST validation ready (${fstProcesses.size} models loaded)`);
 }
 
@@ -1878,7 +1903,42 @@ function lookupWord(fstEntry, word) {
 }
 
 /**
- * Validate a word against ALL FST models.
+ * Ask the router which models can analyze a word.
+ * Resolves to the owning model names ([] if none), or null if the router
+ * did not answer, in which case every model must be asked.
+ */
+function lookupOwners(routerEntry, word) {
+    return new Promise((resolve) => {
+        if (!routerEntry.alive) {
+            resolve(null);
+            return;
+        }
+
+        const cb = {
+            lines: [],
+            resolve: (lines) => {
+                clearTimeout(timeoutId);
+                resolve(lines.length > 0 ? ownersFromLookupLines(lines, routerModels) : null);
+            },
+        };
+
+        const timeoutId = setTimeout(() => {
+            const idx = routerEntry.callbackQueue.indexOf(cb);
+            if (idx >= 0) {
+                routerEntry.callbackQueue.splice(idx, 1);
+            }
+            resolve(null);
+        }, 3000);
+
+        routerEntry.callbackQueue.push(cb);
+
+        routerEntry.process.stdin.write(word + '\n');
+    });
+}
+
+/**
+ * Validate a word against the FST models that can analyze it (ALL models
+ * when the router is unavailable).
  * Returns true if any FST returns at least one gameplay-safe analysis.
  */
 async function validateWordWithFsts(word) {
@@ -1891,9 +1951,25 @@ async function validateWordWithFsts(word) {
     }
 
     // Check all FSTs in parallel — return true as soon as any recognizes the word
-    const entries = Array.from(fstProcesses.values()).filter(e => e.alive);
+    let entries = Array.from(fstProcesses.values()).filter(e => e.alive);
     if (entries.length === 0) return !STRICT_SERVER_VALIDATION;
 
+    // One router lookup rejects unknown words outright and narrows known
+    // ones to their owning models (plus any model the router does not
+    // cover); the policy check below is unchanged.
+    const routerEntry = routerProcesses.get(ROUTER_FST_FILE);
+    if (routerEntry && routerModels) {
+        const owners = await lookupOwners(routerEntry, normalizedWord);
+        if (owners) {
+            const { models, ownerDown } = routeModels(entries.map(e => e.fstName), owners, routerModels);
+            if (models.length === 0) {
+                // An owning model that is down is server-validation unavailability.
+                return ownerDown ? !STRICT_SERVER_VALIDATION : false;
+            }
+            entries = entries.filter(e => models.includes(e.fstName));
+        }
+    }
+
     // Use Promise.any-like behavior: resolve true on first recognition
     return new Promise((resolve) => {
         let pending = entries.length;
@@ -2455,6 +2531,13 @@ process.on('SIGINT', () => {
         }
     }
     fstProcesses.clear();
+    for (const [name, entry] of routerProcesses) {
+        if (entry.alive && entry.process) {
+            entry.process.kill();
+            console.log(`  Killed flookup: ${name}`);
+        }
+    }
+    routerProcesses.clear();
 
     analytics.close();
 
@@ -0,0 +1,70 @@
+const assert = require('node:assert/strict');
+const crypto = require('node:crypto');
+const fs = require('node:fs');
+const os = require('node:os');
+const path = require('node:path');
+const test = require('node:test');
+
+const {
+    ROUTER_FST_FILE,
+    ROUTER_SIDECAR_FILE,
+    loadRouterManifest,
+    ownersFromLookupLines,
+    routeModels,
+} = require('../fst-router');
+
+function sha256(text) {
+    return crypto.createHash('sha256').update(text).digest('hex');
+}
+
+function writeRouterDir(models) {
+    const dir = fs.mkdtempSync(path.join(os.tmpdir(), 'fst-router-'));
+    for (const [name, content] of Object.entries(models)) {
+        fs.writeFileSync(path.join(dir, name), content);
+    }
+    fs.writeFileSync(path.join(dir, ROUTER_FST_FILE), 'router');
+    fs.writeFileSync(path.join(dir, ROUTER_SIDECAR_FILE), JSON.stringify({
+        schema_version: 1,
+        file: ROUTER_FST_FILE,
+        sha256: sha256('router'),
+        tag_format: 'model-file-symbol',
+        bits: Object.entries(models).map(([model, content], bit) => ({ bit, model, sha256: sha256(content) })),
+    }));
+    return dir;
+}
+
+test('router lookup lines map to owning models in bit order', () => {
+    const models = ['noun.fst', 'adj.fst', 'verb-c3.fst'];
+    assert.deepEqual(ownersFromLookupLines([
+        'படி\tverb-c3.fst',
+        'படி\tnoun.fst',
+    ], models), ['noun.fst', 'verb-c3.fst']);
+    assert.deepEqual(ownersFromLookupLines(['xyz\t+?'], models), []);
+});
+
+test('a router is only used while its source models are unchanged', () => {
+    const dir = writeRouterDir({ 'noun.fst': 'noun', 'adj.fst': 'adj' });
+    assert.deepEqual(loadRouterManifest(dir), {
+        fstName: ROUTER_FST_FILE,
+        models: ['noun.fst', 'adj.fst'],
+    });
+    fs.writeFileSync(path.join(dir, 'adj.fst'), 'rebuilt adj');
+    assert.equal(loadRouterManifest(dir), null);
+    fs.rmSync(dir, { recursive: true, force: true });
+});
+
+test('routing keeps models the router does not cover and flags dead owners', () => {
+    const routerModels = ['noun.fst', 'adj.fst'];
+    assert.deepEqual(
+        routeModels(['noun.fst', 'adj.fst', 'verb-c3.fst'], ['adj.fst'], routerModels),
+        { models: ['adj.fst', 'verb-c3.fst'], ownerDown: false },
+    );
+    assert.deepEqual(
+        routeModels(['noun.fst', 'adj.fst'], [], routerModels),
+        { models: [], ownerDown: false },
+    );
+    assert.deepEqual(
+        routeModels(['noun.fst'], ['adj.fst'], routerModels),
+        { models: [], ownerDown: true },
+    );
+});
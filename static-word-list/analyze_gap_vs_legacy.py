@@ -8,13 +8,16 @@ from __future__ import annotations
 import json
 import random
 import re
-import subprocess
+import sys
 import unicodedata
 from pathlib import Path
 from typing import Dict, Iterable, List, Set, Tuple
 
 SCRIPT_DIR = Path(__file__).parent
 ROOT = SCRIPT_DIR.parent
+sys.path.insert(0, str(ROOT / "fst" / "lib"))
+import flookup_pool  # noqa: E402
+
 CACHE_DIR = SCRIPT_DIR / "cache"
 REPORT_JSON = SCRIPT_DIR / "gap_vs_legacy_report.json"
 REPORT_MD = SCRIPT_DIR / "gap_vs_legacy_report.md"
@@ -67,16 +70,10 @@ def load_legacy_words() -> Set[str]:
 
 
 def run_flookup(fst_path: Path, words: List[str]) -> Dict[str, str]:
-    payload = "\n".join(words) + "\n"
-    result = subprocess.run(["flookup", str(fst_path)], input=payload, text=True, capture_output=True, check=False)
     out: Dict[str, str] = {}
-    for line in result.stdout.splitlines():
-        if "\t" not in line:
-            continue
-        left, right = line.split("\t", 1)
-        right = right.strip()
-        if right != "+?" and left not in out:
-            out[left] = right
+    for word, analyses in flookup_pool.analyze(fst_path, words).items():
+        if analyses:
+            out[word] = analyses[0]
     return out
 
 
@@ -13,12 +13,18 @@ Outputs:
 - static-word-list/lemma_dictionary.txt: source headword/lemma inventory
 """
 
+import argparse
 import re
 import os
 import gzip
+import sys
 import urllib.request
 import unicodedata
 from pathlib import Path
+from typing import Iterable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "fst" / "lib"))
+from sorted_runs import SortedRuns, budget_from_mb, peak_rss_mb  # noqa: E402
 
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -195,51 +201,51 @@ def download_vuizur_tsv() -> set:
     return words
 
 
-def load_fst_forms() -> set:
-    """Load FST-generated surface forms (from generate_fst_forms.py output)."""
-    words = set()
+def load_fst_forms(into: SortedRuns, source: int) -> int:
+    """Add FST-generated surface forms (generate_fst_forms.py output) to ``into``."""
     if not FST_FORMS_FILE.exists():
         print(f"  WARNING: {FST_FORMS_FILE} not found.")
         print(f"  Run: python3 generate_fst_forms.py  (requires foma toolkit)")
-        return words
-
-    with open(FST_FORMS_FILE, 'r', encoding='utf-8') as f:
-        for line in f:
-            word = line.strip()
-            if word and is_pure_tamil(word):
-                words.add(word)
-
-    print(f"  FST forms: {len(words)} unique words loaded")
-    return words
+        return 0
+    count = add_word_file(FST_FORMS_FILE, into, source)
+    print(f"  FST forms: {count} words loaded")
+    return count
 
 
-def load_heuristic_forms() -> set:
-    """Load optional heuristic-classified lemma forms."""
-    words = set()
+def load_heuristic_forms(into: SortedRuns, source: int) -> int:
+    """Add optional heuristic-classified lemma forms to ``into``."""
     if not HEURISTIC_FORMS_FILE.exists():
         print(f"  Heuristic forms file not found: {HEURISTIC_FORMS_FILE} (skipping)")
-        return words
-    with open(HEURISTIC_FORMS_FILE, 'r', encoding='utf-8') as f:
+        return 0
+    count = add_word_file(HEURISTIC_FORMS_FILE, into, source)
+    print(f"  Heuristic forms: {count} words loaded")
+    return count
+
+
+def add_word_file(path: Path, into: SortedRuns, source: int) -> int:
+    """Stream one-word-per-line Tamil words into ``into``; returns lines taken."""
+    count = 0
+    with open(path, 'r', encoding='utf-8') as f:
         for line in f:
             word = line.strip()
             if word and is_pure_tamil(word):
-                words.add(word)
-    print(f"  Heuristic forms: {len(words)} unique words loaded")
-    return words
-
+                into.add(word, source)
+                count += 1
+    return count
 
 
-def write_word_list(path: Path, words: set[str], label: str) -> list[str]:
-    """Write a sorted word list and report its size."""
-    sorted_words = sorted(words)
+def write_word_list(path: Path, sorted_words: Iterable[str], label: str) -> int:
+    """Write an already sorted word list and report its size."""
     path.parent.mkdir(exist_ok=True)
+    count = 0
     with open(path, 'w', encoding='utf-8') as f:
         for word in sorted_words:
             f.write(word + '\n')
+            count += 1
     size_mb = path.stat().st_size / (1024 * 1024)
-    print(f"  {label}: {len(sorted_words)} words, {size_mb:.1f} MB")
+    print(f"  {label}: {count} words, {size_mb:.1f} MB")
     print(f"  Output: {path}")
-    return sorted_words
+    return count
 
 
 def write_lemma_dictionary(words: set[str]) -> set[str]:
@@ -250,10 +256,25 @@ def write_lemma_dictionary(words: set[str]) -> set[str]:
     to validate generated inflections that are not present locally.
     """
     lemma_words = {w for w in words if is_lexical_headword(w)}
-    write_word_list(LEMMA_DICTIONARY_FILE, lemma_words, "Lemma dictionary")
+    write_word_list(LEMMA_DICTIONARY_FILE, sorted(lemma_words), "Lemma dictionary")
     return lemma_words
 
+
+# Source tags in the full-dictionary union; a word counts as new for the first
+# source that contributed it.
+LEXICAL_SOURCE, FST_SOURCE, HEURISTIC_SOURCE = range(3)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Build Solmaalai static dictionary artifacts.")
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=int(os.environ.get("DICTIONARY_MEMORY_BUDGET_MB", "0")),
+        help="spill the full word union to sorted runs on disk past this size "
+        "(0 = keep it in memory; env DICTIONARY_MEMORY_BUDGET_MB)",
+    )
+    args = parser.parse_args()
     print("Building Solmaalai Tamil dictionary...\n")
 
     excluded_wiktionary = load_wiktionary_exclusions()
@@ -301,50 +322,58 @@ def main():
     )
     lemma_words = write_lemma_dictionary(lemma_source_words)
 
-    # Step 4: FST-generated forms (noun/adj/adv/part/pronoun + verb classes)
-    print("\nStep 4: Loading FST-generated surface forms...")
-    fst_words = load_fst_forms()
-    new_from_fst = fst_words - all_words
-    print(f"  New words from FST models: {len(new_from_fst)}")
-    all_words |= fst_words
-
-    include_heuristic_lemmas = str(os.environ.get("INCLUDE_HEURISTIC_LEMMAS", "")).lower() == "true"
-    include_heuristic_inflections = str(os.environ.get("INCLUDE_HEURISTIC_INFLECTIONS", "")).lower() == "true"
-    if include_heuristic_lemmas or include_heuristic_inflections:
-        print("\nStep 5: Loading heuristic-classified lemma forms...")
-        heuristic_words = load_heuristic_forms()
-        new_from_heuristic = heuristic_words - all_words
-        print(f"  New words from heuristic forms: {len(new_from_heuristic)}")
-        all_words |= heuristic_words
-        filter_step = 6
-        write_step = 7
-    else:
-        filter_step = 5
-        write_step = 6
-
-    # Filter by length (max 15 Tamil letters for the 15x15 board)
-    print(f"\nStep {filter_step}: Filtering to ≤15 Tamil letters...")
-    before = len(all_words)
-    all_words = {
-        w for w in all_words
-        if tamil_letter_count(w) <= 15 and w not in excluded_gameplay
-    }
-    print(f"  Filtered: {before} → {len(all_words)} words")
-
-    print(f"\nStep {write_step}: Writing dictionary artifacts...")
-    full_words = set(all_words)
-    client_words = {w for w in lemma_words if tamil_letter_count(w) <= 15}
-    assert not (client_words & excluded_gameplay), "proper-name exclusions leaked into client dictionary"
-
-    print("  Full generated dictionary keeps lexical sources plus generated forms.")
-    full_sorted = write_word_list(FULL_DICTIONARY_FILE, full_words, "Full generated dictionary")
+    # The generated forms run to millions of words, so the full dictionary is
+    # a SortedRuns union: spilled to sorted runs past --memory-budget-mb and
+    # written from their k-way merge. Run files are deleted however the
+    # build ends.
+    with SortedRuns(budget_from_mb(args.memory_budget_mb)) as full_union:
+        full_union.update(all_words, LEXICAL_SOURCE)
+
+        # Step 4: FST-generated forms (noun/adj/adv/part/pronoun + verb classes)
+        print("\nStep 4: Loading FST-generated surface forms...")
+        load_fst_forms(full_union, FST_SOURCE)
+
+        include_heuristic_lemmas = str(os.environ.get("INCLUDE_HEURISTIC_LEMMAS", "")).lower() == "true"
+        include_heuristic_inflections = str(os.environ.get("INCLUDE_HEURISTIC_INFLECTIONS", "")).lower() == "true"
+        include_heuristic = include_heuristic_lemmas or include_heuristic_inflections
+        if include_heuristic:
+            print("\nStep 5: Loading heuristic-classified lemma forms...")
+            load_heuristic_forms(full_union, HEURISTIC_SOURCE)
+            filter_step = 6
+            write_step = 7
+        else:
+            filter_step = 5
+            write_step = 6
+
+        # Filter by length (max 15 Tamil letters for the 15x15 board) while the
+        # merged union is written out.
+        print(f"\nStep {filter_step}: Filtering to ≤15 Tamil letters...")
+        print(f"\nStep {write_step}: Writing dictionary artifacts...")
+        new_by_source = [0, 0, 0]
+
+        def full_words():
+            for word, source in full_union.merged():
+                new_by_source[source] += 1
+                if tamil_letter_count(word) <= 15 and word not in excluded_gameplay:
+                    yield word
+
+        client_words = {w for w in lemma_words if tamil_letter_count(w) <= 15}
+        assert not (client_words & excluded_gameplay), "proper-name exclusions leaked into client dictionary"
+
+        print("  Full generated dictionary keeps lexical sources plus generated forms.")
+        full_count = write_word_list(FULL_DICTIONARY_FILE, full_words(), "Full generated dictionary")
+        print(f"  New words from FST models: {new_by_source[FST_SOURCE]}")
+        if include_heuristic:
+            print(f"  New words from heuristic forms: {new_by_source[HEURISTIC_SOURCE]}")
+        print(f"  Filtered: {sum(new_by_source)} → {full_count} words ({len(full_union.runs)} spilled runs)")
 
     print("  Client dictionary is compact headword lookup; server FST validates misses.")
-    client_sorted = write_word_list(CLIENT_DICTIONARY_FILE, client_words, "Client dictionary")
+    client_count = write_word_list(CLIENT_DICTIONARY_FILE, sorted(client_words), "Client dictionary")
 
     print("\nDone!")
-    print(f"Full generated dictionary: {len(full_sorted)} words")
-    print(f"Client dictionary: {len(client_sorted)} words")
+    print(f"Full generated dictionary: {full_count} words")
+    print(f"Client dictionary: {client_count} words")
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB")
 
 
 if __name__ == '__main__':
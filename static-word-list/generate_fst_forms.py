@@ -12,6 +12,8 @@ Output:
 - static-word-list/fst_classified_headwords.json
 """
 
+import argparse
+import hashlib
 import json
 import os
 import re
@@ -19,8 +21,19 @@ import gzip
 import subprocess
 import sys
 import unicodedata
+from array import array
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Set, Tuple
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "fst" / "lib"))
+import lexc_index  # noqa: E402
+from flookup_cache import LookupCache, model_digest  # noqa: E402
+from flookup_pool import BACKEND_ENV, BACKENDS, default_backend, shared_pool  # noqa: E402
+from model_router import load_router  # noqa: E402
+from sorted_runs import SortedRuns, budget_from_mb, peak_rss_mb  # noqa: E402
 
 SCRIPT_DIR = Path(__file__).parent
 PROJECT_ROOT = SCRIPT_DIR.parent
@@ -37,13 +50,25 @@ VUIZUR_CACHE_FILE = SCRIPT_DIR / "cache" / "vuizur_tamil.tsv"
 TAWIKTIONARY_TITLES_CACHE_FILE = SCRIPT_DIR / "cache" / "tawiktionary-latest-all-titles-in-ns0.gz"
 TAWIKTIONARY_POS_JSONL_CACHE_FILE = SCRIPT_DIR / "cache" / "tawiktionary_pos_headwords.jsonl"
 WIKTIONARY_EXCLUSIONS_FILE = SCRIPT_DIR / "wiktionary_exclusions.txt"
+LOOKUP_CACHE_FILE = SCRIPT_DIR / "cache" / "flookup_results.sqlite3"
+GENERATION_STATE_FILE = SCRIPT_DIR / "cache" / "fst_generation_state.json.gz"
+GENERATION_STATE_SCHEMA = 1
 TAWIKTIONARY_TITLES_URL = (
     "https://dumps.wikimedia.org/tawiktionary/latest/"
     "tawiktionary-latest-all-titles-in-ns0.gz"
 )
 
 MAX_TAMIL_LETTERS = 15
+# Longest lemma suffix the heuristic class predictor votes on (env HEURISTIC_SUFFIX_WINDOW).
+HEURISTIC_SUFFIX_WINDOW = 4
 CHUNK_SIZE = 5000
+# Lookup batch handed to each --jobs worker; large enough to amortize pickling,
+# small enough that the noun model alone spreads across every core.
+PARALLEL_CHUNK_SIZE = 20000
+# flookup workers each --jobs process keeps open. At most two models (and both
+# directions of one) have chunks in flight at a time, so more would only keep
+# idle models loaded in every process.
+FLOOKUPS_PER_JOB = 4
 TAMIL_CHAR_RE = re.compile(r'^[\u0B80-\u0BFF]+$')
 TAMIL_DIGIT_RE = re.compile(r'[\u0BE6-\u0BEF\u0BF0-\u0BF9]')
 SANDHI_ANALYSIS_RE = re.compile(r'\+sandhi(?:[a-z]+|-r)')
@@ -144,6 +169,9 @@ POS_TO_ALLOWED_CLASSES = {
     "pronoun": {"pronoun.fst"},
 }
 VERB_CLASSES = POS_TO_ALLOWED_CLASSES["verb"]
+# Class membership is a bitmask per lemma: bit i is FST_ORDER[i].
+CLASS_BITS = {klass: 1 << i for i, klass in enumerate(FST_ORDER)}
+VERB_CLASS_MASK = sum(CLASS_BITS[klass] for klass in VERB_CLASSES)
 POS_DEFAULT_CLASS = {
     "noun": "noun.fst",
     "name": "noun.fst",
@@ -386,38 +414,136 @@ def load_tamil_wiktionary_pos_cache() -> Tuple[Set[str], Dict[str, Set[str]]]:
     return words, pos_hints
 
 
-def run_flookup(fst_path: Path, inputs: List[str], inverse: bool = False) -> List[str]:
-    cmd = ["flookup"]
-    if inverse:
-        cmd.append("-i")
-    cmd.append(str(fst_path))
-    payload = "\n".join(inputs) + "\n"
-    try:
-        result = subprocess.run(
-            cmd,
-            input=payload,
-            capture_output=True,
-            text=True,
-            timeout=240,
-        )
-        return result.stdout.splitlines()
-    except subprocess.TimeoutExpired:
-        return []
+LOOKUP_CACHE: Optional[LookupCache] = None
+
+
+def classes_of_mask(mask: int) -> Set[str]:
+    return {klass for klass, bit in CLASS_BITS.items() if mask & bit}
+
+
+class LemmaPool:
+    """The sorted headword pool, interned: ``ids[lemma]`` indexes ``lemmas``."""
+
+    def __init__(self, lemmas: List[str]) -> None:
+        self.lemmas = lemmas
+        self.ids: Dict[str, int] = {lemma: i for i, lemma in enumerate(lemmas)}
+
+
+class ClassMembership:
+    """FST classes of pooled lemmas as one class bitmask per lemma id."""
+
+    def __init__(self, pool: LemmaPool) -> None:
+        self.pool = pool
+        self.masks = array("I", [0]) * len(pool.lemmas)
+
+    def add(self, lemma: str, klass: str) -> None:
+        self.masks[self.pool.ids[lemma]] |= CLASS_BITS[klass]
+
+    def mask(self, lemma: str) -> int:
+        lemma_id = self.pool.ids.get(lemma)
+        return self.masks[lemma_id] if lemma_id is not None else 0
+
+    def __contains__(self, lemma: str) -> bool:
+        return bool(self.mask(lemma))
+
+    def classes(self, lemma: str) -> Set[str]:
+        return classes_of_mask(self.mask(lemma))
+
+    def masked(self) -> Iterator[Tuple[str, int]]:
+        """(lemma, mask) for every lemma with at least one class, in pool order."""
+        for lemma, mask in zip(self.pool.lemmas, self.masks):
+            if mask:
+                yield lemma, mask
+
+    def items(self) -> Iterator[Tuple[str, Set[str]]]:
+        for lemma, mask in self.masked():
+            yield lemma, classes_of_mask(mask)
+
+
+class AnalysisPlan:
+    """Stem x tag-list analyses, held as ids until they are looked up.
+
+    ``template_sets`` is the tag table; each row pairs an interned stem with
+    one tag list. Iterating yields ``stem + tag`` strings one at a time, so the
+    full cross product never exists in memory, and ``chunks`` splits the rows
+    for the --jobs pool without materializing anything either.
+    """
+
+    def __init__(self, template_sets: Optional[List[List[str]]] = None) -> None:
+        self.template_sets: List[List[str]] = template_sets if template_sets is not None else []
+        self.stems: List[str] = []
+        self.stem_ids: Dict[str, int] = {}
+        self.row_stems = array("I")
+        self.row_sets = array("I")
+        self.size = 0
+
+    def template_set(self, tags: List[str]) -> int:
+        self.template_sets.append(tags)
+        return len(self.template_sets) - 1
+
+    def add(self, stem: str, set_id: int) -> None:
+        tags = self.template_sets[set_id]
+        if not tags:
+            return
+        stem_id = self.stem_ids.get(stem)
+        if stem_id is None:
+            stem_id = self.stem_ids[stem] = len(self.stems)
+            self.stems.append(stem)
+        self.row_stems.append(stem_id)
+        self.row_sets.append(set_id)
+        self.size += len(tags)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self) -> Iterator[str]:
+        stems = self.stems
+        template_sets = self.template_sets
+        for stem_id, set_id in zip(self.row_stems, self.row_sets):
+            stem = stems[stem_id]
+            for tag in template_sets[set_id]:
+                yield stem + tag
+
+    def chunks(self, size: int) -> Iterator["AnalysisPlan"]:
+        """Sub-plans of about ``size`` analyses each, split between rows."""
+        chunk = AnalysisPlan(self.template_sets)
+        for stem_id, set_id in zip(self.row_stems, self.row_sets):
+            if chunk.size >= size:
+                yield chunk
+                chunk = AnalysisPlan(self.template_sets)
+            chunk.add(self.stems[stem_id], set_id)
+        if chunk.size:
+            yield chunk
+
+
+def configure_lookup_cache(path: Optional[Path], max_bytes: int) -> None:
+    """Enable the on-disk result cache."""
+    global LOOKUP_CACHE
+    LOOKUP_CACHE = LookupCache(path, max_bytes=max_bytes) if path is not None else None
+
+
+def configure_lookup_worker(path: Optional[Path], max_bytes: int) -> None:
+    """--jobs worker initializer: the result cache plus a capped flookup pool."""
+    configure_lookup_cache(path, max_bytes)
+    shared_pool().max_workers = FLOOKUPS_PER_JOB
+
+
+def run_flookup(fst_path: Path, inputs: Iterable[str], inverse: bool = False) -> Iterable[Tuple[str, List[str]]]:
+    """Stream (input, results) pairs through the shared persistent flookup worker."""
+    worker = shared_pool().worker(fst_path, inverse=inverse)
+    if LOOKUP_CACHE is not None:
+        return LOOKUP_CACHE.stream(worker, inputs, batch_size=CHUNK_SIZE)
+    return worker.stream(inputs, window=CHUNK_SIZE)
 
 
 def forward_classify(fst_path: Path, lemmas: List[str]) -> List[Tuple[str, str]]:
     classified: List[Tuple[str, str]] = []
-    total = len(lemmas)
-    for i in range(0, total, CHUNK_SIZE):
-        chunk = lemmas[i:i + CHUNK_SIZE]
-        lines = run_flookup(fst_path, chunk, inverse=False)
-        for line in lines:
-            parts = line.split("\t")
-            if len(parts) >= 2 and parts[1].strip() != "+?":
-                lemma = parts[0].strip()
-                analysis = parts[1].strip()
-                if lemma:
-                    classified.append((lemma, analysis))
+    for lemma, analyses in run_flookup(fst_path, lemmas, inverse=False):
+        lemma = lemma.strip()
+        if not lemma:
+            continue
+        for analysis in analyses:
+            classified.append((lemma, analysis))
     return classified
 
 
@@ -428,37 +554,148 @@ def is_sandhi_analysis(analysis: str) -> bool:
 
 def inverse_generate_forms(fst_path: Path, analyses: Iterable[str]) -> Set[str]:
     forms: Set[str] = set()
-    items = [analysis for analysis in analyses if not is_sandhi_analysis(analysis)]
-    total = len(items)
-    for i in range(0, total, CHUNK_SIZE):
-        chunk = items[i:i + CHUNK_SIZE]
-        lines = run_flookup(fst_path, chunk, inverse=True)
-        for line in lines:
-            parts = line.split("\t")
-            if len(parts) >= 2:
-                surface = parts[1].strip()
-                if surface != "+?" and is_valid_form(surface):
-                    forms.add(surface)
+    items = (analysis for analysis in analyses if not is_sandhi_analysis(analysis))
+    for _analysis, surfaces in run_flookup(fst_path, items, inverse=True):
+        for surface in surfaces:
+            if is_valid_form(surface):
+                forms.add(surface)
     return forms
 
 
+def inverse_generate_forms_by_lemma(fst_path: Path, analyses: Iterable[str]) -> Dict[str, Set[str]]:
+    """Like inverse_generate_forms, but keeps the surfaces each lemma contributed."""
+    by_lemma: Dict[str, Set[str]] = {}
+    items = (analysis for analysis in analyses if not is_sandhi_analysis(analysis))
+    for analysis, surfaces in run_flookup(fst_path, items, inverse=True):
+        bucket = by_lemma.setdefault(analysis.split("+", 1)[0], set())
+        bucket.update(surface for surface in surfaces if is_valid_form(surface))
+    return by_lemma
+
+
 def forward_filter_forms(fst_path: Path, forms: Iterable[str]) -> Set[str]:
     """Keep only forms that are forward-recognized by the given class FST."""
     words = sorted(set(forms))
     if not words:
         return set()
     accepted: Set[str] = set()
-    total = len(words)
-    for i in range(0, total, CHUNK_SIZE):
-        chunk = words[i:i + CHUNK_SIZE]
-        lines = run_flookup(fst_path, chunk, inverse=False)
-        for line in lines:
-            parts = line.split("\t")
-            if len(parts) >= 2 and parts[1].strip() != "+?":
-                accepted.add(parts[0].strip())
+    for word, analyses in run_flookup(fst_path, words, inverse=False):
+        if analyses:
+            accepted.add(word.strip())
     return accepted
 
 
+def lookup_chunks(items: Iterable[str], size: int) -> Iterator[Union[List[str], AnalysisPlan]]:
+    """Cut ``items`` into picklable chunks of about ``size`` queries, lazily."""
+    if isinstance(items, AnalysisPlan):
+        yield from items.chunks(size)
+        return
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class LookupFeed:
+    """A batch lookup run inline, or chunked across the --jobs process pool.
+
+    At most ``window`` chunks of this feed are in flight: the next chunk is cut from
+    ``items`` only when the oldest result is taken, so a lazy AnalysisPlan or
+    generator is never materialized beyond the window, and finished results
+    do not pile up ahead of the consumer. The first window is submitted on
+    construction, so the pool starts on it before anyone iterates. Iterating
+    yields each chunk's result in input order. With ``chunked``, ``items`` is
+    already an iterable of chunks, e.g. results streaming out of another feed.
+    """
+
+    def __init__(
+        self,
+        executor: Optional[Executor],
+        fn: Callable[[Path, List[str]], object],
+        fst_path: Path,
+        items: Iterable,
+        window: int,
+        chunked: bool = False,
+    ) -> None:
+        self.executor = executor
+        self.fn = fn
+        self.fst_path = fst_path
+        self.items = items
+        self.window = max(window, 1)
+        self.chunked = chunked
+        self.pending: Deque[Future] = deque()
+        self.chunks: Iterator = iter(())
+        if executor is not None:
+            self.chunks = iter(items) if chunked else lookup_chunks(items, PARALLEL_CHUNK_SIZE)
+            self._fill()
+
+    def _fill(self) -> None:
+        while len(self.pending) < self.window:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                return
+            self.pending.append(self.executor.submit(run_lookup_chunk, self.fn, self.fst_path, chunk))
+
+    def __iter__(self) -> Iterator:
+        if self.executor is None:
+            if self.chunked:
+                for chunk in self.items:
+                    yield self.fn(self.fst_path, chunk)
+            else:
+                yield self.fn(self.fst_path, self.items)
+            return
+        while self.pending:
+            future = self.pending.popleft()
+            self._fill()
+            yield chunk_result(future)
+
+
+def run_lookup_chunk(
+    fn: Callable[[Path, List[str]], object], fst_path: Path, items: List[str],
+) -> Tuple[object, Optional[Dict[str, object]]]:
+    """Worker-side wrapper that ships cache counters back to the parent."""
+    result = fn(fst_path, items)
+    return result, (LOOKUP_CACHE.take_stats() if LOOKUP_CACHE is not None else None)
+
+
+def chunk_result(future: Future):
+    result, cache_stats = future.result()
+    if cache_stats is not None and LOOKUP_CACHE is not None:
+        LOOKUP_CACHE.absorb(cache_stats)
+    return result
+
+
+def gather_list(feed: LookupFeed) -> List:
+    return [row for result in feed for row in result]
+
+
+def gather_set(feed: LookupFeed) -> Set[str]:
+    merged: Set[str] = set()
+    for result in feed:
+        merged |= result
+    return merged
+
+
+def prefetched(items: Iterable, ahead: int) -> Iterator:
+    """Iterate ``items``, producing up to ``ahead`` further items before each is returned."""
+    buffered: Deque = deque()
+    for item in items:
+        buffered.append(item)
+        if len(buffered) > ahead:
+            yield buffered.popleft()
+    yield from buffered
+
+
+def fresh_surfaces(results: Iterable[Set[str]], seen: Set[str]) -> Iterator[List[str]]:
+    """Each result's surfaces not yet in ``seen`` (and now added to it), as a chunk."""
+    for surfaces in results:
+        fresh = sorted(surfaces - seen)
+        seen.update(fresh)
+        if fresh:
+            yield fresh
+
+
 def resolve_verb_lexc(fst_name: str) -> Optional[Path]:
     for candidate in VERB_LEXC_CANDIDATES.get(fst_name, []):
         if candidate.exists():
@@ -467,30 +704,28 @@ def resolve_verb_lexc(fst_name: str) -> Optional[Path]:
 
 
 def extract_verb_templates_from_lexc(lexc_path: Path, conservative: bool = True) -> List[str]:
+    index = lexc_index.load(lexc_path)
+    # Finite declarations may now route through an optional question
+    # continuation. Its epsilon branch is terminal-equivalent to '#'.
+    relations = [relation for _, relation in index.terminals] + [
+        entry.lexical
+        for entry in index.entries
+        if entry.continuation in ("VerbQuestion", "VerbQuestionNeuterPlural")
+    ]
     templates: Set[str] = set()
-    with open(lexc_path, "r", encoding="utf-8") as f:
-        for raw in f:
-            line = raw.strip()
-            if not line.startswith("+verb"):
-                continue
-            # Finite declarations may now route through an optional question
-            # continuation. Its epsilon branch is terminal-equivalent to '#'.
-            if "#;" not in line and not line.endswith(
-                (" VerbQuestion;", " VerbQuestionNeuterPlural;")
-            ):
-                continue
-            # Keep lexical analysis side only (drop surface rewrite side after ':')
-            lexical = line.split(":", 1)[0].strip()
-            lexical = lexical.replace("%=", "=")
-            # Remove trailing '#' terminator if present in same side
-            lexical = lexical.rstrip("#").strip()
-            if not lexical.startswith("+verb"):
-                continue
-            if conservative:
-                if is_supported_verb_template(lexical):
-                    templates.add(lexical)
-            else:
+    for relation in relations:
+        # Keep lexical analysis side only (drop surface rewrite side after ':')
+        lexical = relation.split(":", 1)[0].strip()
+        lexical = lexical.replace("%=", "=")
+        # Remove trailing '#' terminator if present in same side
+        lexical = lexical.rstrip("#").strip()
+        if not lexical.startswith("+verb"):
+            continue
+        if conservative:
+            if is_supported_verb_template(lexical):
                 templates.add(lexical)
+        else:
+            templates.add(lexical)
     return sorted(templates)
 
 
@@ -543,10 +778,90 @@ def is_controlled_heuristic_verb_template(template: str) -> bool:
     return "+imp=∅+2pl=" in template
 
 
-def write_classification_map(class_map: Dict[str, Set[str]]) -> None:
-    serializable = {k: sorted(v) for k, v in sorted(class_map.items())}
-    with open(CLASSIFIED_OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(serializable, f, ensure_ascii=False, indent=2, sort_keys=True)
+def write_text_if_changed(path: Path, text: str) -> bool:
+    """Leave an output untouched when its content would not change."""
+    if path.exists() and path.read_text(encoding="utf-8") == text:
+        return False
+    path.write_text(text, encoding="utf-8")
+    return True
+
+
+def write_json_report(path: Path, payload: object) -> bool:
+    return write_text_if_changed(path, json.dumps(payload, ensure_ascii=False, indent=2, sort_keys=True))
+
+
+def patch_sorted_word_file(path: Path, words: Iterable[str]) -> Tuple[int, int]:
+    """Bring a sorted one-word-per-line file in line with ``words``.
+
+    ``words`` must be sorted and distinct. It is streamed once against the
+    existing (sorted) file, so neither side is held in memory; the file is
+    left untouched when nothing changed. Returns (added, removed).
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    added = removed = 0
+    existed = path.exists()
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        if not existed:
+            for word in words:
+                out.write(word + "\n")
+                added += 1
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                existing = (line.rstrip("\n") for line in f if line.strip())
+                wanted = iter(words)
+                old = next(existing, None)
+                word = next(wanted, None)
+                while old is not None or word is not None:
+                    if word is None or (old is not None and old < word):
+                        removed += 1
+                        old = next(existing, None)
+                        continue
+                    out.write(word + "\n")
+                    if old == word:
+                        old = next(existing, None)
+                    else:
+                        added += 1
+                    word = next(wanted, None)
+    if existed and not added and not removed:
+        tmp_path.unlink()
+    else:
+        os.replace(tmp_path, path)
+    return added, removed
+
+
+def load_generation_state(path: Path, full_fst_generation: bool) -> Optional[Dict[str, object]]:
+    """Return the previous run's snapshot if it can seed an incremental run."""
+    if not path.exists():
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError) as exc:
+        print(f"INFO: Ignoring unreadable generation state ({exc}); running full generation")
+        return None
+    expected = {
+        "schema_version": GENERATION_STATE_SCHEMA,
+        "generator_sha256": model_digest(Path(__file__)),
+        "full_fst_generation": full_fst_generation,
+    }
+    for key, value in expected.items():
+        if state.get(key) != value:
+            print(f"INFO: Generation state {key} changed; running full generation")
+            return None
+    return state
+
+
+def save_generation_state(path: Path, state: Dict[str, object]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def write_classification_map(class_map: ClassMembership) -> None:
+    serializable = {k: sorted(v) for k, v in class_map.items()}
+    write_json_report(CLASSIFIED_OUTPUT_FILE, serializable)
 
 
 def pick_primary_class(classes: Set[str]) -> Optional[str]:
@@ -555,56 +870,117 @@ def pick_primary_class(classes: Set[str]) -> Optional[str]:
     return sorted(classes, key=lambda c: (-CLASS_PRIORITY.get(c, 0), c))[0]
 
 
-def build_suffix_model(training: Dict[str, str], max_suffix_len: int = 4) -> Dict[str, Dict[str, int]]:
-    model: Dict[str, Dict[str, int]] = {}
-    for lemma, klass in training.items():
-        if not lemma:
-            continue
-        for n in range(1, max_suffix_len + 1):
-            if len(lemma) < n:
-                continue
-            suffix = lemma[-n:]
-            bucket = model.setdefault(suffix, {})
-            bucket[klass] = bucket.get(klass, 0) + 1
-    return model
-
-
-def predict_class_with_suffix_model(
-    lemma: str,
-    suffix_model: Dict[str, Dict[str, int]],
-    allowed_classes: Optional[Set[str]] = None,
-    class_counts: Optional[Dict[str, int]] = None,
-    max_suffix_len: int = 4,
-) -> Optional[Tuple[str, float, int, str]]:
-    votes: Dict[str, float] = {}
-    support: Dict[str, int] = {}
-    chosen_suffix = ""
-    for n in range(max_suffix_len, 0, -1):
-        if len(lemma) < n:
-            continue
-        suffix = lemma[-n:]
-        if suffix not in suffix_model:
-            continue
-        class_counts = suffix_model[suffix]
-        chosen_suffix = suffix
-        for klass, count in class_counts.items():
-            if allowed_classes and klass not in allowed_classes:
+class SuffixPredictor:
+    """Suffix-vote class predictor over a reversed-suffix trie.
+
+    Node 0 is the empty suffix and each child prepends one character, so the
+    path a lemma walks from the root visits its suffixes shortest first. Every
+    node keeps a dense count per class id plus the order classes first reached
+    it, which is the vote order (and so the tie-break) of the per-suffix dicts
+    this replaces. A prediction depends only on the deepest node a lemma
+    reaches and its allowed-class mask, so ``predict`` answers each distinct
+    pair once.
+    """
+
+    def __init__(self, training: Dict[str, str], class_counts: Dict[str, int], max_suffix_len: int = 4) -> None:
+        self.max_suffix_len = max_suffix_len
+        self.classes: List[str] = sorted(set(training.values()) | set(class_counts))
+        self.class_ids: Dict[str, int] = {klass: i for i, klass in enumerate(self.classes)}
+        self.global_counts: List[int] = [class_counts.get(klass, 0) for klass in self.classes]
+        self.children: List[Dict[str, int]] = [{}]
+        self.depth: List[int] = [0]
+        self.counts: List[List[int]] = [[0] * len(self.classes)]
+        self.vote_order: List[List[int]] = [[]]
+        for lemma, klass in training.items():
+            if not lemma:
                 continue
-            # Longer suffixes get higher influence.
-            votes[klass] = votes.get(klass, 0.0) + (count * float(n))
-            support[klass] = support.get(klass, 0) + count
-    if not votes:
-        if allowed_classes and class_counts:
-            allowed = [(c, class_counts.get(c, 0)) for c in allowed_classes]
-            allowed = [item for item in allowed if item[1] > 0]
-            if allowed:
-                best_class, best_support = max(allowed, key=lambda kv: kv[1])
-                return best_class, 0.66, int(best_support), ""
-        return None
-    best_class = max(votes.items(), key=lambda kv: kv[1])[0]
-    total = sum(votes.values())
-    confidence = votes[best_class] / total if total > 0 else 0.0
-    return best_class, confidence, support.get(best_class, 0), chosen_suffix
+            class_id = self.class_ids[klass]
+            node = 0
+            for ch in reversed(lemma[-max_suffix_len:]):
+                child = self.children[node].get(ch)
+                if child is None:
+                    child = len(self.children)
+                    self.children[node][ch] = child
+                    self.children.append({})
+                    self.depth.append(self.depth[node] + 1)
+                    self.counts.append([0] * len(self.classes))
+                    self.vote_order.append([])
+                node = child
+                counts = self.counts[node]
+                if not counts[class_id]:
+                    self.vote_order[node].append(class_id)
+                counts[class_id] += 1
+
+    def mask(self, allowed_classes: Optional[Set[str]]) -> Optional[int]:
+        """Bitmask over class ids; None (no restriction) for a missing or empty set."""
+        if not allowed_classes:
+            return None
+        mask = 0
+        for klass in allowed_classes:
+            class_id = self.class_ids.get(klass)
+            if class_id is not None:
+                mask |= 1 << class_id
+        return mask
+
+    def _path(self, lemma: str) -> List[int]:
+        path: List[int] = []
+        node = 0
+        for ch in reversed(lemma[-self.max_suffix_len:]):
+            node = self.children[node].get(ch, -1)
+            if node < 0:
+                break
+            path.append(node)
+        return path
+
+    def _vote(self, path: List[int], mask: Optional[int]) -> Optional[Tuple[str, float, int]]:
+        votes = [0.0] * len(self.classes)
+        support = [0] * len(self.classes)
+        voted: List[int] = []
+        # Longest suffix first; longer suffixes get higher influence.
+        for node in reversed(path):
+            weight = float(self.depth[node])
+            counts = self.counts[node]
+            for class_id in self.vote_order[node]:
+                if mask is not None and not (mask >> class_id) & 1:
+                    continue
+                if not support[class_id]:
+                    voted.append(class_id)
+                votes[class_id] += counts[class_id] * weight
+                support[class_id] += counts[class_id]
+        if not voted:
+            if mask is None or path:
+                return None
+            fallback = [
+                class_id for class_id in range(len(self.classes))
+                if (mask >> class_id) & 1 and self.global_counts[class_id] > 0
+            ]
+            if not fallback:
+                return None
+            best = max(fallback, key=lambda class_id: self.global_counts[class_id])
+            return self.classes[best], 0.66, self.global_counts[best]
+        best = max(voted, key=lambda class_id: votes[class_id])
+        total = sum(votes[class_id] for class_id in voted)
+        confidence = votes[best] / total if total > 0 else 0.0
+        return self.classes[best], confidence, support[best]
+
+    def predict(
+        self, lemmas: Iterable[str], allowed_masks: Iterable[Optional[int]],
+    ) -> List[Optional[Tuple[str, float, int, str]]]:
+        """(class, confidence, support, matched suffix) or None for each lemma.
+
+        ``matched_suffix`` is the shortest suffix found in the trie, or "" for
+        the global-frequency fallback.
+        """
+        memo: Dict[Tuple[int, Optional[int]], Optional[Tuple[str, float, int]]] = {}
+        results: List[Optional[Tuple[str, float, int, str]]] = []
+        for lemma, mask in zip(lemmas, allowed_masks):
+            path = self._path(lemma)
+            key = (path[-1] if path else 0, mask)
+            if key not in memo:
+                memo[key] = self._vote(path, mask)
+            vote = memo[key]
+            results.append(vote + (lemma[-1:] if path else "",) if vote is not None else None)
+        return results
 
 
 def pick_pos_fallback_class(pos_hints: Set[str], allowed_classes: Optional[Set[str]]) -> Optional[str]:
@@ -671,7 +1047,7 @@ def expand_heuristic_verb_lemmas(lemmas: Iterable[str], klass: Optional[str] = N
     return expanded
 
 
-def expand_heuristic_generation_classes(predicted_by_class: Dict[str, List[str]]) -> Dict[str, Set[str]]:
+def expand_heuristic_generation_classes(predicted: ClassMembership) -> Dict[str, List[str]]:
     """
     Map predicted lemmas to the classes used for heuristic inflection synthesis.
 
@@ -681,20 +1057,26 @@ def expand_heuristic_generation_classes(predicted_by_class: Dict[str, List[str]]
     normalized stems against every verb model and rely on forward validation to
     retain only legal outputs.
     """
-    generation_by_class: Dict[str, Set[str]] = {
-        klass: set(lemmas) for klass, lemmas in predicted_by_class.items()
-    }
-    for klass, lemmas in predicted_by_class.items():
-        if klass not in VERB_CLASSES:
-            continue
-        for lemma in lemmas:
-            if not lemma.endswith("தல்"):
-                continue
-            for verb_class in VERB_CLASSES:
-                generation_by_class.setdefault(verb_class, set()).add(lemma)
+    generation_by_class: Dict[str, List[str]] = {}
+    for lemma, mask in predicted.masked():
+        if mask & VERB_CLASS_MASK and lemma.endswith("தல்"):
+            mask |= VERB_CLASS_MASK
+        for klass in classes_of_mask(mask):
+            generation_by_class.setdefault(klass, []).append(lemma)
     return generation_by_class
 
 
+def verb_template_family(stem: str) -> str:
+    """The template family a derived stem is paired with under full generation."""
+    if stem.endswith("ப்படு") or stem.endswith("ப்பெறு"):
+        return "passive"
+    if stem.endswith("திரு") or stem.endswith("விடு"):
+        return "aspect"
+    if stem.endswith("க்க"):
+        return "simple"
+    return "simple+passive"
+
+
 def select_verb_templates_for_stem(stem: str, templates: List[str], full_generation: bool) -> List[str]:
     """
     Reduce overgeneration by pairing derived stems with matching template families.
@@ -704,13 +1086,14 @@ def select_verb_templates_for_stem(stem: str, templates: List[str], full_generat
     if not full_generation:
         return templates
 
-    if stem.endswith("ப்படு") or stem.endswith("ப்பெறு"):
+    family = verb_template_family(stem)
+    if family == "passive":
         filtered = [t for t in templates if "+complex+passive+" in t]
         return filtered or templates
-    if stem.endswith("திரு") or stem.endswith("விடு"):
+    if family == "aspect":
         filtered = [t for t in templates if "+complex+aspect+" in t]
         return filtered or templates
-    if stem.endswith("க்க"):
+    if family == "simple":
         filtered = [t for t in templates if "+sim+" in t and "+complex+" not in t]
         return filtered or templates
     # Canonical passive upper analyses are keyed by the active lemma. Try both
@@ -725,37 +1108,51 @@ def select_verb_templates_for_stem(stem: str, templates: List[str], full_generat
 
 def write_heuristic_outputs(
     heuristic_rows: List[Dict[str, object]],
-    heuristic_forms: Set[str],
+    heuristic_forms: SortedRuns,
     heuristic_audit_rows: List[Dict[str, object]],
 ) -> None:
-    with open(HEURISTIC_CLASSIFIED_OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(heuristic_rows, f, ensure_ascii=False, indent=2, sort_keys=True)
-    with open(HEURISTIC_FORMS_OUTPUT_FILE, "w", encoding="utf-8") as f:
-        for word in sorted(heuristic_forms):
-            f.write(word + "\n")
-    with open(HEURISTIC_AUDIT_OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(heuristic_audit_rows, f, ensure_ascii=False, indent=2, sort_keys=True)
+    write_json_report(HEURISTIC_CLASSIFIED_OUTPUT_FILE, heuristic_rows)
+    patch_sorted_word_file(HEURISTIC_FORMS_OUTPUT_FILE, heuristic_forms.words())
+    write_json_report(HEURISTIC_AUDIT_OUTPUT_FILE, heuristic_audit_rows)
 
 
 def write_unclassified_vuizur_reports(
     rows: List[Dict[str, object]],
     pos_counts: Dict[str, int],
 ) -> None:
-    with open(UNCLASSIFIED_VUIZUR_OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(rows, f, ensure_ascii=False, indent=2, sort_keys=True)
+    write_json_report(UNCLASSIFIED_VUIZUR_OUTPUT_FILE, rows)
     summary = {
         "total_unclassified_vuizur_lemmas": len(rows),
         "pos_counts": {k: pos_counts[k] for k in sorted(pos_counts)},
         "top_200_preview": rows[:200],
     }
-    with open(UNCLASSIFIED_VUIZUR_SUMMARY_FILE, "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2, sort_keys=True)
+    write_json_report(UNCLASSIFIED_VUIZUR_SUMMARY_FILE, summary)
 
 
-def main() -> None:
+def run_generation(
+    executor: Optional[Executor],
+    state_path: Optional[Path],
+    incremental: bool,
+    feed_window: int = 1,
+    memory_budget: Optional[int] = None,
+) -> None:
+    # The form unions' run files are deleted however generation ends.
+    with SortedRuns(memory_budget) as all_forms, SortedRuns(memory_budget) as heuristic_forms:
+        generate_forms(executor, state_path, incremental, feed_window, memory_budget, all_forms, heuristic_forms)
+
+
+def generate_forms(
+    executor: Optional[Executor],
+    state_path: Optional[Path],
+    incremental: bool,
+    feed_window: int,
+    memory_budget: Optional[int],
+    all_forms: SortedRuns,
+    heuristic_forms: SortedRuns,
+) -> None:
     print("=== FST Headword Classification + Form Generation ===\n")
 
-    if not check_flookup_installed():
+    if shared_pool().backend == "flookup" and not check_flookup_installed():
         print("ERROR: flookup not available. Install with: brew install foma")
         sys.exit(1)
 
@@ -768,9 +1165,16 @@ def main() -> None:
         sys.exit(1)
 
     print(f"Using FST models from: {fst_dir}")
+    if memory_budget is not None and state_path is not None:
+        # The snapshot keeps every lemma's surfaces, so it is not covered by
+        # the budget; only --no-state keeps the run within it.
+        print("NOTE: the generation snapshot is held in memory outside --memory-budget-mb (use --no-state)")
 
     # Step 1: Unified lemma pool
     full_fst_generation = str(os.environ.get("FULL_FST_GENERATION", "")).lower() == "true"
+    previous_state = (
+        load_generation_state(state_path, full_fst_generation) if incremental and state_path is not None else None
+    )
     wiktionary_exclusions = load_wiktionary_exclusions()
     lexicon_words, lexicon_pos_hints = load_lexicon_headwords()
     wiktionary_dump_words = load_tamil_wiktionary_dump_headwords()
@@ -807,15 +1211,82 @@ def main() -> None:
     )
 
     # Step 2: Classification + generation
-    all_forms: Set[str] = set()
-    class_map: Dict[str, Set[str]] = {}
+    # The surface union is buffered in memory, each word tagged with the first
+    # model that produced it. Whenever the buffer outgrows --memory-budget-mb
+    # it is written out as one sorted run; the runs are merged once at the end.
+    lemma_pool = LemmaPool(headwords)
+    class_map = ClassMembership(lemma_pool)
     runtime_citation_verbs: Set[str] = set()
     generation_audit: List[Dict[str, object]] = []
 
-    for fst_name in FST_ORDER:
+    # Models are prepared (classified, generation submitted) and merged
+    # strictly in FST_ORDER; that keeps the outputs identical to a serial run
+    # whatever the --jobs setting. With an executor, the next model is
+    # prepared while the current one's generation results are merged, so at
+    # most two models' lemma sets and surfaces are held at once. With a
+    # compatible state snapshot, only lemmas new to the pool (or every lemma,
+    # for a model whose sha256 changed) are sent for classification. When a
+    # current any-model router sits beside the models, each lemma is sent only
+    # to the models whose surface side accepts it; the rest cannot analyze it.
+    headword_set = set(headwords)
+    previous_models: Dict[str, Dict[str, object]] = {}
+    previous_pool: Set[str] = set()
+    if previous_state is not None:
+        previous_models = previous_state["models"]
+        previous_pool = set(previous_state["lemmas"])
+        print(
+            f"Incremental run: +{len(headword_set - previous_pool)} / "
+            f"-{len(previous_pool - headword_set)} lemmas vs previous snapshot"
+        )
+    next_state_models: Dict[str, Dict[str, object]] = {}
+    incremental_audit: Dict[str, Dict[str, object]] = {}
+    model_shas = {fst_name: model_digest(fst_dir / fst_name) for fst_name in FST_ORDER}
+    router = load_router(fst_dir)
+    lemma_owners: Optional[Dict[str, List[str]]] = None
+    if router is not None and set(FST_ORDER) <= set(router.models):
+        to_route = headwords
+        if all(
+            name in previous_models and previous_models[name]["sha256"] == model_shas[name]
+            for name in FST_ORDER
+        ):
+            to_route = [lemma for lemma in headwords if lemma not in previous_pool]
+        lemma_owners = router.owners(to_route)
+        owned = sum(1 for owners in lemma_owners.values() if owners)
+        print(f"Routed {len(lemma_owners)} lemmas via {router.path.name}: {owned} owned by at least one model")
+    else:
+        print("No current any-model router; classifying every lemma against every model")
+
+    def prepare_model(fst_name: str) -> Tuple[str, List[str], int, Dict[str, Set[str]], Optional[LookupFeed]]:
         fst_path = fst_dir / fst_name
-        print(f"\n=== {fst_name} ===")
-        recognized = forward_classify(fst_path, headwords)
+        model_sha = model_shas[fst_name]
+        previous = previous_models.get(fst_name)
+        if previous is not None and previous["sha256"] == model_sha:
+            analyses_by_lemma = {
+                lemma: analyses for lemma, analyses in previous["analyses"].items() if lemma in headword_set
+            }
+            to_classify = [lemma for lemma in headwords if lemma not in previous_pool]
+        else:
+            analyses_by_lemma = {}
+            to_classify = headwords
+        if lemma_owners is not None:
+            to_classify = [lemma for lemma in to_classify if fst_name in lemma_owners[lemma]]
+        next_state_models[fst_name] = {"sha256": model_sha}
+        incremental_audit[fst_name] = {
+            "model_changed": previous is None or previous["sha256"] != model_sha,
+            "classified_lemmas": len(to_classify),
+            "routed": lemma_owners is not None,
+        }
+        for lemma, analysis in gather_list(LookupFeed(executor, forward_classify, fst_path, to_classify, feed_window)):
+            analyses_by_lemma.setdefault(lemma, []).append(analysis)
+        if state_path is not None:
+            next_state_models[fst_name]["analyses"] = {
+                lemma: analyses_by_lemma[lemma] for lemma in sorted(analyses_by_lemma)
+            }
+        recognized = [
+            (lemma, analysis)
+            for lemma in headwords
+            for analysis in analyses_by_lemma.get(lemma, [])
+        ]
         filtered_lemmas: Set[str] = set()
         for lemma, analysis in recognized:
             override_class = LEMMA_CLASS_OVERRIDES.get(lemma)
@@ -830,50 +1301,85 @@ def main() -> None:
             if "+verbalnoun=தல்" in analysis and "verb" in pos_hints:
                 runtime_citation_verbs.add(lemma)
         lemma_set = sorted(filtered_lemmas)
-        print(f"Recognized lemmas: {len(lemma_set)}")
-
-        for lemma in lemma_set:
-            class_map.setdefault(lemma, set()).add(fst_name)
-            if is_valid_form(lemma):
-                all_forms.add(lemma)
 
-        generated: Set[str] = set()
-        template_count = 0
-        if fst_name == "noun.fst" and lemma_set:
-            template_count = len(NOUN_TAGS)
-            analyses = [lemma + tag for lemma in lemma_set for tag in NOUN_TAGS]
-            generated = inverse_generate_forms(fst_path, analyses)
-            print(f"Generated noun forms: {len(generated)}")
-        elif fst_name == "adj.fst" and lemma_set:
-            template_count = len(ADJ_TAGS)
-            analyses = [lemma + tag for lemma in lemma_set for tag in ADJ_TAGS]
-            generated = inverse_generate_forms(fst_path, analyses)
-            print(f"Generated adjective forms: {len(generated)}")
+        templates: List[str] = []
+        if fst_name == "noun.fst":
+            templates = NOUN_TAGS
+        elif fst_name == "adj.fst":
+            templates = ADJ_TAGS
         elif fst_name.startswith("verb-") and lemma_set:
             lexc_path = resolve_verb_lexc(fst_name)
             if lexc_path is None:
-                print("WARNING: Verb lexc source not found; skipping inverse generation for this class")
+                print(f"WARNING: Verb lexc source not found for {fst_name}; skipping inverse generation")
             else:
                 templates = extract_verb_templates_from_lexc(lexc_path, conservative=not full_fst_generation)
-                if templates:
-                    template_count = len(templates)
-                    analyses = [lemma + tag for lemma in lemma_set for tag in templates]
-                    generated = inverse_generate_forms(fst_path, analyses)
-                    print(f"Generated verb forms: {len(generated)} (templates: {len(templates)})")
-                else:
-                    print("WARNING: No verb templates extracted from lexc; skipping inverse generation")
+                if not templates:
+                    print(f"WARNING: No verb templates extracted for {fst_name}; skipping inverse generation")
+        template_count = len(templates) if lemma_set else 0
+        templates_sha = hashlib.sha256("\n".join(templates).encode("utf-8")).hexdigest()
+        next_state_models[fst_name]["templates_sha256"] = templates_sha
+
+        reused_surfaces: Dict[str, Set[str]] = {}
+        if (
+            previous is not None
+            and not incremental_audit[fst_name]["model_changed"]
+            and previous["templates_sha256"] == templates_sha
+        ):
+            previous_surfaces = previous["surfaces"]
+            reused_surfaces = {
+                lemma: set(previous_surfaces[lemma]) for lemma in lemma_set if lemma in previous_surfaces
+            }
+        to_generate = [lemma for lemma in lemma_set if lemma not in reused_surfaces] if templates else []
+        analyses = AnalysisPlan()
+        tags = analyses.template_set(templates)
+        for lemma in to_generate:
+            analyses.add(lemma, tags)
+        generation_feed = (
+            LookupFeed(executor, inverse_generate_forms_by_lemma, fst_path, analyses, feed_window)
+            if analyses else None
+        )
+        for lemma in to_generate:
+            reused_surfaces.setdefault(lemma, set())
+        incremental_audit[fst_name]["generated_lemmas"] = len(to_generate)
+        incremental_audit[fst_name]["reused_lemmas"] = len(lemma_set) - len(to_generate) if templates else 0
+        return fst_name, lemma_set, template_count, reused_surfaces, generation_feed
+
+    prepared = prefetched((prepare_model(name) for name in FST_ORDER), 1 if executor is not None else 0)
+    for model_index, (fst_name, lemma_set, template_count, surfaces_by_lemma, generation_feed) in enumerate(prepared):
+        print(f"\n=== {fst_name} ===")
+        print(f"Recognized lemmas: {len(lemma_set)}")
+        for lemma in lemma_set:
+            class_map.add(lemma, fst_name)
+            if is_valid_form(lemma):
+                all_forms.add(lemma, model_index)
+
+        for result in generation_feed or ():
+            for lemma, surfaces in result.items():
+                surfaces_by_lemma[lemma] |= surfaces
+        if state_path is not None:
+            next_state_models[fst_name]["surfaces"] = {
+                lemma: sorted(surfaces_by_lemma[lemma]) for lemma in sorted(surfaces_by_lemma)
+            }
+        generated: Set[str] = set()
+        for surfaces in surfaces_by_lemma.values():
+            generated |= surfaces
+        if surfaces_by_lemma and template_count:
+            if fst_name == "noun.fst":
+                print(f"Generated noun forms ({fst_name}): {len(generated)}")
+            elif fst_name == "adj.fst":
+                print(f"Generated adjective forms ({fst_name}): {len(generated)}")
+            else:
+                print(f"Generated verb forms ({fst_name}): {len(generated)} (templates: {template_count})")
 
-        all_forms |= generated
+        all_forms.update(generated, model_index)
+        surfaces_by_lemma.clear()
+        # running_union_surfaces is filled in from the final merge.
         generation_audit.append({
             "model": fst_name,
             "recognized_lemmas": len(lemma_set),
             "generation_templates": template_count,
             "generated_surfaces": len(generated),
-            "running_union_surfaces": len(all_forms),
         })
-        print(f"Running total forms: {len(all_forms)}")
-
-    direct_runtime_form_count = len(all_forms)
 
     # Step 2b: heuristic class prediction for unclassified headwords.
     include_heuristic_lemmas = str(os.environ.get("INCLUDE_HEURISTIC_LEMMAS", "")).lower() == "true"
@@ -881,21 +1387,47 @@ def main() -> None:
     if full_fst_generation:
         include_heuristic_inflections = True
     training: Dict[str, str] = {}
-    for lemma, classes in class_map.items():
-        primary = pick_primary_class(classes)
+    # Training order (first classifying model, then pool order) fixes the
+    # suffix predictor's tie-breaks.
+    for lemma, mask in sorted(class_map.masked(), key=lambda item: item[1] & -item[1]):
+        primary = pick_primary_class(classes_of_mask(mask))
         if primary:
             training[lemma] = primary
     class_counts: Dict[str, int] = {}
     for klass in training.values():
         class_counts[klass] = class_counts.get(klass, 0) + 1
-    suffix_model = build_suffix_model(training)
+    suffix_window = int(os.environ.get("HEURISTIC_SUFFIX_WINDOW", str(HEURISTIC_SUFFIX_WINDOW)))
+    suffix_predictor = SuffixPredictor(training, class_counts, max_suffix_len=suffix_window)
     heuristic_rows: List[Dict[str, object]] = []
-    heuristic_forms: Set[str] = set()
     heuristic_audit_rows: List[Dict[str, object]] = []
-    predicted_by_class: Dict[str, List[str]] = {}
+    predicted_classes = ClassMembership(lemma_pool)
     unclassified_vuizur_rows: List[Dict[str, object]] = []
     unclassified_vuizur_pos_counts: Dict[str, int] = {}
 
+    candidate_allowed: Dict[str, Optional[Set[str]]] = {}
+    for lemma in headwords:
+        if lemma in class_map or LEMMA_CLASS_OVERRIDES.get(lemma):
+            continue
+        pos_hints = source_pos_hints.get(lemma, set())
+        allowed_classes = allowed_classes_from_pos_hints(pos_hints) if pos_hints else None
+        shape_allowed = infer_allowed_classes_from_lemma_shape(lemma)
+        if shape_allowed is not None:
+            if allowed_classes is None:
+                allowed_classes = shape_allowed
+            else:
+                allowed_classes = allowed_classes & shape_allowed
+        candidate_allowed[lemma] = allowed_classes
+    predictions = dict(zip(
+        candidate_allowed,
+        suffix_predictor.predict(
+            candidate_allowed, [suffix_predictor.mask(allowed) for allowed in candidate_allowed.values()],
+        ),
+    ))
+    print(
+        f"Suffix predictor: {len(suffix_predictor.children)} trie nodes "
+        f"(window {suffix_window}), {len(predictions)} candidate lemmas"
+    )
+
     for lemma in headwords:
         if lemma in class_map:
             continue
@@ -916,26 +1448,15 @@ def main() -> None:
             if pos_hints:
                 row["pos_hints"] = sorted(pos_hints)
             heuristic_rows.append(row)
-            predicted_by_class.setdefault(override_class, []).append(lemma)
+            predicted_classes.add(lemma, override_class)
             if include_heuristic_lemmas and is_valid_form(lemma):
                 heuristic_forms.add(lemma)
             continue
 
         pos_hints = source_pos_hints.get(lemma, set())
-        allowed_classes = allowed_classes_from_pos_hints(pos_hints) if pos_hints else None
+        allowed_classes = candidate_allowed[lemma]
         shape_allowed = infer_allowed_classes_from_lemma_shape(lemma)
-        if shape_allowed is not None:
-            if allowed_classes is None:
-                allowed_classes = shape_allowed
-            else:
-                allowed_classes = allowed_classes & shape_allowed
-
-        predicted = predict_class_with_suffix_model(
-            lemma,
-            suffix_model,
-            allowed_classes=allowed_classes,
-            class_counts=class_counts,
-        )
+        predicted = predictions[lemma]
         if not predicted:
             pos_fallback_class = pick_pos_fallback_class(pos_hints, allowed_classes)
             if pos_fallback_class:
@@ -950,7 +1471,7 @@ def main() -> None:
                 if pos_hints:
                     row["pos_hints"] = sorted(pos_hints)
                 heuristic_rows.append(row)
-                predicted_by_class.setdefault(pos_fallback_class, []).append(lemma)
+                predicted_classes.add(lemma, pos_fallback_class)
                 if include_heuristic_lemmas and is_valid_form(lemma):
                     heuristic_forms.add(lemma)
                 continue
@@ -1002,34 +1523,38 @@ def main() -> None:
         if pos_hints:
             row["pos_hints"] = sorted(pos_hints)
         heuristic_rows.append(row)
-        predicted_by_class.setdefault(klass, []).append(lemma)
+        predicted_classes.add(lemma, klass)
         if include_heuristic_lemmas and is_valid_form(lemma):
             heuristic_forms.add(lemma)
 
     # Runtime citation recognition must not suppress the established secondary
     # stem expansion used for passive and light-verb generation.
     for lemma in runtime_citation_verbs:
-        primary = pick_primary_class(class_map.get(lemma, set()))
+        primary = pick_primary_class(class_map.classes(lemma))
         if primary:
-            predicted_by_class.setdefault(primary, []).append(lemma)
+            predicted_classes.add(lemma, primary)
 
     if include_heuristic_inflections:
         print("Running controlled heuristic inflection synthesis...")
-        generation_by_class = expand_heuristic_generation_classes(predicted_by_class)
+        generation_by_class = expand_heuristic_generation_classes(predicted_classes)
         for klass, lemmas in sorted(generation_by_class.items()):
             fst_path = fst_dir / klass
             if not fst_path.exists():
                 continue
 
-            analyses: List[str] = []
+            analyses = AnalysisPlan()
             template_count = 0
 
             if klass == "noun.fst":
                 noun_tags = NOUN_TAGS if full_fst_generation else CONTROLLED_HEURISTIC_NOUN_TAGS
-                analyses = [lemma + tag for lemma in lemmas for tag in noun_tags]
+                tags = analyses.template_set(noun_tags)
+                for lemma in lemmas:
+                    analyses.add(lemma, tags)
                 template_count = len(noun_tags)
             elif klass == "adj.fst":
-                analyses = [lemma + tag for lemma in lemmas for tag in ADJ_TAGS]
+                tags = analyses.template_set(ADJ_TAGS)
+                for lemma in lemmas:
+                    analyses.add(lemma, tags)
                 template_count = len(ADJ_TAGS)
             elif klass.startswith("verb-"):
                 lexc_path = resolve_verb_lexc(klass)
@@ -1043,17 +1568,22 @@ def main() -> None:
                         ]
                     template_count = len(templates)
                     expanded = expand_heuristic_verb_lemmas(lemmas, klass=klass)
-                    analyses = []
-                    normalized_inputs: Set[str] = set()
+                    # A stem's tag list depends only on its template family, so
+                    # each family's list is selected once and shared by id; a
+                    # stem derived from several lemmas is planned once.
+                    family_sets: Dict[str, int] = {}
                     for _lemma, candidates in expanded.items():
                         for stem in sorted(candidates):
-                            normalized_inputs.add(stem)
-                            stem_templates = select_verb_templates_for_stem(
-                                stem,
-                                templates,
-                                full_generation=full_fst_generation,
-                            )
-                            analyses.extend(stem + tag for tag in stem_templates)
+                            if stem in analyses.stem_ids:
+                                continue
+                            family = verb_template_family(stem) if full_fst_generation else ""
+                            if family not in family_sets:
+                                family_sets[family] = analyses.template_set(select_verb_templates_for_stem(
+                                    stem,
+                                    templates,
+                                    full_generation=full_fst_generation,
+                                ))
+                            analyses.add(stem, family_sets[family])
 
             if not analyses:
                 heuristic_audit_rows.append({
@@ -1067,16 +1597,22 @@ def main() -> None:
                 })
                 continue
 
-            generated = inverse_generate_forms(fst_path, analyses)
-            validated = forward_filter_forms(fst_path, generated)
+            # Surfaces go to forward validation as each generation chunk
+            # returns, so the two stages overlap on the pool.
+            generated = set()
+            generation = LookupFeed(executor, inverse_generate_forms, fst_path, analyses, feed_window)
+            validated = gather_set(LookupFeed(
+                executor, forward_filter_forms, fst_path, fresh_surfaces(generation, generated), feed_window,
+                chunked=True,
+            ))
             added = {w for w in validated if is_valid_form(w)}
-            heuristic_forms |= added
+            heuristic_forms.update(added)
 
             heuristic_audit_rows.append({
                 "class": klass,
                 "predicted_lemmas": len(lemmas),
                 "templates_used": template_count,
-                "normalized_or_predicted_inputs": len({a.split('+', 1)[0] for a in analyses}) if analyses else 0,
+                "normalized_or_predicted_inputs": len(analyses.stems),
                 "generated_candidates": len(generated),
                 "forward_validated": len(validated),
                 "accepted_added": len(added),
@@ -1084,48 +1620,87 @@ def main() -> None:
             })
 
         print(
-            f"Controlled heuristic inflections enabled: +{len(heuristic_forms)} "
+            f"Controlled heuristic inflections enabled: +{heuristic_forms.count()} "
             "heuristic forms/lemmas (combined)"
         )
 
+    heuristic_source = len(FST_ORDER)
     if include_heuristic_lemmas:
-        print(f"Heuristic lemma inclusion enabled: +{len(heuristic_forms)} heuristic entries")
-        all_forms |= heuristic_forms
+        print(f"Heuristic lemma inclusion enabled: +{heuristic_forms.count()} heuristic entries")
+        all_forms.update(heuristic_forms.words(), heuristic_source)
     elif include_heuristic_inflections:
-        all_forms |= heuristic_forms
+        all_forms.update(heuristic_forms.words(), heuristic_source)
     else:
         print(
             f"Heuristic classification generated {len(heuristic_rows)} predictions "
             "(not added to dictionary; set INCLUDE_HEURISTIC_LEMMAS=true to include lemmas)"
         )
 
-    # Step 3: final filtering + output
-    all_forms = {w for w in all_forms if is_valid_form(w)}
-    sorted_forms = sorted(all_forms)
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        for word in sorted_forms:
-            f.write(word + "\n")
+    # Step 3: final filtering + output, streamed from the k-way merge of the
+    # runs. Each word is tallied under the first model (or the heuristic pass)
+    # that produced it, which gives the running union sizes.
+    source_counts = [0] * (heuristic_source + 1)
+    final_count = [0]
+
+    def final_forms() -> Iterator[str]:
+        for word, source in all_forms.merged():
+            source_counts[source] += 1
+            if is_valid_form(word):
+                final_count[0] += 1
+                yield word
+
+    added_count, removed_count = patch_sorted_word_file(OUTPUT_FILE, final_forms())
+    for model_index, row in enumerate(generation_audit):
+        row["running_union_surfaces"] = sum(source_counts[:model_index + 1])
+        print(f"Running total forms after {row['model']}: {row['running_union_surfaces']}")
+    direct_runtime_form_count = sum(source_counts[:heuristic_source])
+    print(f"\nForms file delta: +{added_count} / -{removed_count}")
 
     write_classification_map(class_map)
     write_heuristic_outputs(heuristic_rows, heuristic_forms, heuristic_audit_rows)
+    spilled_runs = len(all_forms.runs) + len(heuristic_forms.runs)
     GENERATION_AUDIT_OUTPUT_FILE.write_text(json.dumps({
         "full_fst_generation": full_fst_generation,
         "source_lemma_pool": len(headwords),
         "direct_runtime_union_surfaces": direct_runtime_form_count,
         "heuristic_rows": len(heuristic_rows),
-        "heuristic_surfaces": len(heuristic_forms),
-        "final_generated_union_surfaces": len(sorted_forms),
+        "heuristic_surfaces": heuristic_forms.count(),
+        "final_generated_union_surfaces": final_count[0],
         "models": generation_audit,
+        "lookup_cache": (
+            {"enabled": True, **LOOKUP_CACHE.summary()} if LOOKUP_CACHE is not None else {"enabled": False}
+        ),
+        "incremental": {
+            "from_snapshot": previous_state is not None,
+            "lemmas_added": len(headword_set - previous_pool) if previous_state is not None else len(headword_set),
+            "lemmas_removed": len(previous_pool - headword_set),
+            "forms_added": added_count,
+            "forms_removed": removed_count,
+            "models": incremental_audit,
+        },
+        "memory": {
+            "budget_mb": round(memory_budget / (1024 * 1024)) if memory_budget is not None else None,
+            "spilled_runs": spilled_runs,
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        },
     }, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
     unclassified_vuizur_rows = sorted(
         unclassified_vuizur_rows,
         key=lambda r: (",".join(r.get("pos_hints", [])), r.get("lemma", "")),
     )
     write_unclassified_vuizur_reports(unclassified_vuizur_rows, unclassified_vuizur_pos_counts)
+    if state_path is not None:
+        save_generation_state(state_path, {
+            "schema_version": GENERATION_STATE_SCHEMA,
+            "generator_sha256": model_digest(Path(__file__)),
+            "full_fst_generation": full_fst_generation,
+            "lemmas": headwords,
+            "models": next_state_models,
+        })
 
     size_mb = OUTPUT_FILE.stat().st_size / (1024 * 1024)
     print("\nDone")
-    print(f"Generated forms: {len(sorted_forms)} ({size_mb:.1f} MB)")
+    print(f"Generated forms: {final_count[0]} ({size_mb:.1f} MB)")
     print(f"Forms file: {OUTPUT_FILE}")
     print(f"Classification map: {CLASSIFIED_OUTPUT_FILE}")
     print(f"Heuristic classifications: {HEURISTIC_CLASSIFIED_OUTPUT_FILE}")
@@ -1134,6 +1709,106 @@ def main() -> None:
     print(f"Generation audit: {GENERATION_AUDIT_OUTPUT_FILE}")
     print(f"Unclassified Vuizur lemmas: {UNCLASSIFIED_VUIZUR_OUTPUT_FILE}")
     print(f"Unclassified Vuizur summary: {UNCLASSIFIED_VUIZUR_SUMMARY_FILE}")
+    if state_path is not None:
+        print(f"Generation state: {state_path}")
+    print(f"Peak RSS: {peak_rss_mb():.0f} MB (this process; {spilled_runs} spilled runs)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=int(os.environ.get("FST_GENERATION_JOBS", "1")),
+        help="worker processes for lookups (1 = this process only, 0 = all cores; env FST_GENERATION_JOBS)",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        default=str(os.environ.get("FST_GENERATION_PIPELINE", "")).lower() == "true",
+        help="with --jobs 1, overlap lookup feeds on threads in this process (env FST_GENERATION_PIPELINE)",
+    )
+    parser.add_argument(
+        "--in-flight-chunks-per-feed",
+        type=int,
+        default=int(os.environ.get("FST_GENERATION_IN_FLIGHT", "0")),
+        help="lookup chunks each feed keeps queued on the pool; at most two feeds are live at once "
+        "(0 = twice the workers; env FST_GENERATION_IN_FLIGHT)",
+    )
+    parser.add_argument(
+        "--lookup-cache",
+        type=Path,
+        default=Path(os.environ.get("FLOOKUP_CACHE_PATH", str(LOOKUP_CACHE_FILE))),
+        help="SQLite cache of flookup results keyed by model sha256 (env FLOOKUP_CACHE_PATH)",
+    )
+    parser.add_argument(
+        "--lookup-cache-max-mb",
+        type=int,
+        default=int(os.environ.get("FLOOKUP_CACHE_MAX_MB", "2048")),
+        help="evict least recently used cache rows beyond this size (env FLOOKUP_CACHE_MAX_MB)",
+    )
+    parser.add_argument("--no-lookup-cache", action="store_true", help="always query flookup directly")
+    parser.add_argument(
+        "--lookup-backend",
+        choices=BACKENDS,
+        default=default_backend(),
+        help="flookup subprocesses or the in-process foma reader (env FST_LOOKUP_BACKEND)",
+    )
+    parser.add_argument(
+        "--state",
+        type=Path,
+        default=GENERATION_STATE_FILE,
+        help="snapshot of lemma pool, classes and per-lemma surfaces used for incremental runs",
+    )
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        default=str(os.environ.get("FST_GENERATION_FULL_REBUILD", "")).lower() == "true",
+        help="ignore the previous snapshot and reclassify everything (env FST_GENERATION_FULL_REBUILD)",
+    )
+    parser.add_argument("--no-state", action="store_true", help="neither read nor write the snapshot")
+    parser.add_argument(
+        "--memory-budget-mb",
+        type=int,
+        default=int(os.environ.get("DICTIONARY_MEMORY_BUDGET_MB", "0")),
+        help="spill the form unions to sorted runs on disk past this size; the incremental "
+        "snapshot is still held in memory, so pair with --no-state for a bounded run "
+        "(0 = keep it in memory; env DICTIONARY_MEMORY_BUDGET_MB)",
+    )
+    args = parser.parse_args()
+    # Exported so --jobs worker processes pick the same backend.
+    os.environ[BACKEND_ENV] = args.lookup_backend
+    cache_path = None if args.no_lookup_cache else args.lookup_cache
+    cache_args = (cache_path, args.lookup_cache_max_mb * 1024 * 1024)
+    configure_lookup_cache(*cache_args)
+    if cache_path is not None:
+        print(f"Lookup cache: {cache_path}")
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    state_path = None if args.no_state else args.state
+    incremental = not args.full_rebuild
+    memory_budget = budget_from_mb(args.memory_budget_mb)
+    if jobs == 1 and not args.pipeline:
+        run_generation(None, state_path, incremental, memory_budget=memory_budget)
+        return
+    if jobs == 1:
+        # Each chunk is a task on the thread pool, but all chunks of one model
+        # and direction queue on that model's single flookup worker. What runs
+        # concurrently is the two live feeds: the next model's classification
+        # (or heuristic validation) against the current model's generation.
+        # One thread per in-flight chunk keeps a chunk waiting on a busy
+        # worker from holding up the other feed.
+        feed_window = args.in_flight_chunks_per_feed if args.in_flight_chunks_per_feed > 0 else 2
+        threads = 2 * feed_window
+        print(f"Pipelined lookups: {threads} threads, up to {feed_window} chunks in flight per feed")
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            run_generation(executor, state_path, incremental, feed_window, memory_budget)
+        return
+    feed_window = args.in_flight_chunks_per_feed if args.in_flight_chunks_per_feed > 0 else 2 * jobs
+    print(f"Parallel lookups: {jobs} worker processes, up to {feed_window} chunks in flight per feed")
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=configure_lookup_worker, initargs=cache_args,
+    ) as executor:
+        run_generation(executor, state_path, incremental, feed_window, memory_budget)
 
 
 if __name__ == "__main__":